@@ -0,0 +1 @@
+from . prime_nine import __all__, __getattr__, __dir__
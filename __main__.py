@@ -0,0 +1,5 @@
+import sys
+from . prime_nine import main
+
+
+sys.exit(main())
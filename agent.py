@@ -0,0 +1,63 @@
+import random
+from . card import VSCard
+
+
+# *********
+# * Agent *
+# *********
+class Agent:
+    """
+    decision maker of a GamePlayer;
+    the engine asks the agent at every decision point
+    """
+    def choose_vs_card(self, game, player):
+        """
+        return the index in hand of the VSCard to set,
+        or None not to set any card
+        """
+        raise NotImplementedError()
+
+    def choose_tactics_card(self, game, player):
+        """
+        return (index in hand of the TacticsCard, is_open), or None
+        """
+        return None
+
+    def choose_sp_combo(self, game, player, target):
+        """
+        return the index in hand of the PlayerCard of 'target', or None
+        """
+        return None
+
+    def choose_pinch_hitter(self, game, player):
+        """
+        return a bench card to bat instead of the next batter, or None
+        """
+        return None
+
+    def reseed(self, rng):
+        """
+        called before each seeded game; agents without randomness ignore it
+        """
+        pass
+
+
+class RandomAgent(Agent):
+    def __init__(self, rng=None):
+        self.rng = random.Random() if rng is None else rng
+
+    def reseed(self, rng):
+        self.rng = rng
+
+    def choose_vs_card(self, game, player):
+        candidates = vs_card_indices(player.deck_master.hand)
+        if len(candidates) == 0:
+            return None
+        return self.rng.choice(candidates)
+
+
+def vs_card_indices(hand):
+    return [
+        idx for idx, card in enumerate(hand)
+        if isinstance(card, VSCard)
+    ]
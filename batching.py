@@ -0,0 +1,219 @@
+import asyncio
+import numpy as np
+from . card import Course, VSCard
+from . game import VSCardDecision
+from . server import AsyncAgent
+
+
+# ****************
+# * StateEncoder *
+# ****************
+class StateEncoder:
+    """
+    numeric encoding of decisions:
+      state: game context seen from the deciding player
+      options: one feature row per legal answer
+    Decisions of other types than 'decision_types' are not encoded
+    and are left to the built-in agent of the player.
+    """
+    decision_types = (VSCardDecision,)
+    n_state_features = 10
+    n_option_features = 3 + len(Course)
+
+    def supports(self, decision):
+        return isinstance(decision, self.decision_types)
+
+    def encode_state(self, decision):
+        game = decision.game
+        side = decision.side
+        score = game.score_board.total_score
+        is_offense = game.is_bottom == side
+        batter = game.field.batter if game.field.batter_box else None
+        pitcher = game.field.mound
+        return np.array([
+            game.inning,
+            game.is_bottom,
+            is_offense,
+            game.out,
+            *(runner is not None for runner in game.field.runners),
+            score[side] - score[not side],
+            0 if batter is None else batter.power,
+            0 if pitcher is None else pitcher.power,
+        ], dtype=float)
+
+    def encode_option(self, decision, option):
+        row = np.zeros(self.n_option_features)
+        if option is None:
+            row[0] = 1.0 # pass
+            return row
+        card = decision.player.deck_master.hand[option]
+        if isinstance(card, VSCard):
+            row[1] = card.pw_off
+            row[2] = card.pw_def
+            row[3 + list(Course).index(card.course)] = 1.0
+        return row
+
+    def encode(self, decisions):
+        """
+        returns (states, options, mask) of shapes
+        (batch, n_state), (batch, max_options, n_option), (batch, max_options)
+        """
+        choices = [decision.options() for decision in decisions]
+        width = max(len(options) for options in choices)
+        states = np.zeros((len(decisions), self.n_state_features))
+        options = np.zeros((len(decisions), width, self.n_option_features))
+        mask = np.zeros((len(decisions), width), dtype=bool)
+        for n, (decision, legal) in enumerate(zip(decisions, choices)):
+            states[n] = self.encode_state(decision)
+            for k, option in enumerate(legal):
+                options[n, k] = self.encode_option(decision, option)
+            mask[n, :len(legal)] = True
+        return states, options, mask
+
+
+# ************
+# * Policies *
+# ************
+class BilinearPolicy:
+    """
+    score(state, option) = state @ weight @ option + bias @ option;
+    any callable (states, options, mask) -> scores can stand for it
+    """
+    def __init__(self, weight, bias):
+        self.weight = np.asarray(weight, dtype=float)
+        self.bias = np.asarray(bias, dtype=float)
+
+    @classmethod
+    def random(cls, encoder, rng=None, scale=0.1):
+        rng = np.random.default_rng(rng)
+        return cls(
+            scale * rng.standard_normal(
+                (encoder.n_state_features, encoder.n_option_features)
+            ),
+            scale * rng.standard_normal(encoder.n_option_features),
+        )
+
+    def __call__(self, states, options, mask):
+        return np.einsum(
+            "bi,ij,boj->bo", states, self.weight, options
+        ) + options @ self.bias
+
+
+def choose(scores, mask):
+    """
+    index of the best legal option per row
+    """
+    return np.argmax(np.where(mask, scores, -np.inf), axis=1)
+
+
+# *******************
+# * DecisionBatcher *
+# *******************
+class DecisionBatcher:
+    """
+    gathers decisions of many suspended games and answers them
+    with one policy call per batch.
+    A batch is flushed when 'max_batch_size' decisions are pending
+    or 'max_latency' seconds after its first decision arrived.
+    """
+    def __init__(self, policy, encoder=None, max_batch_size=64,
+                 max_latency=0.005):
+        self.policy = policy
+        self.encoder = StateEncoder() if encoder is None else encoder
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._pending = [] # (decision, future)
+        self._timer = None
+        self.n_batches = 0
+        self.n_decisions = 0
+
+    def evaluate(self, decisions):
+        """
+        answers of 'decisions' by a single policy call
+        """
+        if len(decisions) == 0:
+            return []
+        states, options, mask = self.encoder.encode(decisions)
+        best = choose(self.policy(states, options, mask), mask)
+        self.n_batches += 1
+        self.n_decisions += len(decisions)
+        return [
+            decision.options()[k] for decision, k in zip(decisions, best)
+        ]
+
+    async def submit(self, decision):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((decision, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.max_latency, self.flush
+            )
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        pending = [(d, f) for d, f in pending if not f.done()]
+        if len(pending) == 0:
+            return
+        try:
+            answers = self.evaluate([decision for decision, _ in pending])
+        except Exception as error:
+            for _, future in pending:
+                future.set_exception(error)
+            return
+        for (_, future), answer in zip(pending, answers):
+            future.set_result(answer)
+
+
+class BatchedAgent(AsyncAgent):
+    """
+    AsyncAgent for the GameServer routing decisions through a batcher
+    """
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def decide(self, decision):
+        if not self.batcher.encoder.supports(decision):
+            return decision.ask()
+        return await self.batcher.submit(decision)
+
+
+# *******************
+# * Lockstep Driver *
+# *******************
+def play_batched(games, batcher, sides=(0, 1)):
+    """
+    run 'games' to the end in lockstep without an event loop:
+    every game is advanced to its next decision for the players of
+    'sides', and all of them are answered by one policy call.
+    Other decisions are answered by the players' agents.
+    """
+    running = {}
+    for n, game in enumerate(games):
+        running[n] = (game.play(), None)
+    while running:
+        waiting = {}
+        for n, (steps, answer) in running.items():
+            try:
+                decision = steps.send(answer)
+                while (
+                    decision.side not in sides
+                    or not batcher.encoder.supports(decision)
+                ):
+                    decision = steps.send(decision.ask())
+            except StopIteration:
+                continue
+            waiting[n] = (steps, decision)
+        running = {}
+        items = list(waiting.items())
+        for start in range(0, len(items), batcher.max_batch_size):
+            chunk = items[start:start + batcher.max_batch_size]
+            answers = batcher.evaluate([decision for _, (_, decision) in chunk])
+            for (n, (steps, _)), answer in zip(chunk, answers):
+                running[n] = (steps, answer)
+    return games
@@ -0,0 +1,174 @@
+"""
+belief over the hidden cards of a player from public information.
+
+The deck list of the player is known; drawing reveals only the number
+of cards, cards set face up, opened or trashed reveal their kind. Every card
+not revealed is 'unseen': in the deck pile, in the hand, or set face
+down. With a uniformly shuffled deck, the hand is a uniform draw
+without replacement from the unseen cards (multivariate
+hypergeometric), which is the posterior given the public events.
+The choices of the player's agent are not modelled.
+"""
+from math import comb
+import numpy as np
+from . card import VSCard, PlayerCard
+from . game_player import PlayerObserver
+
+
+def card_kind(card):
+    """
+    key of interchangeable cards
+    """
+    if isinstance(card, VSCard):
+        return ("vs", card._course.name, card.pw_off, card.pw_def)
+    if isinstance(card, PlayerCard):
+        return ("player", card.id)
+    return ("tactics", card.id)
+
+
+# *****************
+# * BeliefTracker *
+# *****************
+class BeliefTracker(PlayerObserver):
+    """
+    counts of unseen cards by kind and of the hidden places, updated
+    by each card event of the watched player in constant time
+    """
+    def __init__(self, deck_list):
+        self.kinds = []
+        self.representatives = []
+        self.index = {}
+        for card in deck_list:
+            kind = card_kind(card)
+            if kind not in self.index:
+                self.index[kind] = len(self.kinds)
+                self.kinds.append(kind)
+                self.representatives.append(card)
+        self.deck_kinds = [self.index[card_kind(card)] for card in deck_list]
+        self.reset()
+
+    @classmethod
+    def attach(cls, game, side):
+        """
+        tracker of game.players[side], i.e. the belief of the other side
+        """
+        player = game.players[side]
+        tracker = cls(player.deck_master.deck.deck_list)
+        player.add_observer(tracker)
+        return tracker
+
+    def reset(self):
+        """
+        every card in the shuffled deck pile
+        """
+        self.unseen = [0] * len(self.kinds)
+        for k in self.deck_kinds:
+            self.unseen[k] += 1
+        self.trash = [0] * len(self.kinds)
+        self.n_deck = len(self.deck_kinds)
+        self.n_hand = 0
+        self.face_down = {} # zone -> number of cards set face down
+        self.face_up = {} # zone -> kinds of the cards set face up
+
+    @property
+    def n_unseen(self):
+        return self.n_deck + self.n_hand + sum(self.face_down.values())
+
+    # --- events ---
+    def on_draw(self, player, cards):
+        for _ in cards:
+            if self.n_deck == 0:
+                # the trash is shuffled back into the deck pile
+                for k, n in enumerate(self.trash):
+                    self.unseen[k] += n
+                self.n_deck = sum(self.trash)
+                self.trash = [0] * len(self.kinds)
+            self.n_deck -= 1
+            self.n_hand += 1
+
+    def on_set_card(self, player, zone, idx, is_open):
+        self.n_hand -= 1
+        if is_open:
+            k = self.index[card_kind(player.deck_master.hand[idx])]
+            self.unseen[k] -= 1
+            self.face_up.setdefault(zone, []).append(k)
+        else:
+            self.face_down[zone] = self.face_down.get(zone, 0) + 1
+
+    def on_open(self, player, zone):
+        for card, is_open in getattr(player.deck_field, zone + "_zone"):
+            if not is_open:
+                k = self.index[card_kind(card)]
+                self.unseen[k] -= 1
+                self.face_down[zone] -= 1
+                self.face_up.setdefault(zone, []).append(k)
+
+    def on_trash_zone(self, player, zone):
+        cards = getattr(player.deck_field, zone + "_zone")
+        for card, _ in cards:
+            k = self.index[card_kind(card)]
+            face_up = self.face_up.get(zone, [])
+            if k in face_up:
+                face_up.remove(k)
+            else:
+                self.unseen[k] -= 1
+                self.face_down[zone] -= 1
+            self.trash[k] += 1
+
+    # --- beliefs ---
+    def expected_hand(self):
+        """
+        expected number of cards of each kind in hand
+        """
+        n = self.n_unseen
+        if n == 0:
+            return np.zeros(len(self.kinds))
+        return np.array(self.unseen, dtype=float) * (self.n_hand / n)
+
+    def prob_in_hand(self, kind, at_least=1):
+        """
+        probability that the hand holds 'at_least' cards of 'kind'
+        """
+        u = self.unseen[self.index[kind]]
+        n, h = self.n_unseen, self.n_hand
+        total = comb(n, h)
+        return sum(
+            comb(u, j) * comb(n - u, h - j)
+            for j in range(at_least, min(u, h) + 1)
+        ) / total
+
+    def sample_counts(self, n_samples, rng=None):
+        """
+        (n_samples, n_kinds) hand compositions drawn from the belief
+        """
+        rng = np.random.default_rng(rng)
+        return rng.multivariate_hypergeometric(
+            np.array(self.unseen, dtype=np.int64), self.n_hand, size=n_samples
+        )
+
+    def sample_hands(self, n_samples, rng=None):
+        """
+        determinized hands: lists of representative cards of each kind
+        """
+        return [
+            [
+                self.representatives[k]
+                for k, n in enumerate(counts) for _ in range(n)
+            ]
+            for counts in self.sample_counts(n_samples, rng)
+        ]
+
+    def determinize(self, rng=None):
+        """
+        one consistent assignment of the unseen cards:
+        (hand, {zone: face-down cards}, deck pile in drawing order)
+        """
+        rng = np.random.default_rng(rng)
+        pool = np.repeat(np.arange(len(self.kinds)), self.unseen)
+        rng.shuffle(pool)
+        cards = [self.representatives[k] for k in pool]
+        hand, rest = cards[:self.n_hand], cards[self.n_hand:]
+        face_down = {}
+        for zone, n in self.face_down.items():
+            face_down[zone], rest = rest[:n], rest[n:]
+        return hand, face_down, rest
@@ -0,0 +1,317 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+import pandas as pd
+from . card import (
+    BatHand, Position, Course, Point, MeetShotPts, PlayerCard, VSCard,
+)
+from . game import Rule, GaugeCheckAction, HitGauge, OutGauge, AtBatResult
+from . game_player import GamePlayer, DeckMaster, Deck, DeckField, TeamStatus
+from . event_log import record_game, replay_to, ReplayState
+from . simulation import play_game
+from . suspend import LiveMatch
+
+
+# ******************
+# * Workload Teams *
+# ******************
+LINEUP_POSITIONS = (
+    Position.CATCHER, Position.INFIELDER, Position.INFIELDER,
+    Position.INFIELDER, Position.INFIELDER, Position.OUTFIELDER,
+    Position.OUTFIELDER, Position.OUTFIELDER, Position.DH,
+)
+
+
+def _ms_pts(rng):
+    ms_pts = MeetShotPts()
+    for course in Course:
+        ms_pts[course] = rng.choice(
+            [Point.NULL, Point.NULL, Point.FILL, Point.STAR]
+        )
+    return ms_pts
+
+
+def _player(seed, base_id=0, deck_size=30):
+    """
+    seeded synthetic GamePlayer of the workloads: nine batters,
+    a pitcher and a deck of VSCards; card ids start from 'base_id'
+    """
+    rng = random.Random(seed)
+    rows = []
+    for order, position in enumerate(LINEUP_POSITIONS):
+        card = PlayerCard(
+            base_id + order, BatHand.RIGHT, {position},
+            _ms_pts(rng), rng.randint(1, 4), 1,
+        )
+        rows.append(dict(
+            card=card, position=position, order=order, is_penalty=False
+        ))
+    pitcher = PlayerCard(
+        base_id + 9, BatHand.RIGHT, {Position.PITCHER},
+        _ms_pts(rng), rng.randint(1, 4), 1,
+    )
+    rows.append(dict(
+        card=pitcher, position=Position.PITCHER, order=-1, is_penalty=False
+    ))
+    deck = [
+        VSCard(
+            base_id + 100 + k, rng.choice(list(Course)),
+            rng.randint(0, 2), rng.randint(0, 2),
+        )
+        for k in range(deck_size)
+    ]
+    return GamePlayer(
+        DeckMaster(Deck(deck)), DeckField(), TeamStatus(pd.DataFrame(rows))
+    )
+
+
+_RULE = Rule(9, 12, True)
+
+
+# *************
+# * Workloads *
+# *************
+# each workload builds its data and returns (run, n_ops);
+# run() performs n_ops operations of the measured kind
+def full_game(n_games=5):
+    visitor, home = _player(1, 0), _player(2, 1000)
+
+    def run():
+        for seed in range(n_games):
+            play_game(visitor, home, _RULE, seed)
+    return run, n_games
+
+
+def gauge_check(n_checks=20000):
+    rng = random.Random(0)
+    batters = [_player(seed).nth_batter(n)
+               for seed in range(3) for n in range(9)]
+    pitchers = [_player(seed).pitcher for seed in range(3)]
+    cards = [
+        VSCard(k, rng.choice(list(Course)), rng.randint(0, 2), rng.randint(0, 2))
+        for k in range(64)
+    ]
+    cases = [
+        (rng.choice(batters), rng.choice(pitchers),
+         rng.choice(cards), rng.choice(cards))
+        for _ in range(n_checks)
+    ]
+    hit_gauge, out_gauge = HitGauge(), OutGauge()
+
+    def run():
+        for batter, pitcher, vs_off, vs_def in cases:
+            GaugeCheckAction.judge(
+                batter, pitcher, vs_off, vs_def, hit_gauge, out_gauge
+            )
+    return run, n_checks
+
+
+class _Field:
+    def __init__(self, bases):
+        self.batter = "batter"
+        self.runners = [
+            "runner" if bases >> i & 1 else None for i in range(3)
+        ]
+
+
+class _Situation:
+    def __init__(self, out, bases):
+        self.out = out
+        self.runs = 0
+        self.field = _Field(bases)
+
+    def add_score(self, n):
+        self.runs += n
+
+
+def at_bat_apply(n_rounds=200):
+    results = AtBatResult.__subclasses__()
+    cases = [
+        (result, out, bases)
+        for result in results for out in range(3) for bases in range(8)
+    ]
+
+    def run():
+        for _ in range(n_rounds):
+            for result, out, bases in cases:
+                result.apply(_Situation(out, bases))
+    return run, n_rounds * len(cases)
+
+
+def deck_draws(n_draws=20000):
+    player = _player(3)
+    deck_master = player.deck_master
+
+    def run():
+        deck_master.reset(random.Random(0))
+        for n in range(n_draws):
+            deck_master.draw()
+            if len(deck_master.hand) >= 8:
+                # trash the hand so that the deck is reshuffled regularly
+                for card in deck_master.hand:
+                    deck_master.trash.append(card)
+                deck_master.hand.clear()
+    return run, n_draws
+
+
+def team_status(n_rounds=200):
+    status = _player(4).team_status
+
+    def run():
+        for _ in range(n_rounds):
+            for n in range(9):
+                status.nth_batter(n)
+            status.pitcher
+    return run, n_rounds * 10
+
+
+def replay_snapshot(n_rounds=2000):
+    visitor, home = _player(1, 0), _player(2, 1000)
+    _, log = record_game(visitor, home, _RULE, 0)
+    state = replay_to(log, visitor, home, len(log) // 2)
+
+    def run():
+        for _ in range(n_rounds):
+            ReplayState.from_snapshot(state.snapshot())
+    return run, n_rounds
+
+
+def match_blob(n_rounds=20, n_answers=100):
+    """
+    suspend / resume of a LiveMatch halfway through its game
+    """
+    catalog = SimpleNamespace(
+        teams=[_player(1, 0), _player(2, 1000)],
+        rules=[_RULE],
+    )
+    match = LiveMatch(catalog, 0, 1, 0, seed=0)
+    for _ in range(n_answers):
+        match.answer(match.decision.ask())
+
+    def run():
+        for _ in range(n_rounds):
+            LiveMatch.from_bytes(catalog, match.to_bytes())
+    return run, n_rounds
+
+
+def calibration(n_loops=200000):
+    """
+    fixed pure-Python work timed along with the benchmarks;
+    comparisons divide every timing by it, so that a baseline
+    recorded on another machine still applies
+    """
+    def run():
+        table = {}
+        for n in range(n_loops):
+            table[n & 1023] = table.get(n & 1023, 0) + n % 7
+    return run, n_loops
+
+
+BENCHMARKS = {
+    "full_game": full_game,
+    "gauge_check": gauge_check,
+    "at_bat_apply": at_bat_apply,
+    "deck_draws": deck_draws,
+    "team_status": team_status,
+    "replay_snapshot": replay_snapshot,
+    "match_blob": match_blob,
+}
+
+
+# **********
+# * Runner *
+# **********
+def run_benchmark(workload, repeat=5):
+    """
+    seconds per operation: best and median over 'repeat' runs
+    """
+    run, n_ops = workload()
+    run() # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) / n_ops)
+    return {
+        "best": min(times), "median": statistics.median(times),
+        "n_ops": n_ops, "repeat": repeat,
+    }
+
+
+def run_benchmarks(names=None, repeat=5):
+    names = list(BENCHMARKS) if names is None else names
+    # calibrated before and after, in case the machine load changes
+    before = run_benchmark(calibration, repeat)["best"]
+    results = {
+        name: run_benchmark(BENCHMARKS[name], repeat) for name in names
+    }
+    after = run_benchmark(calibration, repeat)["best"]
+    return {
+        "python": sys.version.split()[0],
+        "calibration": min(before, after),
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    {name: best-time ratio current/baseline} of the benchmarks in both,
+    each time relative to the calibration loop of its run,
+    and the names whose ratio exceeds 1 + tolerance
+    """
+    if "calibration" not in baseline:
+        raise ValueError("the baseline has no calibration: record it again")
+    speed = baseline["calibration"] / current["calibration"]
+    ratios = {
+        name: speed * result["best"] / baseline["results"][name]["best"]
+        for name, result in current["results"].items()
+        if name in baseline["results"]
+    }
+    regressions = [
+        name for name, ratio in ratios.items() if ratio > 1 + tolerance
+    ]
+    return ratios, regressions
+
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="engine benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the results to this JSON")
+    parser.add_argument("--baseline", help="compare with this JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names or None, args.repeat)
+    baseline = load(args.baseline) if args.baseline else None
+    ratios, regressions = ({}, []) if baseline is None else compare(
+        results, baseline, args.tolerance
+    )
+    for name, result in results["results"].items():
+        line = "{:<18} {:>12.3f} us/op".format(name, result["best"] * 1e6)
+        if name in ratios:
+            line += "  x{:.2f}{}".format(
+                ratios[name], "  REGRESSION" if name in regressions else ""
+            )
+        print(line)
+    if args.save:
+        save(results, args.save)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
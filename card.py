@@ -7,20 +7,30 @@ class BatHand(Flag):
     SWITCH = RIGHT | LEFT
 
 
-class Position(Enum):
+class Position(Flag):
     STARTER = auto()
     RELIEVER = auto()
-    PITCHER = STARTER & RELIEVER
+    PITCHER = STARTER | RELIEVER
     CATCHER = auto()
     INFIELDER = auto()
     OUTFIELDER = auto()
     UTIL_CI = CATCHER | INFIELDER
     UTIL_CO = CATCHER | OUTFIELDER
-    UTIL_IO = CATCHER | OUTFIELDER
+    UTIL_IO = INFIELDER | OUTFIELDER
     UTIL_CIO = CATCHER | INFIELDER | OUTFIELDER
     DH = auto()
 
 
+def position_mask(positions):
+    """
+    bits of every position in 'positions'
+    """
+    mask = 0
+    for position in positions:
+        mask |= position.value
+    return mask
+
+
 class Course(Enum):
     CENTER = auto()
     HIGH = auto()
@@ -107,11 +117,19 @@ class PlayerCard(Card):
         self.power = self._power
         self.draw = self._draw
         
+    @property
+    def position_mask(self):
+        return position_mask(self.position)
+
     def is_defensible(self, position):
+        """
+        a card defends a position sharing a bit with one of its own,
+        e.g. UTIL_CI defends CATCHER and a STARTER defends PITCHER
+        """
         if position == Position.DH:
             return True
         else:
-            return position in self.position
+            return bool(position.value & self.position_mask)
         
         
 class TacticsCard(Card):
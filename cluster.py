@@ -0,0 +1,351 @@
+"""
+simulation campaigns spread over several hosts.
+
+A Coordinator owns the seed range [0, n_games) of a Campaign and
+listens on a TCP ("host", port) or Unix socket (path) address;
+workers connect, receive the Campaign once and then ask for batches.
+  - batches are taken from the front of the queue, 'batch_size' seeds
+    at a time; when the queue is empty, an idle worker steals the back
+    half of the largest batch still in progress
+  - workers report every 'chunk_size' games with the accumulator of
+    those games, which the coordinator merges at once
+  - workers send heartbeats; the unfinished part of the batch of a
+    silent or disconnected worker goes back to the queue
+Accumulators travel pickled, so the coordinator and the workers
+must share a secret authkey; there is no default one.
+"""
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener, Client
+from . simulation import play_game
+
+
+def parse_address(text):
+    """
+    "host:port" -> ("host", port); anything else is a Unix socket path
+    """
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return (host, int(port))
+    return text
+
+
+# ****************
+# * Accumulators *
+# ****************
+class Summary:
+    """
+    mergeable accumulator of GameResults
+    """
+    def __init__(self):
+        self.n_games = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.runs = [0, 0]
+        self.innings = 0
+
+    def add(self, result):
+        self.n_games += 1
+        if result.winning_team is None:
+            self.draws += 1
+        else:
+            self.wins[result.winning_team] += 1
+        for side in (0, 1):
+            self.runs[side] += result.score[side]
+        self.innings += result.inning
+
+    def merge(self, other):
+        self.n_games += other.n_games
+        self.draws += other.draws
+        for side in (0, 1):
+            self.wins[side] += other.wins[side]
+            self.runs[side] += other.runs[side]
+        self.innings += other.innings
+        return self
+
+    def win_rate(self, side=0):
+        return (self.wins[side] + 0.5 * self.draws) / self.n_games
+
+    def to_dict(self):
+        return {
+            "games": self.n_games, "wins": self.wins, "draws": self.draws,
+            "runs": self.runs, "innings": self.innings,
+        }
+
+    def __repr__(self):
+        return "Summary(games={}, wins={}, draws={})".format(
+            self.n_games, self.wins, self.draws
+        )
+
+
+class Campaign:
+    """
+    the games to play: seed n of the campaign is "<seed>-<n>";
+    'accumulator' is a class with add(result) and merge(other)
+    """
+    def __init__(self, visitor, home, rule, seed=0, accumulator=Summary):
+        self.visitor = visitor
+        self.home = home
+        self.rule = rule
+        self.seed = seed
+        self.accumulator = accumulator
+
+    def play(self, n):
+        return play_game(
+            self.visitor, self.home, self.rule, "{}-{}".format(self.seed, n)
+        )
+
+
+# ***************
+# * Coordinator *
+# ***************
+class _Assignment:
+    """
+    seeds [start, end) of a worker, [start, done) being merged
+    """
+    def __init__(self, start, end):
+        self.start = start
+        self.done = start
+        self.end = end
+
+    def committed(self, chunk_size):
+        """
+        seeds the worker may be playing without asking again
+        """
+        return min(self.done + chunk_size, self.end)
+
+
+def _check_authkey(authkey):
+    if not authkey:
+        raise ValueError("a non-empty authkey is required")
+    return authkey
+
+
+class Coordinator:
+    def __init__(self, campaign, n_games, authkey, address=("127.0.0.1", 0),
+                 batch_size=64, chunk_size=8, heartbeat_timeout=10.0):
+        self.campaign = campaign
+        self.n_games = n_games
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.heartbeat_timeout = heartbeat_timeout
+        self.accumulator = campaign.accumulator()
+        self.listener = Listener(address, authkey=_check_authkey(authkey))
+        self.pending = deque([(0, n_games)] if n_games > 0 else [])
+        self.assignments = {} # worker id -> _Assignment
+        self.last_seen = {} # worker id -> time
+        self.games_by_worker = {}
+        self.n_merged = 0 # games merged into the accumulator
+        self.n_reassigned = 0
+        self.n_stolen = 0
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._n_workers = 0
+        if n_games <= 0:
+            self.finished.set()
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    # --- scheduling ---
+    def _next_batch(self, worker):
+        """
+        (start, end), None to wait or "stop"; called with the lock held
+        """
+        if self.finished.is_set():
+            return "stop"
+        if self.pending:
+            start, end = self.pending.popleft()
+            if end - start > self.batch_size:
+                self.pending.appendleft((start + self.batch_size, end))
+                end = start + self.batch_size
+        else:
+            victim = max(
+                self.assignments.values(),
+                key=lambda a: a.end - a.committed(self.chunk_size),
+                default=None,
+            )
+            if victim is None:
+                return None
+            committed = victim.committed(self.chunk_size)
+            if victim.end - committed < 2 * self.chunk_size:
+                return None
+            start, end = (committed + victim.end) // 2, victim.end
+            victim.end = start
+            self.n_stolen += 1
+        self.assignments[worker] = _Assignment(start, end)
+        return start, end
+
+    def _progress(self, worker, done, accumulator):
+        """
+        merge the games of a worker up to 'done'; its new end
+        """
+        assignment = self.assignments.get(worker)
+        if assignment is None or not assignment.done < done <= assignment.end:
+            return done # stale report: the batch was given away
+        self.accumulator.merge(accumulator)
+        self.games_by_worker[worker] += done - assignment.done
+        self.n_merged += done - assignment.done
+        assignment.done = done
+        if done == assignment.end:
+            del self.assignments[worker]
+        if self.n_merged >= self.n_games:
+            self.finished.set()
+        return assignment.end
+
+    def _release(self, worker):
+        """
+        give the unfinished seeds of 'worker' back to the queue
+        """
+        assignment = self.assignments.pop(worker, None)
+        if assignment is not None and assignment.done < assignment.end:
+            self.pending.appendleft((assignment.done, assignment.end))
+            self.n_reassigned += 1
+        self.last_seen.pop(worker, None)
+
+    # --- connections ---
+    def _serve(self, conn, worker):
+        try:
+            conn.send(("campaign", self.campaign, self.chunk_size))
+            while True:
+                if not conn.poll(self.heartbeat_timeout / 4):
+                    with self._lock:
+                        if worker not in self.last_seen:
+                            break # declared lost by the monitor
+                    continue
+                message = conn.recv()
+                with self._lock:
+                    if worker not in self.last_seen:
+                        break
+                    self.last_seen[worker] = time.monotonic()
+                    if message[0] == "request":
+                        reply = ("batch", self._next_batch(worker))
+                    elif message[0] == "progress":
+                        reply = ("end", self._progress(worker, *message[1:]))
+                    else: # heartbeat
+                        continue
+                conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self._release(worker)
+            conn.close()
+
+    def _accept(self):
+        while not self.finished.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                if self.finished.is_set():
+                    break
+                continue # failed handshake
+            with self._lock:
+                worker = self._n_workers
+                self._n_workers += 1
+                self.last_seen[worker] = time.monotonic()
+                self.games_by_worker[worker] = 0
+            threading.Thread(
+                target=self._serve, args=(conn, worker), daemon=True
+            ).start()
+
+    def _monitor(self):
+        while not self.finished.wait(self.heartbeat_timeout / 4):
+            now = time.monotonic()
+            with self._lock:
+                for worker, seen in list(self.last_seen.items()):
+                    if now - seen > self.heartbeat_timeout:
+                        self._release(worker)
+
+    def run(self, timeout=None):
+        """
+        serve workers until every game is merged; the accumulator
+        """
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+        if not self.finished.wait(timeout):
+            raise TimeoutError(
+                "{} of {} games merged".format(self.n_merged, self.n_games)
+            )
+        self.close()
+        return self.accumulator
+
+    def close(self):
+        self.finished.set()
+        # unblock accept() with a throwaway connection
+        try:
+            address = self.listener.address
+            family = socket.AF_UNIX if isinstance(address, str) \
+                else socket.AF_INET
+            with socket.socket(family) as sock:
+                sock.settimeout(1.0)
+                sock.connect(address)
+        except OSError:
+            pass
+        self.listener.close()
+
+
+# **********
+# * Worker *
+# **********
+def run_worker(address, authkey, heartbeat_interval=2.0):
+    """
+    play batches for the coordinator at 'address' until it stops;
+    the number of games played
+    """
+    conn = Client(address, authkey=_check_authkey(authkey))
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def heartbeat():
+        while not stopped.wait(heartbeat_interval):
+            try:
+                send(("heartbeat",))
+            except OSError:
+                break
+
+    n_played = 0
+    try:
+        _, campaign, chunk_size = conn.recv()
+        threading.Thread(target=heartbeat, daemon=True).start()
+        while True:
+            send(("request",))
+            _, batch = conn.recv()
+            if batch == "stop":
+                break
+            if batch is None:
+                time.sleep(heartbeat_interval / 4)
+                continue
+            done, end = batch
+            while done < end:
+                stop = min(done + chunk_size, end)
+                accumulator = campaign.accumulator()
+                for n in range(done, stop):
+                    accumulator.add(campaign.play(n))
+                n_played += stop - done
+                send(("progress", stop, accumulator))
+                _, end = conn.recv()
+                done = stop
+    except (EOFError, OSError):
+        pass # the coordinator is gone
+    finally:
+        stopped.set()
+        conn.close()
+    return n_played
+
+
+def run_workers(address, authkey, processes=None):
+    """
+    a worker per process; the number of games played by each
+    """
+    from multiprocessing import Pool, cpu_count
+    processes = cpu_count() if processes is None else processes
+    with Pool(processes) as pool:
+        return pool.starmap(run_worker, [(address, authkey)] * processes)
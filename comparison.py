@@ -0,0 +1,260 @@
+from math import sqrt
+from statistics import NormalDist, fmean, stdev
+from . agent import RandomAgent, vs_card_indices
+from . game import Observer, VSCardDecision, GaugeCheckAction
+from . expected_runs import MatchupModel, InningModel, transition, N_OUTS
+from . simulation import play_game
+
+
+# ********************
+# * Control Variates *
+# ********************
+def deck_cards(config):
+    return config.deck_master.deck.deck_list
+
+
+def run_expectancy(config, opponent):
+    """
+    expected runs until the change by (out, bases) of the lineup of
+    'config' against the pitcher of 'opponent' under the analytic model
+    """
+    model = MatchupModel(deck_cards(config), deck_cards(opponent))
+    lineup = [config.nth_batter(n) for n in range(9)]
+    inning = InningModel(
+        model.result_distribution(batter, opponent.pitcher)
+        for batter in lineup
+    )
+    return inning.run_expectancy()[:, :, 0]
+
+
+class ChoiceLuck(Observer):
+    """
+    luck of the v.s. card choices of uniformly random agents, in runs
+    for each batting side: value of the card chosen minus the mean
+    value of the candidates. The agent gives every candidate the same
+    chance, so every term has conditional mean zero and the sum has
+    expectation exactly zero, however rough the values are.
+    A card is valued by the run value (RE24) of the result it gives:
+    against the card the defense has set for the offense, on average
+    over the offense's candidates for the defense
+    """
+    def __init__(self, tables):
+        self.tables = tables # per batting side: run expectancy
+        self.luck = [0.0, 0.0]
+
+    def on_decision(self, game, decision, answer):
+        if not isinstance(decision, VSCardDecision) \
+           or not _is_uniform(decision.player.agent):
+            return
+        hand = decision.player.deck_master.hand
+        candidates = vs_card_indices(hand)
+        if len(candidates) < 2:
+            return
+        offense = game.offense_player
+        if decision.player is offense:
+            vs_def = game.defense_player.vs_card
+            values = {
+                idx: self._value(game, hand[idx], vs_def)
+                for idx in candidates
+            }
+        else:
+            off_hand = offense.deck_master.hand
+            off_cards = [off_hand[idx] for idx in vs_card_indices(off_hand)]
+            values = {
+                idx: fmean(
+                    self._value(game, vs_off, hand[idx])
+                    for vs_off in off_cards or [None]
+                )
+                for idx in candidates
+            }
+        self.luck[int(game.is_bottom)] += \
+            values[answer] - fmean(values.values())
+
+    def _value(self, game, vs_off, vs_def):
+        field = game.field
+        result = GaugeCheckAction.judge(
+            field.batter, field.mound, vs_off, vs_def,
+            game.hit_gauge, game.out_gauge,
+        )
+        re = self.tables[int(game.is_bottom)]
+        bases = sum(
+            1 << base for base, runner in enumerate(field.runners)
+            if runner is not None
+        )
+        out, new_bases, runs = transition(game.out, bases, result)
+        after = re[out, new_bases] if out < N_OUTS else 0.0
+        return runs + after - re[game.out, bases]
+
+
+def _is_uniform(agent):
+    return type(agent).choose_vs_card is RandomAgent.choose_vs_card
+
+
+class ChoiceLuckControl:
+    """
+    control variate of a game seen from 'config' against 'opponent':
+    the choice luck of 'config' batting minus that of the opponent
+    batting. Its expectation is exactly zero, so the adjusted estimate
+    stays unbiased; decisions of other agents than RandomAgent are left
+    out, since their choice probabilities are unknown
+    """
+    def __init__(self, config, opponent):
+        self.tables = (
+            run_expectancy(config, opponent), run_expectancy(opponent, config)
+        )
+
+    def observer(self, side):
+        tables = [self.tables[1], self.tables[1]]
+        tables[side] = self.tables[0]
+        return ChoiceLuck(tables)
+
+    @staticmethod
+    def covariate(observer, side):
+        return observer.luck[side] - observer.luck[1 - side]
+
+
+# **************
+# * Comparison *
+# **************
+class ComparisonResult:
+    def __init__(self, diff, stderr, confidence, n_units, n_games):
+        self.diff = diff
+        self.stderr = stderr
+        self.confidence = confidence
+        self.n_units = n_units
+        self.n_games = n_games
+
+    def __repr__(self):
+        low, high = self.ci
+        return (
+            "ComparisonResult(diff={:.4f}, ci=({:.4f}, {:.4f}), "
+            "confidence={}, n_games={})"
+        ).format(self.diff, low, high, self.confidence, self.n_games)
+
+    @property
+    def ci(self):
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        return (self.diff - z * self.stderr, self.diff + z * self.stderr)
+
+
+class PairedComparison:
+    """
+    compare two GamePlayer configurations against a common opponent.
+    Both configurations play each seed (common random numbers),
+    optionally together with its antithetic mirror;
+    the configuration plays visitor on even units and home on odd units.
+    """
+    def __init__(self, config_a, config_b, opponent, rule, seed=0,
+                 metric="win", antithetic=False, control_variate=False):
+        self.configs = (config_a, config_b)
+        self.opponent = opponent
+        self.rule = rule
+        self.seed = seed
+        self.metric = metric
+        self.antithetic = antithetic
+        self.controls = None
+        if control_variate:
+            self.controls = tuple(
+                ChoiceLuckControl(config, opponent) for config in self.configs
+            )
+
+    @property
+    def games_per_unit(self):
+        """
+        games played by each configuration per unit
+        """
+        return 1 + self.antithetic
+
+    def _play(self, config, control, seed, side, antithetic):
+        players = [self.opponent, self.opponent]
+        players[side] = config
+        observers = [] if control is None else [control.observer(side)]
+        result = play_game(
+            *players, self.rule, seed, antithetic, observers=observers
+        )
+        value = result.value(side, self.metric)
+        if control is None:
+            return value, 0.0
+        return value, control.covariate(observers[0], side)
+
+    def sample(self, idx):
+        """
+        return (difference of the metric, difference of the covariate)
+        of the idx-th unit
+        """
+        seed = "{}-{}".format(self.seed, idx)
+        side = idx % 2
+        variants = (False, True) if self.antithetic else (False,)
+        values = []
+        covariates = []
+        for n, config in enumerate(self.configs):
+            control = None if self.controls is None else self.controls[n]
+            pairs = [
+                self._play(config, control, seed, side, antithetic)
+                for antithetic in variants
+            ]
+            values.append(fmean(value for value, _ in pairs))
+            covariates.append(fmean(cov for _, cov in pairs))
+        return values[0] - values[1], covariates[0] - covariates[1]
+
+    def estimate(self, samples, confidence=0.95):
+        if len(samples) < 2:
+            raise ValueError("at least 2 samples are required")
+        diffs = [diff for diff, _ in samples]
+        if self.controls is None:
+            mean, stderr = fmean(diffs), stdev(diffs) / sqrt(len(diffs))
+        else:
+            mean, stderr = control_estimate(
+                diffs, [cov for _, cov in samples]
+            )
+        return ComparisonResult(
+            mean, stderr,
+            confidence, len(samples), len(samples) * self.games_per_unit,
+        )
+
+
+def adjust_by_control(values, covariates):
+    """
+    values - beta * covariates with the variance-minimizing beta,
+    for covariates of expectation zero
+    """
+    mean_v = fmean(values)
+    mean_c = fmean(covariates)
+    var_c = sum((c - mean_c) ** 2 for c in covariates)
+    if var_c == 0:
+        return list(values)
+    cov_vc = sum(
+        (v - mean_v) * (c - mean_c) for v, c in zip(values, covariates)
+    )
+    beta = cov_vc / var_c
+    return [v - beta * c for v, c in zip(values, covariates)]
+
+
+def control_estimate(values, covariates):
+    """
+    (mean, stderr) of the control-variate estimator of the mean of
+    'values'; fitting beta costs a degree of freedom of the stderr
+    """
+    n = len(values)
+    if n < 3:
+        raise ValueError("at least 3 samples are required")
+    adjusted = adjust_by_control(values, covariates)
+    mean = fmean(adjusted)
+    var = sum((a - mean) ** 2 for a in adjusted) / (n - 2)
+    return mean, sqrt(var / n)
+
+
+def compare(config_a, config_b, opponent, rule, n_games, seed=0,
+            metric="win", antithetic=False, control_variate=False,
+            confidence=0.95):
+    """
+    estimate metric(config_a) - metric(config_b) against 'opponent'
+    with about 'n_games' games per configuration
+    """
+    comparison = PairedComparison(
+        config_a, config_b, opponent, rule, seed,
+        metric, antithetic, control_variate,
+    )
+    n_units = max(2 + control_variate, n_games // comparison.games_per_unit)
+    samples = [comparison.sample(idx) for idx in range(n_units)]
+    return comparison.estimate(samples, confidence)
@@ -0,0 +1,293 @@
+import random
+from copy import copy, deepcopy
+from multiprocessing import Pool
+import numpy as np
+from . game_player import GamePlayer, DeckMaster, Deck, DeckField
+from . expected_runs import MatchupModel, InningModel
+from . simulation import play_games_parallel
+
+
+def make_config(template, cards):
+    """
+    GamePlayer sharing the team and agent of 'template'
+    with a deck made of 'cards'
+    """
+    return GamePlayer(
+        DeckMaster(Deck(cards)), DeckField(),
+        deepcopy(template.team_status), deepcopy(template.agent),
+    )
+
+
+# *************
+# * DeckSpace *
+# *************
+class DeckSpace:
+    """
+    decks of 'deck_size' cards out of 'pool' (cards with distinct ids),
+    with at most 'max_copies' copies of each card and
+    type_limits = {card class: (min, max)} on the number of cards per type
+    """
+    def __init__(self, pool, deck_size, max_copies=1, type_limits=None):
+        self.pool = list(pool)
+        self.deck_size = deck_size
+        self.max_copies = max_copies
+        self.type_limits = {} if type_limits is None else type_limits
+        self.ids = [card.id for card in self.pool]
+        if len(set(self.ids)) != len(self.ids):
+            raise ValueError("card ids in the pool must be unique")
+
+    def is_valid(self, counts):
+        if sum(counts) != self.deck_size:
+            return False
+        if any(not 0 <= n <= self.max_copies for n in counts):
+            return False
+        for card_type, (low, high) in self.type_limits.items():
+            n_type = sum(
+                n for card, n in zip(self.pool, counts)
+                if isinstance(card, card_type)
+            )
+            if not low <= n_type <= high:
+                return False
+        return True
+
+    def cards(self, counts):
+        return [
+            copy(card)
+            for card, n in zip(self.pool, counts)
+            for _ in range(n)
+        ]
+
+    def key(self, counts):
+        """
+        order-free identity of a deck: sorted (card id, copies) pairs
+        """
+        return tuple(sorted(
+            (card_id, n) for card_id, n in zip(self.ids, counts) if n > 0
+        ))
+
+    def random_deck(self, rng, max_tries=1000):
+        for _ in range(max_tries):
+            slots = [
+                idx for idx in range(len(self.pool))
+                for _ in range(self.max_copies)
+            ]
+            counts = [0] * len(self.pool)
+            for idx in rng.sample(slots, self.deck_size):
+                counts[idx] += 1
+            if self.is_valid(counts):
+                return tuple(counts)
+        raise ValueError("could not find a deck satisfying the constraints")
+
+    def neighbours(self, counts):
+        """
+        valid decks obtained by swapping one card for another
+        """
+        for out_idx, n_out in enumerate(counts):
+            if n_out == 0:
+                continue
+            for in_idx, n_in in enumerate(counts):
+                if in_idx == out_idx or n_in >= self.max_copies:
+                    continue
+                new = list(counts)
+                new[out_idx] -= 1
+                new[in_idx] += 1
+                if self.is_valid(new):
+                    yield tuple(new)
+
+
+# **************
+# * Objectives *
+# **************
+class Objective:
+    """
+    fitness of deck configurations, the larger the better;
+    'parallel' objectives get a process pool to play games in
+    """
+    parallel = True
+
+    def evaluate(self, configs, pool=None):
+        raise NotImplementedError()
+
+
+class WinRateObjective(Objective):
+    """
+    mean win rate against a gauntlet of opponents;
+    every candidate plays the same seeds (common random numbers)
+    """
+    def __init__(self, gauntlet, rule, n_games=100, seed=0):
+        self.gauntlet = list(gauntlet)
+        self.rule = rule
+        self.n_games = n_games
+        self.seed = seed
+
+    def _tasks(self, config):
+        for n, opponent in enumerate(self.gauntlet):
+            for idx in range(self.n_games):
+                players = [opponent, opponent]
+                players[idx % 2] = config
+                seed = "{}-{}-{}".format(self.seed, n, idx)
+                yield (*players, self.rule, seed)
+
+    def evaluate(self, configs, pool=None):
+        tasks = [task for config in configs for task in self._tasks(config)]
+        results = play_games_parallel(tasks, pool=pool)
+        per_config = len(self.gauntlet) * self.n_games
+        fitness = []
+        for n in range(len(configs)):
+            chunk = results[n * per_config:(n + 1) * per_config]
+            fitness.append(
+                sum(
+                    result.value(idx % self.n_games % 2)
+                    for idx, result in enumerate(chunk)
+                ) / per_config
+            )
+        return fitness
+
+
+class ExpectedRunsObjective(Objective):
+    """
+    analytic expected runs scored minus allowed per half inning
+    against each opponent, averaged over the gauntlet;
+    cheap and deterministic, so evaluated in this process
+    """
+    parallel = False
+
+    def __init__(self, gauntlet):
+        self.gauntlet = list(gauntlet)
+
+    @staticmethod
+    def expected_runs(offense, defense):
+        model = MatchupModel(
+            offense.deck_master.deck.deck_list,
+            defense.deck_master.deck.deck_list,
+        )
+        pitcher = defense.pitcher
+        dists = [
+            model.result_distribution(offense.nth_batter(n), pitcher)
+            for n in range(9)
+        ]
+        return InningModel(dists).expected_runs()
+
+    def evaluate(self, configs, pool=None):
+        return [
+            float(np.mean([
+                self.expected_runs(config, opponent)
+                - self.expected_runs(opponent, config)
+                for opponent in self.gauntlet
+            ]))
+            for config in configs
+        ]
+
+
+# *************
+# * Optimizer *
+# *************
+class DeckOptimizer:
+    """
+    local search over single-card swaps.
+    Fitness is cached by canonical deck key, and an additive
+    per-card surrogate fitted on the cache ranks the neighbours,
+    so that only the 'n_screen' most promising ones are simulated.
+    """
+    def __init__(self, space, template, objective, n_screen=8,
+                 processes=None, seed=None):
+        self.space = space
+        self.template = template
+        self.objective = objective
+        self.n_screen = n_screen
+        self.processes = processes
+        self.rng = random.Random(seed)
+        self.cache = {} # canonical key -> fitness
+        self._counts = {} # canonical key -> counts
+
+    def evaluate(self, decks, pool=None):
+        """
+        fitness of each deck (counts tuple), simulating only uncached ones
+        """
+        keys = [self.space.key(counts) for counts in decks]
+        todo = {}
+        for key, counts in zip(keys, decks):
+            if key not in self.cache:
+                todo[key] = counts
+        if len(todo) > 0:
+            configs = [
+                make_config(self.template, self.space.cards(counts))
+                for counts in todo.values()
+            ]
+            fitness = self.objective.evaluate(configs, pool)
+            for key, value in zip(todo, fitness):
+                self.cache[key] = value
+                self._counts[key] = todo[key]
+        return [self.cache[key] for key in keys]
+
+    def surrogate(self, ridge=1.0):
+        """
+        per-card additive model fitted on the cache;
+        None until there are enough evaluations
+        """
+        if len(self.cache) < 2:
+            return None
+        x = np.array([self._counts[key] for key in self.cache], dtype=float)
+        y = np.array(list(self.cache.values()))
+        x = np.hstack([np.ones((len(x), 1)), x])
+        penalty = ridge * np.eye(x.shape[1])
+        penalty[0, 0] = 0.0
+        return np.linalg.solve(x.T @ x + penalty, x.T @ y)
+
+    def screen(self, candidates):
+        candidates = [
+            counts for counts in candidates
+            if self.space.key(counts) not in self.cache
+        ]
+        if len(candidates) <= self.n_screen:
+            return candidates
+        coef = self.surrogate()
+        if coef is None:
+            return self.rng.sample(candidates, self.n_screen)
+        x = np.array(candidates, dtype=float)
+        predicted = coef[0] + x @ coef[1:]
+        best = np.argsort(-predicted)[:self.n_screen]
+        return [candidates[idx] for idx in best]
+
+    def optimize(self, initial=None, max_steps=50, restarts=0):
+        """
+        return (cards, fitness) of the best deck found
+        """
+        if not self.objective.parallel:
+            return self._optimize(initial, max_steps, restarts, None)
+        with Pool(self.processes) as pool:
+            return self._optimize(initial, max_steps, restarts, pool)
+
+    def _optimize(self, initial, max_steps, restarts, pool):
+        best = None
+        for n in range(restarts + 1):
+            if n == 0 and initial is not None:
+                counts = self._initial_counts(initial)
+            else:
+                counts = self.space.random_deck(self.rng)
+            counts, fitness = self._climb(counts, max_steps, pool)
+            if best is None or fitness > best[1]:
+                best = (counts, fitness)
+        return self.space.cards(best[0]), best[1]
+
+    def _climb(self, counts, max_steps, pool):
+        fitness = self.evaluate([counts], pool)[0]
+        for _ in range(max_steps):
+            candidates = self.screen(self.space.neighbours(counts))
+            if len(candidates) == 0:
+                break
+            values = self.evaluate(candidates, pool)
+            idx = int(np.argmax(values))
+            if values[idx] <= fitness:
+                break
+            counts, fitness = candidates[idx], values[idx]
+        return counts, fitness
+
+    def _initial_counts(self, cards):
+        index = {card.id: idx for idx, card in enumerate(self.space.pool)}
+        counts = [0] * len(self.space.pool)
+        for card in cards:
+            counts[index[card.id]] += 1
+        if not self.space.is_valid(counts):
+            raise ValueError("the initial deck violates the constraints")
+        return tuple(counts)
@@ -0,0 +1,159 @@
+"""
+exact probabilities of the hand after drawing from a DeckMaster.
+
+Cards are grouped into categories by a key function (card_kind by
+default; a predicate gives two categories, True and False). Drawing
+n cards takes them uniformly from the deck pile; when the pile runs
+out, the trash is shuffled back and the rest comes from it, as in
+DeckMaster._draw. The counts drawn are multivariate hypergeometric
+in each of the two stages. Distributions are computed with integer
+binomials and memoized on the count signatures.
+"""
+from collections import Counter
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
+from . belief import card_kind
+
+
+@lru_cache(maxsize=1 << 16)
+def hypergeometric(n_total, n_success, n_draws):
+    """
+    (P(X = 0), ..., P(X = n_draws)) of the successes among 'n_draws'
+    cards drawn from 'n_total' holding 'n_success'
+    """
+    total = comb(n_total, n_draws)
+    return tuple(
+        Fraction(comb(n_success, k) * comb(n_total - n_success, n_draws - k),
+                 total)
+        for k in range(n_draws + 1)
+    )
+
+
+@lru_cache(maxsize=1 << 14)
+def multivariate_hypergeometric(counts, n_draws):
+    """
+    {drawn counts: probability} of 'n_draws' cards drawn from
+    a pile holding counts[i] cards of category i
+    """
+    total = comb(sum(counts), n_draws)
+    dist = {}
+
+    def expand(i, left, drawn, ways):
+        if i == len(counts) - 1:
+            if left <= counts[i]:
+                dist[drawn + (left,)] = Fraction(
+                    ways * comb(counts[i], left), total
+                )
+            return
+        for k in range(min(counts[i], left) + 1):
+            expand(i + 1, left - k, drawn + (k,), ways * comb(counts[i], k))
+
+    if len(counts) == 0:
+        return {(): Fraction(1)} if n_draws == 0 else {}
+    expand(0, n_draws, (), 1)
+    return dist
+
+
+def _split(n, n_deck, n_trash):
+    """
+    cards drawn from the pile and from the reshuffled trash
+    """
+    if n > n_deck + n_trash:
+        raise ValueError(
+            "cannot draw {} from {} + {} cards".format(n, n_deck, n_trash)
+        )
+    return min(n, n_deck), max(0, n - n_deck)
+
+
+@lru_cache(maxsize=1 << 16)
+def count_distribution(in_hand, in_deck, n_deck, in_trash, n_trash, n):
+    """
+    (P(hand holds 0), P(1), ...) of the cards of a category after
+    drawing 'n'; in_*: cards of the category in each place
+    """
+    from_deck, from_trash = _split(n, n_deck, n_trash)
+    dist = [Fraction(0)] * (in_hand + in_deck + in_trash + 1)
+    deck = hypergeometric(n_deck, in_deck, from_deck)
+    trash = hypergeometric(n_trash, in_trash, from_trash)
+    for i, p in enumerate(deck):
+        if p:
+            for j, q in enumerate(trash):
+                if q:
+                    dist[in_hand + i + j] += p * q
+    return tuple(dist)
+
+
+# ************
+# * DrawOdds *
+# ************
+class DrawOdds:
+    """
+    calculator over the (deck pile, trash, hand) counts by category
+    """
+    def __init__(self, deck, trash=(), hand=(), key=card_kind):
+        self.key = key
+        places = [Counter(key(card) for card in cards)
+                  for cards in (deck, trash, hand)]
+        self.categories = sorted(set().union(*places), key=repr)
+        self.deck, self.trash, self.hand = (
+            tuple(place[c] for c in self.categories) for place in places
+        )
+
+    @classmethod
+    def of(cls, deck_master, key=card_kind):
+        return cls(deck_master.deck, deck_master.trash, deck_master.hand, key)
+
+    @classmethod
+    def new_game(cls, deck_list, key=card_kind):
+        """
+        odds of a freshly shuffled deck
+        """
+        return cls(deck_list, key=key)
+
+    def _counts(self, category):
+        if category not in self.categories:
+            return 0, 0, 0
+        i = self.categories.index(category)
+        return self.hand[i], self.deck[i], self.trash[i]
+
+    def distribution(self, category, n=1, exact=False):
+        """
+        P(hand holds k cards of 'category' after drawing n), k = 0, 1, ...
+        """
+        in_hand, in_deck, in_trash = self._counts(category)
+        dist = count_distribution(
+            in_hand, in_deck, sum(self.deck), in_trash, sum(self.trash), n
+        )
+        return list(dist) if exact else [float(p) for p in dist]
+
+    def prob_at_least(self, category, k=1, n=1, exact=False):
+        p = sum(self.distribution(category, n, exact=True)[k:], Fraction(0))
+        return p if exact else float(p)
+
+    def joint(self, n=1):
+        """
+        {hand counts by category: probability} after drawing n
+        """
+        from_deck, from_trash = _split(n, sum(self.deck), sum(self.trash))
+        deck = multivariate_hypergeometric(self.deck, from_deck)
+        trash = multivariate_hypergeometric(self.trash, from_trash)
+        dist = {}
+        for x, p in deck.items():
+            for y, q in trash.items():
+                hand = tuple(map(sum, zip(self.hand, x, y)))
+                dist[hand] = dist.get(hand, 0) + p * q
+        return dist
+
+    def prob(self, event, n=1, exact=False):
+        """
+        probability that event({category: count}) holds for the hand
+        after drawing n, e.g.
+            lambda hand: hand[high] >= 1 and hand[low] >= 1
+        """
+        p = sum(
+            (q for hand, q in self.joint(n).items()
+             if event(Counter(dict(zip(self.categories, hand))))),
+            Fraction(0),
+        )
+        return p if exact else float(p)
@@ -0,0 +1,499 @@
+import struct
+from array import array
+from . game import (
+    Game, Observer,
+    StartGamePhase, StartInningPhase, StartTopBottomInningPhase,
+    AtBatPhase, FinishTopBottomInningPhase, FinishInningPhase,
+    BatterSetAction, PrePitchAction, PitchAction, PostPitchAction,
+    GaugeCheckAction, PostGaugeCheckAction, FinishAtBatAction,
+    PinchHitterDecision, TacticsDecision, VSCardDecision, SPComboDecision,
+    StrikeOut, InfieldGrounder, DoublePlay, OutfieldFly, SacrificeFly,
+    ProductiveOut, InfieldHit, Single, Double, Triple, HomeRun, BallFour,
+)
+from . card import Course, VSCard
+from . game_player import PlayerObserver
+from . simulation import prepare_player, GameResult
+
+
+PHASES = (
+    StartGamePhase, StartInningPhase, StartTopBottomInningPhase,
+    AtBatPhase, FinishTopBottomInningPhase, FinishInningPhase,
+)
+ACTIONS = (
+    BatterSetAction, PrePitchAction, PitchAction, PostPitchAction,
+    GaugeCheckAction, PostGaugeCheckAction, FinishAtBatAction,
+)
+# logged by index since version 1: new results go at the end
+RESULTS = (
+    StrikeOut, InfieldGrounder, DoublePlay, OutfieldFly, SacrificeFly,
+    ProductiveOut, InfieldHit, Single, Double, Triple, HomeRun, BallFour,
+)
+DECISIONS = (
+    PinchHitterDecision, TacticsDecision, VSCardDecision, SPComboDecision,
+)
+ZONES = ("tactics", "vs", "sp_combo")
+
+
+# **********
+# * Events *
+# **********
+class EventCode:
+    PHASE = 0 # a: phase
+    ACTION = 1 # a: action
+    DECISION = 2 # a: decision type, b: index of the answer in options
+    DRAW = 3 # b: card id
+    SET_CARD = 4 # a: zone * 2 + is_open, b: index in hand
+    TRASH_ZONE = 5 # a: zone
+    AT_BAT_RESULT = 6 # a: result, b: batter card id
+    # a: course of offense VS card * 8 + course of defense VS card
+    # (NO_COURSE without card), b: pitcher card id; precedes AT_BAT_RESULT
+    AT_BAT_CONTEXT = 7
+
+
+# record: code, side, a, b
+RECORD = struct.Struct("<BBHi")
+MAGIC = b"PN9L"
+# version 1 had no AT_BAT_CONTEXT events, version 2 no antithetic flag
+VERSION = 3
+NO_SIDE = 255
+COURSES = tuple(Course)
+NO_COURSE = 7
+
+
+class Event:
+    __slots__ = ("code", "side", "a", "b")
+
+    def __init__(self, code, side, a, b):
+        self.code = code
+        self.side = side
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        return "Event({})".format(describe(self))
+
+
+def encode_courses(vs_off, vs_def):
+    return _course_code(vs_off) * 8 + _course_code(vs_def)
+
+
+def _course_code(vs_card):
+    if not isinstance(vs_card, VSCard):
+        return NO_COURSE
+    return COURSES.index(vs_card.course)
+
+
+def decode_courses(a):
+    """
+    (offense course, defense course), None without VS card
+    """
+    return tuple(
+        None if code == NO_COURSE else COURSES[code]
+        for code in (a // 8, a % 8)
+    )
+
+
+def describe(event):
+    code, a, b = event.code, event.a, event.b
+    side = None if event.side == NO_SIDE else event.side
+    if code == EventCode.PHASE:
+        return PHASES[a].__name__
+    elif code == EventCode.ACTION:
+        return ACTIONS[a].__name__
+    elif code == EventCode.DECISION:
+        return "{} side={} option={}".format(DECISIONS[a].__name__, side, b)
+    elif code == EventCode.DRAW:
+        return "draw side={} card={}".format(side, b)
+    elif code == EventCode.SET_CARD:
+        return "set side={} zone={} open={} hand={}".format(
+            side, ZONES[a // 2], bool(a % 2), b
+        )
+    elif code == EventCode.TRASH_ZONE:
+        return "trash side={} zone={}".format(side, ZONES[a])
+    elif code == EventCode.AT_BAT_RESULT:
+        return "{} batter={}".format(RESULTS[a].__name__, b)
+    elif code == EventCode.AT_BAT_CONTEXT:
+        off_course, def_course = decode_courses(a)
+        return "context pitcher={} vs=({}, {})".format(
+            b, off_course, def_course
+        )
+    raise ValueError("unknown event code: {}".format(code))
+
+
+# ************
+# * EventLog *
+# ************
+class EventLog:
+    """
+    fixed-size binary records of a game, headed by its seed and
+    whether the decks were dealt antithetic;
+    older logs are read and written as such (see upgrade)
+    """
+    def __init__(self, seed=None, data=None, version=VERSION,
+                 antithetic=False):
+        self.seed = seed
+        self.data = bytearray() if data is None else bytearray(data)
+        self.version = version
+        self.antithetic = antithetic
+
+    def __len__(self):
+        return len(self.data) // RECORD.size
+
+    def append(self, code, side, a=0, b=0):
+        self.data += RECORD.pack(code, NO_SIDE if side is None else side, a, b)
+
+    def __getitem__(self, n):
+        return Event(*RECORD.unpack_from(self.data, n * RECORD.size))
+
+    def __iter__(self):
+        for values in RECORD.iter_unpack(self.data):
+            yield Event(*values)
+
+    def to_bytes(self):
+        seed = b"" if self.seed is None else str(self.seed).encode()
+        if self.version < 3:
+            header = struct.pack("<BH", self.version, len(seed))
+        else:
+            header = struct.pack(
+                "<BBH", self.version, self.antithetic, len(seed)
+            )
+        return MAGIC + header + seed + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        if buffer[:4] != MAGIC:
+            raise ValueError("not an event log")
+        version = buffer[4]
+        if version not in range(1, VERSION + 1):
+            raise ValueError("unsupported log version: {}".format(version))
+        if version < 3:
+            antithetic = False
+            n_seed, = struct.unpack_from("<H", buffer, 5)
+            head = 7
+        else:
+            antithetic, n_seed = struct.unpack_from("<BH", buffer, 5)
+            head = 8
+        start = head + n_seed
+        seed = bytes(buffer[head:start]).decode() if n_seed > 0 else None
+        return cls(seed, buffer[start:], version, bool(antithetic))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# ************
+# * Recorder *
+# ************
+class EventRecorder(Observer, PlayerObserver):
+    """
+    observer writing every transition, card movement, decision
+    and at-bat result of a game into an EventLog
+    """
+    def __init__(self, seed=None, antithetic=False):
+        self.log = EventLog(seed, antithetic=antithetic)
+        self.players = ()
+
+    def attach(self, game):
+        self.players = tuple(game.players)
+        game.add_observer(self)
+        for player in game.players:
+            player.add_observer(self)
+        return self
+
+    def _side(self, player):
+        for side, other in enumerate(self.players):
+            if other is player:
+                return side
+
+    # --- game events ---
+    def on_phase(self, game, phase):
+        self.log.append(EventCode.PHASE, None, PHASES.index(phase))
+
+    def on_action(self, game, action):
+        self.log.append(EventCode.ACTION, None, ACTIONS.index(action))
+
+    def on_decision(self, game, decision, answer):
+        self.log.append(
+            EventCode.DECISION, decision.side,
+            DECISIONS.index(type(decision)),
+            decision.options().index(answer),
+        )
+
+    def on_at_bat_result(self, game, result):
+        self.log.append(
+            EventCode.AT_BAT_CONTEXT, None,
+            encode_courses(
+                game.offense_player.vs_card, game.defense_player.vs_card
+            ),
+            game.field.mound.id,
+        )
+        self.log.append(
+            EventCode.AT_BAT_RESULT, None,
+            RESULTS.index(result), game.field.batter.id,
+        )
+
+    # --- card events ---
+    def on_draw(self, player, cards):
+        side = self._side(player)
+        for card in cards:
+            self.log.append(EventCode.DRAW, side, 0, card.id)
+
+    def on_set_card(self, player, zone, idx, is_open):
+        self.log.append(
+            EventCode.SET_CARD, self._side(player),
+            ZONES.index(zone) * 2 + bool(is_open), idx,
+        )
+
+    def on_trash_zone(self, player, zone):
+        self.log.append(
+            EventCode.TRASH_ZONE, self._side(player), ZONES.index(zone)
+        )
+
+
+# **********
+# * Replay *
+# **********
+class _ReplayField:
+    def __init__(self):
+        self.batter = None
+        self.runners = [None, None, None]
+
+
+class ReplayState:
+    """
+    light reconstruction of a game: the situation, the score board
+    and the card ids in every zone of both players.
+    The deck keeps its seeded order until the trash is returned to it;
+    after that it is only known as a collection.
+    Without 'decks', only the situation and the score are tracked.
+    """
+    def __init__(self, decks=None):
+        self.track_cards = decks is not None
+        decks = ([], []) if decks is None else decks
+        self.inning = 0
+        self.is_bottom = False
+        self.out = 0
+        self.scores = [] # [visitor, home] per inning
+        self.field = _ReplayField()
+        self.decks = [list(deck) for deck in decks]
+        self.hands = [[], []]
+        self.trashes = [[], []]
+        self.zones = [{zone: [] for zone in ZONES} for _ in range(2)]
+        self.n_events = 0
+        self._last_phase = None
+
+    @property
+    def total_score(self):
+        return [sum(score[side] for score in self.scores) for side in (0, 1)]
+
+    @property
+    def bases(self):
+        return sum(
+            1 << i
+            for i, runner in enumerate(self.field.runners)
+            if runner is not None
+        )
+
+    def add_score(self, n):
+        self.scores[-1][self.is_bottom] += n
+
+    def apply(self, event):
+        code, side = event.code, event.side
+        if code == EventCode.PHASE:
+            self._apply_phase(PHASES[event.a])
+        elif code == EventCode.AT_BAT_RESULT:
+            self.field.batter = event.b
+            RESULTS[event.a].apply(self)
+        elif not self.track_cards:
+            pass
+        elif code == EventCode.DRAW:
+            deck = self.decks[side]
+            if len(deck) == 0:
+                deck.extend(self.trashes[side])
+                self.trashes[side].clear()
+            deck.remove(event.b)
+            self.hands[side].append(event.b)
+        elif code == EventCode.SET_CARD:
+            card = self.hands[side].pop(event.b)
+            self.zones[side][ZONES[event.a // 2]].append(card)
+        elif code == EventCode.TRASH_ZONE:
+            zone = self.zones[side][ZONES[event.a]]
+            self.trashes[side].extend(zone)
+            zone.clear()
+        self.n_events += 1
+
+    # --- snapshots ---
+    def snapshot(self):
+        """
+        compact int32 encoding of the whole state
+        """
+        last_phase = (
+            -1 if self._last_phase is None
+            else PHASES.index(self._last_phase)
+        )
+        values = [
+            self.n_events, self.inning, self.is_bottom, self.out,
+            last_phase, _none_to_int(self.field.batter),
+            *(_none_to_int(runner) for runner in self.field.runners),
+            len(self.scores),
+        ]
+        for score in self.scores:
+            values += score
+        for side in (0, 1):
+            for cards in self._card_lists(side):
+                values.append(len(cards))
+                values += cards
+        return array("i", values).tobytes()
+
+    @classmethod
+    def from_snapshot(cls, buffer):
+        values = array("i")
+        values.frombytes(buffer)
+        values = iter(values.tolist())
+        state = cls(([], []))
+        state.n_events = next(values)
+        state.inning = next(values)
+        state.is_bottom = bool(next(values))
+        state.out = next(values)
+        last_phase = next(values)
+        state._last_phase = None if last_phase < 0 else PHASES[last_phase]
+        state.field.batter = _int_to_none(next(values))
+        state.field.runners = [_int_to_none(next(values)) for _ in range(3)]
+        state.scores = [
+            [next(values), next(values)] for _ in range(next(values))
+        ]
+        for side in (0, 1):
+            for cards in state._card_lists(side):
+                cards.extend(next(values) for _ in range(next(values)))
+        return state
+
+    def _card_lists(self, side):
+        return (
+            self.decks[side], self.hands[side], self.trashes[side],
+            *(self.zones[side][zone] for zone in ZONES),
+        )
+
+    def _apply_phase(self, phase):
+        if phase is StartInningPhase:
+            self.inning += 1
+            self.is_bottom = False
+        elif phase is StartTopBottomInningPhase:
+            if self._last_phase is FinishTopBottomInningPhase:
+                self.is_bottom = True
+            self.out = 0
+            if len(self.scores) < self.inning:
+                self.scores.append([0, 0])
+        elif phase is FinishTopBottomInningPhase:
+            self.field = _ReplayField()
+        self._last_phase = phase
+
+
+def _none_to_int(card_id):
+    return -1 if card_id is None else card_id
+
+
+def _int_to_none(value):
+    return None if value == -1 else value
+
+
+def initial_decks(visitor, home, seed, antithetic=False):
+    """
+    card ids of both decks in their seeded order
+    """
+    return [
+        [
+            card.id for card
+            in prepare_player(config, seed, side, antithetic).deck_master.deck
+        ]
+        for side, config in enumerate((visitor, home))
+    ]
+
+
+def replay(log, visitor, home, until=None):
+    """
+    generator of the ReplayState after each event of 'log'
+    (the same object, updated in place), up to event 'until';
+    'visitor' and 'home' are the configurations the game started from
+    """
+    state = ReplayState(
+        initial_decks(visitor, home, log.seed, log.antithetic)
+    )
+    for n, event in enumerate(log):
+        if until is not None and n >= until:
+            break
+        state.apply(event)
+        yield state
+
+
+def replay_to(log, visitor, home, until=None):
+    """
+    ReplayState after the first 'until' events (all when None)
+    """
+    state = ReplayState(
+        initial_decks(visitor, home, log.seed, log.antithetic)
+    )
+    for n, event in enumerate(log):
+        if until is not None and n >= until:
+            break
+        state.apply(event)
+    return state
+
+
+def upgrade(log, visitor, home, rule, antithetic=False):
+    """
+    log of the current version of the game logged in 'log';
+    'antithetic' is the deal of logs older than version 3, which did
+    not store it. Version 1 lacks the at-bat contexts: the game is
+    played again from the configurations it started from, every
+    decision answered as logged
+    """
+    if log.version == VERSION:
+        return log
+    if log.version == 2:
+        return EventLog(log.seed, log.data, antithetic=antithetic)
+    game = Game(
+        prepare_player(visitor, log.seed, 0, antithetic),
+        prepare_player(home, log.seed, 1, antithetic),
+        rule,
+    )
+    recorder = EventRecorder(log.seed, antithetic).attach(game)
+    answers = (
+        event.b for event in log if event.code == EventCode.DECISION
+    )
+    steps = game.play()
+    try:
+        decision = next(steps)
+        while True:
+            decision = steps.send(decision.options()[next(answers)])
+    except StopIteration:
+        pass
+    except IndexError:
+        raise ValueError("the configurations do not replay the log")
+    version_1 = b"".join(
+        RECORD.pack(event.code, event.side, event.a, event.b)
+        for event in recorder.log if event.code != EventCode.AT_BAT_CONTEXT
+    )
+    if version_1 != log.data:
+        raise ValueError("the configurations do not replay the log")
+    return recorder.log
+
+
+def record_game(visitor, home, rule, seed, antithetic=False):
+    """
+    play a seeded game and return (GameResult, EventLog)
+    """
+    game = Game(
+        prepare_player(visitor, seed, 0, antithetic),
+        prepare_player(home, seed, 1, antithetic),
+        rule,
+    )
+    recorder = EventRecorder(seed, antithetic).attach(game)
+    game.playball()
+    result = GameResult(seed, game.score_board.total_score, game.inning)
+    return result, recorder.log
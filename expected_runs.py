@@ -0,0 +1,174 @@
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+from . card import VSCard
+from . game import GaugeCheckAction, HitGauge, OutGauge, AtBatResult
+
+
+N_OUTS = 3
+N_BASES = 8 # bit i <=> runner on base i+1
+
+
+# ********************
+# * Base-Out Machine *
+# ********************
+class _FieldState:
+    def __init__(self, bases):
+        self.batter = True
+        self.runners = [
+            True if bases >> i & 1 else None
+            for i in range(3)
+        ]
+
+    @property
+    def bases(self):
+        return sum(
+            1 << i
+            for i, runner in enumerate(self.runners)
+            if runner is not None
+        )
+
+
+class _InningState:
+    """
+    minimal stand-in of Game to run AtBatResult.apply on,
+    so that the model shares the base-running rules of the engine
+    """
+    def __init__(self, out, bases):
+        self.out = out
+        self.runs = 0
+        self.field = _FieldState(bases)
+
+    def add_score(self, n):
+        self.runs += n
+
+
+@lru_cache(maxsize=None)
+def transition(out, bases, result):
+    """
+    return (out, bases, runs) after 'result' is applied
+    """
+    state = _InningState(out, bases)
+    result.apply(state)
+    return min(state.out, N_OUTS), state.field.bases, state.runs
+
+
+# *****************
+# * Matchup Model *
+# *****************
+class MatchupModel:
+    """
+    at-bat outcome model where each side sets a VSCard
+    drawn uniformly from the VSCards of its deck
+    """
+    def __init__(self, off_vs_cards, def_vs_cards,
+                 hit_gauge=None, out_gauge=None):
+        self.off_cards = self._group(off_vs_cards, "pw_off")
+        self.def_cards = self._group(def_vs_cards, "pw_def")
+        self.hit_gauge = HitGauge() if hit_gauge is None else hit_gauge
+        self.out_gauge = OutGauge() if out_gauge is None else out_gauge
+
+    @staticmethod
+    def _group(cards, power_attr):
+        """
+        VSCards sharing course and power are interchangeable;
+        keep one representative with its weight
+        """
+        groups = {}
+        cards = [card for card in cards if isinstance(card, VSCard)]
+        for card in cards:
+            key = (card.course, getattr(card, power_attr))
+            if key in groups:
+                groups[key][1] += 1
+            else:
+                groups[key] = [card, 1]
+        if len(groups) == 0:
+            return [(None, 1.0)]
+        return [(card, n / len(cards)) for card, n in groups.values()]
+
+    def result_distribution(self, batter, pitcher):
+        dist = defaultdict(float)
+        for vs_off, p_off in self.off_cards:
+            for vs_def, p_def in self.def_cards:
+                result = GaugeCheckAction.judge(
+                    batter, pitcher, vs_off, vs_def,
+                    self.hit_gauge, self.out_gauge,
+                )
+                dist[result] += p_off * p_def
+        return dict(dist)
+
+
+# ****************
+# * Inning Model *
+# ****************
+class InningModel:
+    """
+    absorbing Markov chain over (out, bases, batting slot)
+    of a half inning; 'distributions' are the result distributions
+    of the batting slots in cyclic order
+    """
+    def __init__(self, distributions):
+        self.distributions = list(distributions)
+        self.n_slots = len(self.distributions)
+        n = N_OUTS * N_BASES * self.n_slots
+        self.trans = np.zeros((n, n))
+        self.runs = np.zeros(n)
+        for out in range(N_OUTS):
+            for bases in range(N_BASES):
+                for slot, dist in enumerate(self.distributions):
+                    self._fill(out, bases, slot, dist)
+        try:
+            self._fundamental = np.linalg.inv(np.eye(n) - self.trans)
+        except np.linalg.LinAlgError:
+            raise ValueError("the inning never ends: no result makes an out")
+
+    def index(self, out, bases, slot):
+        return (out * N_BASES + bases) * self.n_slots + slot
+
+    def _fill(self, out, bases, slot, dist):
+        i = self.index(out, bases, slot)
+        next_slot = (slot + 1) % self.n_slots
+        for result, p in dist.items():
+            new_out, new_bases, runs = transition(out, bases, result)
+            self.runs[i] += p * runs
+            if new_out < N_OUTS:
+                self.trans[i, self.index(new_out, new_bases, next_slot)] += p
+
+    def run_expectancy(self):
+        """
+        expected runs until the change, shape (out, bases, slot)
+        """
+        values = self._fundamental @ self.runs
+        return values.reshape(N_OUTS, N_BASES, self.n_slots)
+
+    def expected_runs(self, leadoff=0):
+        return self.run_expectancy()[0, 0, leadoff]
+
+    def expected_visits(self, leadoff=0):
+        """
+        expected number of at-bats in each state, shape (out, bases, slot)
+        """
+        visits = self._fundamental[self.index(0, 0, leadoff)]
+        return visits.reshape(N_OUTS, N_BASES, self.n_slots)
+
+
+def linear_weights(distribution, results=None):
+    """
+    average run value of each result class for a batter
+    with the given result distribution (RE24 style)
+    """
+    if results is None:
+        results = AtBatResult.__subclasses__()
+    model = InningModel([distribution])
+    re = model.run_expectancy()[:, :, 0]
+    visits = model.expected_visits()[:, :, 0]
+    weights = {}
+    for result in results:
+        value = 0.0
+        for out in range(N_OUTS):
+            for bases in range(N_BASES):
+                new_out, new_bases, runs = transition(out, bases, result)
+                after = re[new_out, new_bases] if new_out < N_OUTS else 0.0
+                value += visits[out, bases] * (runs + after - re[out, bases])
+        weights[result] = value / visits.sum()
+    return weights
@@ -0,0 +1,315 @@
+from bisect import bisect_right
+from itertools import accumulate
+import numpy as np
+from . expected_runs import MatchupModel, transition, N_OUTS, N_BASES
+from . game import CompiledRule
+from . simulation import GameResult, stream_rng, play_games_parallel
+
+
+MAX_RUNS = 30 # runs of a half inning above this are counted as MAX_RUNS
+# largest differences of the means tolerated by validate()
+TOLERANCE = {
+    "win_rate": 0.05, "visitor_runs": 0.2, "home_runs": 0.2, "innings": 0.2,
+}
+
+
+def matchup_distributions(offense, defense):
+    """
+    at-bat result distribution of each batting slot of 'offense'
+    against the pitcher of 'defense'
+    """
+    model = MatchupModel(
+        offense.deck_master.deck.deck_list,
+        defense.deck_master.deck.deck_list,
+    )
+    pitcher = defense.pitcher
+    return [
+        model.result_distribution(offense.nth_batter(n), pitcher)
+        for n in range(9)
+    ]
+
+
+# *******************
+# * HalfInningTable *
+# *******************
+class HalfInningTable:
+    """
+    joint distribution of (runs, next leadoff) of a half inning
+    for each leadoff slot, computed by propagating the probability
+    of every (out, bases, slot, runs) state at-bat by at-bat
+    with the base-running rules of AtBatResult
+    """
+    def __init__(self, distributions, max_runs=MAX_RUNS, tol=1e-12,
+                 max_at_bats=1000):
+        self.n_slots = len(distributions)
+        self.max_runs = max_runs
+        # table[leadoff, runs, next leadoff]
+        self.table = self._propagate(distributions, tol, max_at_bats)
+        self._cdf = [
+            list(accumulate(self.table[leadoff].ravel()))
+            for leadoff in range(self.n_slots)
+        ]
+
+    @classmethod
+    def for_matchup(cls, offense, defense, **kwargs):
+        return cls(matchup_distributions(offense, defense), **kwargs)
+
+    def _index(self, out, bases, slot):
+        return (out * N_BASES + bases) * self.n_slots + slot
+
+    def _matrices(self, distributions):
+        """
+        {runs scored: (transient, transient + absorbing) matrix};
+        absorbing state k: the change with slot k to lead off next
+        """
+        n = N_OUTS * N_BASES * self.n_slots
+        matrices = {}
+        for out in range(N_OUTS):
+            for bases in range(N_BASES):
+                for slot, dist in enumerate(distributions):
+                    i = self._index(out, bases, slot)
+                    next_slot = (slot + 1) % self.n_slots
+                    for result, p in dist.items():
+                        new_out, new_bases, runs = transition(
+                            out, bases, result
+                        )
+                        if runs not in matrices:
+                            matrices[runs] = np.zeros((n, n + self.n_slots))
+                        if new_out < N_OUTS:
+                            j = self._index(new_out, new_bases, next_slot)
+                        else:
+                            j = n + next_slot
+                        matrices[runs][i, j] += p
+        return matrices
+
+    def _propagate(self, distributions, tol, max_at_bats):
+        n = N_OUTS * N_BASES * self.n_slots
+        n_runs = self.max_runs + 1
+        matrices = self._matrices(distributions)
+        # state[leadoff, runs, transient state]
+        state = np.zeros((self.n_slots, n_runs, n))
+        for leadoff in range(self.n_slots):
+            state[leadoff, 0, self._index(0, 0, leadoff)] = 1.0
+        table = np.zeros((self.n_slots, n_runs, self.n_slots))
+        for _ in range(max_at_bats):
+            new = np.zeros_like(state)
+            for runs, matrix in matrices.items():
+                moved = state @ matrix
+                if runs > 0:
+                    overflow = moved[:, n_runs - runs:].sum(axis=1)
+                    moved = np.roll(moved, runs, axis=1)
+                    moved[:, :runs] = 0.0
+                    moved[:, -1] += overflow
+                new += moved[..., :n]
+                table += moved[..., n:]
+            state = new
+            if state.sum() < tol:
+                break
+        else:
+            raise ValueError("the half inning does not end within max_at_bats")
+        return table / table.sum(axis=(1, 2), keepdims=True)
+
+    def sample(self, leadoff, rng):
+        """
+        (runs, next leadoff)
+        """
+        cdf = self._cdf[leadoff]
+        k = min(bisect_right(cdf, rng.random() * cdf[-1]), len(cdf) - 1)
+        return divmod(k, self.n_slots)
+
+    def expected_runs(self, leadoff=0):
+        runs = np.arange(self.max_runs + 1)
+        return float(self.table[leadoff].sum(axis=1) @ runs)
+
+
+# *****************
+# * FastSimulator *
+# *****************
+class _AtBatSampler:
+    """
+    at-bat by at-bat sampling, for the half innings that end by walk-off
+    """
+    def __init__(self, distributions):
+        self.results = [list(dist) for dist in distributions]
+        self.cdfs = [list(accumulate(dist.values())) for dist in distributions]
+
+    def sample(self, slot, rng):
+        cdf = self.cdfs[slot]
+        k = min(bisect_right(cdf, rng.random() * cdf[-1]), len(cdf) - 1)
+        return self.results[slot][k]
+
+    def walk_off(self, leadoff, to_win, rng):
+        """
+        (runs, next leadoff) of a half inning stopped as soon as
+        'to_win' runs are scored
+        """
+        out, bases, runs, slot = 0, 0, 0, leadoff
+        while out < N_OUTS and runs < to_win:
+            result = self.sample(slot, rng)
+            out, bases, scored = transition(out, bases, result)
+            runs += scored
+            slot = (slot + 1) % len(self.cdfs)
+        return runs, slot
+
+
+class FastSimulator:
+    """
+    games sampled half inning by half inning from HalfInningTables,
+    following the extra-inning and walk-off rules of the engine.
+    At-bats are modelled as in MatchupModel: each side sets a VSCard
+    drawn uniformly from the VSCards of its deck.
+
+    This is an approximation for screening, not a substitute for the
+    engine: at-bats are independent and the hands are left out, while
+    in the engine a side only plays the cards in its hand, which
+    depends on the draw values of its cards and on the cards already
+    played. Even for the benchmark teams the visitor scores about 0.12
+    runs per game more than in the engine (2.89 vs 2.77 +- 0.04 over
+    4000 games), and batters with draw=0 empty the hand and score
+    about nothing in the engine. Confirm what it ranks on the engine;
+    validate() tells whether its error is within the tolerance.
+    """
+    def __init__(self, visitor, home, rule, **kwargs):
+        distributions = [
+            matchup_distributions(visitor, home),
+            matchup_distributions(home, visitor),
+        ]
+        self._setup(
+            [HalfInningTable(dist, **kwargs) for dist in distributions],
+            distributions[1], rule,
+        )
+
+    @classmethod
+    def from_tables(cls, tables, home_distributions, rule):
+        """
+        simulator of prebuilt [visitor, home] offense tables;
+        'home_distributions' are the at-bat distributions of the home
+        batting slots, used for walk-offs
+        """
+        simulator = cls.__new__(cls)
+        simulator._setup(tables, home_distributions, rule)
+        return simulator
+
+    def _setup(self, tables, home_distributions, rule):
+        self.rule = rule
+        self.rule_table = rule.compile()
+        self.tables = list(tables)
+        self.walk_off = _AtBatSampler(home_distributions)
+
+    def play(self, seed):
+        rng = stream_rng(seed, "fast")
+        score, leadoff, inning = [0, 0], [0, 0], 0
+        while True:
+            inning += 1
+            is_final = self.rule_table.is_final[inning]
+            runs, leadoff[0] = self.tables[0].sample(leadoff[0], rng)
+            score[0] += runs
+            if is_final and score[1] > score[0]:
+                break # the bottom half is not played
+            to_win = score[0] - score[1] + 1
+            if is_final:
+                runs, leadoff[1] = self.walk_off.walk_off(
+                    leadoff[1], to_win, rng
+                )
+            else:
+                runs, leadoff[1] = self.tables[1].sample(leadoff[1], rng)
+            score[1] += runs
+            if not is_final:
+                continue
+            if score[0] != score[1]:
+                break
+            if self.rule_table.after_inning[inning] == CompiledRule.END:
+                break # draw
+        return GameResult(seed, score, inning)
+
+    def run_games(self, seeds):
+        for seed in seeds:
+            yield self.play(seed)
+
+    def win_rate(self, n_games, seed=0, side=0):
+        return sum(
+            result.value(side)
+            for result in self.run_games(
+                "{}-{}".format(seed, n) for n in range(n_games)
+            )
+        ) / n_games
+
+
+class Validation:
+    """
+    means and standard errors of the engine and the FastSimulator:
+    summary[name][key] = (mean, stderr), name being "engine" or "fast".
+    A key passes only when the difference of the means is within its
+    tolerance by 'z' standard errors of the difference, so that noise
+    never excuses a bias: with too few engine games, nothing passes.
+    """
+    def __init__(self, summary, tolerance, z):
+        self.summary = summary
+        self.tolerance = tolerance
+        self.z = z
+
+    def difference(self, key):
+        """
+        (fast - engine, standard error of the difference)
+        """
+        (engine, engine_se), (fast, fast_se) = (
+            self.summary[name][key] for name in ("engine", "fast")
+        )
+        return fast - engine, float(np.hypot(engine_se, fast_se))
+
+    @property
+    def failures(self):
+        failures = []
+        for key, tolerance in self.tolerance.items():
+            diff, stderr = self.difference(key)
+            if abs(diff) + self.z * stderr > tolerance:
+                failures.append(key)
+        return failures
+
+    @property
+    def passed(self):
+        return len(self.failures) == 0
+
+    def __repr__(self):
+        return "Validation(passed={}, failures={})".format(
+            self.passed, self.failures
+        )
+
+
+def validate(visitor, home, rule, n_engine=2000, n_fast=20000, seed=0,
+             tolerance=None, z=2.0, processes=None):
+    """
+    Validation of the FastSimulator against the Phase engine:
+    win rate of the visitor, mean runs of both sides and innings;
+    'tolerance' maps these keys to the largest differences
+    accepted (TOLERANCE by default). The engine games are played
+    in a pool of 'processes'; about 2000 of them are needed to bound
+    the runs within 0.2
+    """
+    engine = play_games_parallel(
+        (
+            (visitor, home, rule, "{}-{}".format(seed, n))
+            for n in range(n_engine)
+        ),
+        processes=processes,
+    )
+    fast = list(FastSimulator(visitor, home, rule).run_games(
+        "{}-{}".format(seed, n) for n in range(n_fast)
+    ))
+    summary = {}
+    for name, results in (("engine", engine), ("fast", fast)):
+        values = {
+            "win_rate": [result.value(0) for result in results],
+            "visitor_runs": [result.score[0] for result in results],
+            "home_runs": [result.score[1] for result in results],
+            "innings": [result.inning for result in results],
+        }
+        summary[name] = {
+            key: (
+                float(np.mean(v)),
+                float(np.std(v, ddof=1) / np.sqrt(len(v))),
+            )
+            for key, v in values.items()
+        }
+    tolerance = TOLERANCE if tolerance is None else tolerance
+    return Validation(summary, tolerance, z)
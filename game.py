@@ -1,6 +1,7 @@
 from copy import deepcopy
-import numpy as np
+from collections import Counter
 from . card import Course, Point, Card, PlayerCard, TacticsCard, VSCard
+from . card import Position
 
 
 class Rule:
@@ -9,6 +10,74 @@ class Rule:
         self.max_extra_inning = max_extra_inning
         self.id_dh = is_dh
 
+    @property
+    def is_dh(self):
+        return self.id_dh
+
+    @property
+    def key(self):
+        return (self.max_inning, self.max_extra_inning, self.id_dh)
+
+    def compile(self):
+        """
+        the CompiledRule of this variant, built once per variant
+        """
+        compiled = _compiled_rules.get(self.key)
+        if compiled is None:
+            compiled = _compiled_rules[self.key] = CompiledRule(self)
+        return compiled
+
+
+def required_positions(is_dh):
+    positions = [Position.CATCHER] + [Position.INFIELDER] * 4 \
+        + [Position.OUTFIELDER] * 3
+    if is_dh:
+        return positions + [Position.DH]
+    else:
+        return positions + [Position.PITCHER]
+
+
+class CompiledRule:
+    """
+    per-inning tables of a Rule, looked up instead of comparing
+    innings with the limits of the rule:
+      is_final[inning]: last regular inning or later
+      after_inning[inning]: what follows the end of the inning
+        NEXT: the next inning
+        DECIDE: the game ends unless tied, then the next inning
+        END: the game ends
+    and the lineup checks of its DH setting:
+      required_positions: the positions of the nine batting slots
+      position_counts: ((Position, n), ...) of those
+      pitcher_bats: the pitcher holds a batting slot (no DH)
+    """
+    NEXT, DECIDE, END = range(3)
+
+    def __init__(self, rule):
+        self.max_inning = rule.max_inning
+        self.max_extra_inning = rule.max_extra_inning
+        self.is_dh = rule.id_dh
+        self.required_positions = tuple(required_positions(rule.id_dh))
+        self.position_counts = tuple(
+            sorted(Counter(self.required_positions).items(),
+                   key=lambda item: item[0].value)
+        )
+        self.pitcher_bats = not rule.id_dh
+        innings = range(max(rule.max_inning, rule.max_extra_inning) + 1)
+        self.is_final = tuple(inning >= rule.max_inning for inning in innings)
+        self.can_extend = tuple(
+            inning < rule.max_extra_inning for inning in innings
+        )
+        self.after_inning = tuple(
+            self.NEXT if not is_final
+            else self.DECIDE if can_extend
+            else self.END
+            for is_final, can_extend in zip(self.is_final, self.can_extend)
+        )
+
+
+_compiled_rules = {} # Rule.key -> CompiledRule
+
 
 class ScoreBoard:
     def __init__(self):
@@ -41,7 +110,7 @@ class ScoreBoard:
         if total_score[0] == total_score[1]:
             return None
         else:
-            return np.argmax(total_score)
+            return int(total_score[1] > total_score[0])
 
 
 class Field:
@@ -146,7 +215,10 @@ class Game:
         
         # --- game rules ---
         self.RULE = rule
-        # max_inning, max_extra_inning, is_dh, etc...
+        self.rule_table = rule.compile()
+
+        # --- observers ---
+        self.observers = []
         
     def next_batter_idx(self):
         """
@@ -156,20 +228,43 @@ class Game:
         self.next_batter[self.is_bottom] = (next_idx + 1) % 9
         return next_idx
         
-    def playball(self):
+    def play(self, phase=None):
+        """
+        generator running the game: yields every Decision
+        and expects its answer back through send().
+        'phase' resumes a game whose state was saved as that phase began
+        """
+        phase = StartGamePhase if phase is None else phase
         try:
-            StartGamePhase.execute(self)
+            while True:
+                phase = yield from phase.execute(self)
         except GameSet:
             pass # <-- jump to game set phase
 
+    def playball(self):
+        """
+        run the game to the end, answering decisions by the players' agents
+        """
+        steps = self.play()
+        try:
+            decision = next(steps)
+            while True:
+                if _profiler is None:
+                    answer = decision.ask()
+                else:
+                    answer = _profiler.measure(type(decision), decision.ask)
+                decision = steps.send(answer)
+        except StopIteration:
+            pass
+
     # --- inning ---
     @property
     def is_final_inning(self):
-        return game.inning >= self.RULE.max_inning
+        return self.rule_table.is_final[self.inning]
 
     @property
     def can_extend(self):
-        return game.inning < self.RULE.max_extra_inning
+        return self.rule_table.can_extend[self.inning]
 
     def increment_pitch_inning(self):
         def_player = self.players[not self.is_bottom]
@@ -187,7 +282,7 @@ class Game:
 
     @property
     def winning_team(self):
-        return self.score_board.winning_team()
+        return self.score_board.winning_team
 
     # --- players ---
     @property
@@ -197,8 +292,63 @@ class Game:
     @property
     def defense_player(self):
         return self.players[not self.is_bottom]
+
+    # --- observers ---
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def notify(self, event, *args):
+        for observer in self.observers:
+            getattr(observer, event)(self, *args)
+
+    # --- decisions ---
+    def decide(self, decision):
+        """
+        generator yielding 'decision' and returning its answer
+        """
+        answer = yield decision
+        self.notify("on_decision", decision, answer)
+        return answer
+
+
+class Observer:
+    """
+    base class of objects watching a game;
+    override only the events of interest
+    """
+    def on_phase(self, game, phase):
+        pass
+
+    def on_action(self, game, action):
+        pass
+
+    def on_decision(self, game, decision, answer):
+        pass
+
+    def on_at_bat_result(self, game, result):
+        pass
     
 
+# *******************
+# * Instrumentation *
+# *******************
+_profiler = None
+
+
+def set_profiler(profiler):
+    """
+    install an object with measure(key, func, *args) wrapping every
+    Phase/Action playing, AtBatResult.apply and agent decision,
+    or None to disable it (the default, costing one check per call)
+    """
+    global _profiler
+    _profiler = profiler
+
+
+def get_profiler():
+    return _profiler
+
+
 # *************
 # * Exception *
 # *************
@@ -216,14 +366,117 @@ class Change(Exception):
     pass
 
 
+# *************
+# * Decisions *
+# *************
+class Decision:
+    """
+    request for a choice of 'player' at a decision point;
+    the game is suspended until the answer is sent back
+    """
+    agent_method = None
+
+    def __init__(self, game, player):
+        self.game = game
+        self.player = player
+
+    @property
+    def side(self):
+        return self.game.players.index(self.player)
+
+    def options(self):
+        """
+        legal answers; None (do nothing) is always legal
+        """
+        raise NotImplementedError()
+
+    def ask(self, agent=None):
+        agent = self.player.agent if agent is None else agent
+        return getattr(agent, self.agent_method)(self.game, self.player)
+
+
+class PinchHitterDecision(Decision):
+    """
+    answer: a bench card to bat instead of the next batter
+    """
+    agent_method = "choose_pinch_hitter"
+
+    def options(self):
+        n = self.game.next_batter[self.game.is_bottom]
+        return [None] + self.player.team_status.pinch_hitters(n)
+
+
+class TacticsDecision(Decision):
+    """
+    answer: (index in hand of a TacticsCard, is_open)
+    """
+    agent_method = "choose_tactics_card"
+
+    def options(self):
+        return [None] + [
+            (idx, is_open)
+            for idx, card in enumerate(self.player.deck_master.hand)
+            if isinstance(card, TacticsCard)
+            for is_open in (False, True)
+        ]
+
+
+class VSCardDecision(Decision):
+    """
+    answer: index in hand of a VSCard
+    """
+    agent_method = "choose_vs_card"
+
+    def options(self):
+        return [None] + [
+            idx for idx, card in enumerate(self.player.deck_master.hand)
+            if isinstance(card, VSCard)
+        ]
+
+
+class SPComboDecision(Decision):
+    """
+    answer: index in hand of the PlayerCard of 'target'
+    (the batter for the offense, the pitcher for the defense)
+    """
+    agent_method = "choose_sp_combo"
+
+    def __init__(self, game, player, target):
+        super().__init__(game, player)
+        self.target = target
+
+    def options(self):
+        return [None] + [
+            idx for idx, card in enumerate(self.player.deck_master.hand)
+            if isinstance(card, PlayerCard) and card.id == self.target.id
+        ]
+
+    def ask(self, agent=None):
+        agent = self.player.agent if agent is None else agent
+        return agent.choose_sp_combo(self.game, self.player, self.target)
+
+
 # **********
 # * Phases *
 # **********
 class Phase:
     @classmethod
     def execute(cls, game):
-        cls.playing(game)
-        cls.next_phase(game).execute(game)
+        """
+        generator yielding the decisions requested in the phase;
+        returns the next phase
+        """
+        game.notify("on_phase", cls)
+        yield from cls.decisions(game)
+        if _profiler is None:
+            cls.playing(game)
+        else:
+            _profiler.measure(cls, cls.playing, game)
+        return cls.next_phase(game)
+
+    @staticmethod
+    def decisions(game):
+        return ()
 
     @staticmethod
     def playing(game):
@@ -273,10 +526,25 @@ class StartTopBottomInningPhase(Phase):
 
 
 class AtBatPhase(Phase):
+    @classmethod
+    def execute(cls, game):
+        game.notify("on_phase", cls)
+        if _profiler is None:
+            yield from cls.playing(game)
+        else:
+            yield from _profiler.measure_steps(cls, cls.playing(game))
+        return cls.next_phase(game)
+
     @staticmethod
     def playing(game):
+        """
+        generator running the at-bat actions until the change
+        """
+        action, result = BatterSetAction, None
         try:
-            BatterSetAction.execute(game, None)
+            while True:
+                result = yield from action.execute(game, result)
+                action = action.next_action(game)
         except Change:
             pass
 
@@ -298,7 +566,8 @@ class FinishTopBottomInningPhase(Phase):
         if game.is_bottom:
             return FinishInningPhase
         else:
-            if game.is_final_inning and game.winning_team == 1:
+            if game.rule_table.is_final[game.inning] \
+               and game.winning_team == 1:
                 raise GameSet()
             game.is_bottom = True
             return StartTopBottomInningPhase
@@ -312,11 +581,11 @@ class FinishInningPhase(Phase):
 
     @staticmethod
     def next_phase(game):
-        if not game.is_final_inning:
+        after_inning = game.rule_table.after_inning[game.inning]
+        if after_inning == CompiledRule.NEXT:
             return StartInningPhase
-        elif game.winning_team is not None:
-            raise GameSet()
-        elif game.can_extend:
+        elif after_inning == CompiledRule.DECIDE \
+             and game.winning_team is None:
             return StartInningPhase
         else:
             raise GameSet()
@@ -341,8 +610,19 @@ class FinishInningPhase(Phase):
 class Action:
     @classmethod
     def execute(cls, game, result):
-        result = cls.playing(game, result)
-        cls.next_action(game).execute(game, result)
+        """
+        generator yielding the decisions requested in the action;
+        returns the result handed to the next action
+        """
+        game.notify("on_action", cls)
+        yield from cls.decisions(game)
+        if _profiler is None:
+            return cls.playing(game, result)
+        return _profiler.measure(cls, cls.playing, game, result)
+
+    @staticmethod
+    def decisions(game):
+        return ()
 
     @staticmethod
     def playing(game, result):
@@ -354,6 +634,17 @@ class Action:
         
 
 class BatterSetAction(Action):
+    @staticmethod
+    def decisions(game):
+        # <-- ask if position change is needed
+        player = game.offense_player
+        decision = PinchHitterDecision(game, player)
+        if len(decision.options()) > 1:
+            card = yield from game.decide(decision)
+            if card is not None:
+                n = game.next_batter[game.is_bottom]
+                player.team_status.pinch_hit(n, card)
+
     @staticmethod
     def playing(game, result):
         pitcher = game.defense_player.pitcher
@@ -364,9 +655,11 @@ class BatterSetAction(Action):
         batter = game.offense_player.nth_batter(idx)
         batter.refresh()
         # <-- find which batter box is prefered
-        game.find.set_batter(batter, is_right=True)
+        game.field.set_batter(batter, is_right=True)
 
-        # <-- ask if position change / pinch hitter is needed
+        # <-- draw timing is provisional
+        game.offense_player.draw(batter.draw)
+        game.defense_player.draw(pitcher.draw)
 
         return None
     
@@ -376,9 +669,17 @@ class BatterSetAction(Action):
         
 
 class PrePitchAction(Action):
+    @staticmethod
+    def decisions(game):
+        for player in (game.defense_player, game.offense_player):
+            answer = yield from game.decide(TacticsDecision(game, player))
+            if answer is not None:
+                idx, is_open = answer
+                player.set_tactics_card_from_hand(idx, is_open)
+
     @staticmethod
     def playing(game, result):
-        # <-- set tactics card, use abilities, etc...
+        # <-- use tactics cards, abilities, etc...
         return None
 
     @staticmethod
@@ -386,15 +687,35 @@ class PrePitchAction(Action):
         return PitchAction
 
 class PitchAction(Action):
+    @classmethod
+    def execute(cls, game, result):
+        game.notify("on_action", cls)
+        for player in (game.defense_player, game.offense_player):
+            idx = yield from game.decide(VSCardDecision(game, player))
+            if idx is not None:
+                player.set_vs_card_from_hand(idx)
+        if _profiler is None:
+            result = cls.playing(game, result)
+        else:
+            result = _profiler.measure(cls, cls.playing, game, result)
+
+        # --- SPCombo Check: Defense side => Offense side ---
+        targets = (
+            (game.defense_player, game.field.mound),
+            (game.offense_player, game.field.batter),
+        )
+        for player, target in targets:
+            idx = yield from game.decide(
+                SPComboDecision(game, player, target)
+            )
+            if idx is not None:
+                player.set_sp_combo_from_hand(idx, target)
+        return result
+
     @staticmethod
     def playing(game, result):
-        # <-- set VSCard to VSCardZone
         for player in game.players:
             player.open_vs_card()
-
-        # <-- SPCombo Check
-        # <-- Defense side => Offense side
-
         return None
 
     @staticmethod
@@ -425,39 +746,40 @@ class PostPitchAction(Action):
 class GaugeCheckAction(Action):
     @staticmethod
     def playing(game, result):
-        vs_off = game.offense_player.vs_card
-        vs_def = game.defense_player.vs_card
+        return GaugeCheckAction.judge(
+            game.field.batter, game.field.mound,
+            game.offense_player.vs_card, game.defense_player.vs_card,
+            game.hit_gauge, game.out_gauge,
+        )
+
+    @staticmethod
+    def judge(batter, pitcher, vs_off, vs_def, hit_gauge, out_gauge):
+        """
+        pure form of the gauge check, shared with analytic models
+        """
         if not isinstance(vs_def, VSCard):
             return BallFour
         elif not isinstance(vs_off, VSCard):
             return StrikeOut
-        elif GaugeCheckAction.is_just_meet(game, vs_off, vs_def):
-            return GaugeCheckAction.hit_gauge_playing(game, vs_off, vs_def)
+        elif GaugeCheckAction.is_just_meet(batter, pitcher, vs_off, vs_def):
+            offense_power = batter.power + vs_off.pw_off
+            defense_power = pitcher.power + vs_def.pw_def
+            return hit_gauge[offense_power - defense_power]
         else:
-            return GaugeCheckAction.out_gauge_playing(game, vs_def)
+            return out_gauge[vs_def.course]
 
     @staticmethod
-    def is_just_meet(game, vs_off, vs_def):
+    def is_just_meet(batter, pitcher, vs_off, vs_def):
         if vs_def.course == vs_off.course:
             return True
-        meet_pt = game.field.batter.ms_pts[vs_def.course]
-        shot_pt = game.field.mound.ms_pts[vs_def.course]
+        meet_pt = batter.ms_pts[vs_def.course]
+        shot_pt = pitcher.ms_pts[vs_def.course]
         if meet_pt == Point.STAR:
             return True
         elif meet_pt == Point.FILL and shot_pt != Point.STAR:
             return True
         else:
             return False
-        
-    @staticmethod
-    def hit_gauge_playing(game, vs_off, vs_def):
-        offense_power = game.field.batter.power + vs_off.pw_off
-        defense_power = game.field.mound.power + vs_def.pw_def
-        return game.hit_gauge[offense_power - defense_power]
-
-    @staticmethod
-    def out_gauge_playing(game, vs_def):
-        return game.out_gauge[vs_def.course]
     
     @staticmethod
     def next_action(game):
@@ -478,10 +800,17 @@ class PostGaugeCheckAction(Action):
 class FinishAtBatAction(Action):
     @staticmethod
     def playing(game, result):
-        result.apply(game)
-        if game.is_final_inning and game.winning_team == 1:
+        game.notify("on_at_bat_result", result)
+        if _profiler is None:
+            result.apply(game)
+        else:
+            _profiler.measure(result, result.apply, game)
+        if game.is_bottom and game.rule_table.is_final[game.inning] \
+           and game.winning_team == 1:
             raise GameSet()
         # <-- refresh all cards (with few exceptions)
+        for player in game.players:
+            player.trash_vs_cards()
         return None
     
     @staticmethod
@@ -510,14 +839,17 @@ class InfieldGrounder(AtBatResult):
     @staticmethod
     def apply(game):
         # <--- select which runner be out
-        pass
+        game.out += 1
 
 
 class DoublePlay(AtBatResult):
     @staticmethod
     def apply(game):
         # <--- select which runner be out
-        pass
+        game.out += 1
+        if game.out < 3 and game.field.runners[0] is not None:
+            game.out += 1
+            game.field.runners[0] = None
 
 
 class OutfieldFly(AtBatResult):
@@ -552,15 +884,18 @@ class InfieldHit(AtBatResult):
     def apply(game):
         if game.field.runners[2] is not None:
             game.add_score(1)
-            batter = game.field.batter
-            game.field.runners = [batter] + game.field.runners[:-1]
+        batter = game.field.batter
+        game.field.runners = [batter] + game.field.runners[:-1]
 
 
 class Single(AtBatResult):
     @staticmethod
     def apply(game):
         # <-- swift runner check
-        pass
+        if game.field.runners[2] is not None:
+            game.add_score(1)
+        batter = game.field.batter
+        game.field.runners = [batter] + game.field.runners[:-1]
 
 
 class Double(AtBatResult):
@@ -572,7 +907,7 @@ class Double(AtBatResult):
         )
         game.add_score(num_returns)
         batter = game.field.batter
-        game.field.runners = [None, batter] + game.field.runners[0]
+        game.field.runners = [None, batter, game.field.runners[0]]
 
 
 class Triple(AtBatResult):
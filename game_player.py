@@ -1,25 +1,39 @@
 from enum import Enum, auto
-import pandas as pd
 import random
 from . card import Card, TacticsCard, VSCard, PlayerCard
 from . card import Position
+from . agent import RandomAgent
 
 
 # **************
 # * GamePlayer *
 # **************
 class GamePlayer:
-    def __init__(self, deck_master, deck_field, team_status):
+    def __init__(self, deck_master, deck_field, team_status, agent=None):
         self.deck_master = deck_master
         self.deck_field = deck_field
         self.team_status = team_status
+        self.agent = RandomAgent() if agent is None else agent
+        self.observers = []
+
+    # --- observers ---
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def notify(self, event, *args):
+        for observer in self.observers:
+            getattr(observer, event)(self, *args)
 
     # --- deck master ---
     def draw(self, n=1):
         self.deck_master.draw(n)
+        if n > 0:
+            self.notify("on_draw", self.deck_master.hand[-n:])
 
     # --- deck field ---
     def refresh_deck_field(self):
+        self.notify("on_trash_zone", "vs")
+        self.notify("on_trash_zone", "sp_combo")
         trash = self.deck_master.trash
         self.deck_field.refresh(trash)
 
@@ -27,6 +41,11 @@ class GamePlayer:
     def set_tactics_card(self, card, is_open):
         self.deck_field.tactics_zone.set_card(card, is_open)
 
+    def set_tactics_card_from_hand(self, idx, is_open):
+        self.notify("on_set_card", "tactics", idx, is_open)
+        card = self.deck_master.pick_up_from_hand(idx)
+        self.set_tactics_card(card, is_open)
+
     # v.s. card
     @property
     def vs_card(self):
@@ -35,13 +54,28 @@ class GamePlayer:
     def set_vs_card(self, card):
         self.deck_field.vs_zone.set_card(card)
 
+    def set_vs_card_from_hand(self, idx):
+        self.notify("on_set_card", "vs", idx, False)
+        card = self.deck_master.pick_up_from_hand(idx)
+        self.set_vs_card(card)
+
+    def trash_vs_cards(self):
+        self.notify("on_trash_zone", "vs")
+        self.deck_field.vs_zone.trash_all(self.deck_master.trash)
+
     def open_vs_card(self):
+        self.notify("on_open", "vs")
         self.deck_field.vs_zone.open_all()
         
     # sp-combo
     def set_sp_combo(self, card, batter):
         self.deck_field.sp_combo_zone.set_card(card, batter)
         self.draw() # <-- Should it be implemented here?
+
+    def set_sp_combo_from_hand(self, idx, batter):
+        self.notify("on_set_card", "sp_combo", idx, True)
+        card = self.deck_master.pick_up_from_hand(idx)
+        self.set_sp_combo(card, batter)
         
     # --- team status ---
     def increment_pitch_inning(self):
@@ -55,6 +89,32 @@ class GamePlayer:
         return self.team_status.nth_batter(n)
         
         
+class PlayerObserver:
+    """
+    base class of objects watching the cards of a GamePlayer
+    """
+    def on_draw(self, player, cards):
+        pass
+
+    def on_set_card(self, player, zone, idx, is_open):
+        """
+        the card at 'idx' in hand is about to be set in 'zone'
+        """
+        pass
+
+    def on_open(self, player, zone):
+        """
+        the face-down cards of 'zone' are about to be turned face up
+        """
+        pass
+
+    def on_trash_zone(self, player, zone):
+        """
+        every card in 'zone' is about to be trashed
+        """
+        pass
+
+
 # **************
 # * DeckMaster *
 # **************
@@ -62,7 +122,20 @@ class DeckMaster:
     def __init__(self, deck):
         self.hand = []
         self.deck = deck
-        self.trash = Trash()
+        self.trash = Trash(rng=deck.rng)
+
+    def reset(self, rng=None):
+        """
+        gather every card back into the deck in its listed order
+        and shuffle it; cards on the field must be trashed beforehand
+        """
+        if rng is not None:
+            self.deck.rng = rng
+            self.trash.rng = rng
+        self.hand.clear()
+        self.trash.clear()
+        self.deck[:] = self.deck.deck_list
+        self.deck.shuffle()
 
     # --- draw from deck ---
     def draw(self, n=1):
@@ -101,17 +174,23 @@ class DeckMaster:
     
         
 class Deck(list):
-    def __init__(self, deck_list):
+    def __init__(self, deck_list, rng=None):
         super().__init__(deck_list)
+        self.deck_list = tuple(deck_list)
+        self.rng = random.Random() if rng is None else rng
         self.shuffle()
 
     def shuffle(self):
-        random.shuffle(self)
+        self.rng.shuffle(self)
 
         
 class Trash(list):
+    def __init__(self, rng=None):
+        super().__init__()
+        self.rng = random.Random() if rng is None else rng
+
     def shuffle(self):
-        random.shuffle(self)
+        self.rng.shuffle(self)
 
 
 # *************
@@ -192,6 +271,7 @@ class TeamStatus:
     def __init__(self, df_status):
         self.df_status = df_status
         self.pitch_innings = 0
+        self._bench = None
 
     @property
     def pitcher(self):
@@ -201,17 +281,15 @@ class TeamStatus:
         return card
     
     def update_penalty(self):
+        self._bench = None
         self.df_status.reset_index(drop=True, inplace=True)
         
-        card_dict = self.df_status.card.to_dict()
-        position_dict = self.df_status.position.to_dict()
-        def idx_to_penalty(idx):
-            card = card_dict[idx]
-            position = position_dict[idx]
-            return not card.is_defensible(position)
-
-        self.df_status.is_penalty \
-            |= self.df_status.index.map(idx_to_penalty)
+        df = self.df_status
+        df["is_penalty"] = [
+            bool(is_penalty) or not card.is_defensible(position)
+            for card, position, is_penalty
+            in zip(df.card, df.position, df.is_penalty)
+        ]
 
     def nth_batter(self, n):
         if n not in range(9):
@@ -222,3 +300,68 @@ class TeamStatus:
             self.df_status.order == n
         ].card.iloc[0]
         return batter
+
+    @property
+    def bench(self):
+        """
+        cards neither in the batting order nor on the mound;
+        cached, since it is checked before every at-bat, until the lineup
+        changes through pinch_hit or update_penalty
+        """
+        if self._bench is None:
+            is_bench = ~self.df_status.order.isin(range(9)) \
+                & (self.df_status.position != Position.PITCHER)
+            self._bench = list(self.df_status[is_bench].card)
+        return list(self._bench)
+
+    def pinch_hitters(self, n):
+        """
+        bench cards that can bat for the n-th batter without a swap:
+        only a card that can pitch replaces the pitcher
+        """
+        df = self.df_status
+        if df[df.order == n].position.iloc[0] != Position.PITCHER:
+            return self.bench
+        return [
+            card for card in self.bench
+            if card.is_defensible(Position.PITCHER)
+        ]
+
+    def pinch_hit(self, n, card, swap=None):
+        """
+        'card' from the bench takes the n-th order and the position
+        of the current batter, who leaves the game.
+        With 'swap', a card in the lineup, the pinch hitter takes its
+        position instead and 'swap' moves to the one left open.
+        Whoever takes over the mound must be able to pitch
+        """
+        df = self.df_status.copy()
+        is_old = df.order == n
+        is_new = df.card.map(lambda c: c is card)
+        is_moved = is_new
+        position = df.loc[is_old, "position"].iloc[0]
+        df.loc[is_new, "order"] = n
+        if swap is None:
+            _set_position(df, is_new, position)
+        else:
+            is_swap = df.card.map(lambda c: c is swap) & ~is_old
+            if not is_swap.any():
+                raise ValueError("'swap' must be in the lineup")
+            _set_position(df, is_new, df[is_swap].position.iloc[0])
+            _set_position(df, is_swap, position)
+            is_moved = is_new | is_swap
+        mound = df[is_moved & (df.position == Position.PITCHER)].card
+        if any(not c.is_defensible(Position.PITCHER) for c in mound):
+            raise ValueError(
+                "a pinch hitter for the pitcher needs a reliever or a swap"
+            )
+        self.df_status = df[~is_old].reset_index(drop=True)
+        self.update_penalty()
+
+
+def _set_position(df, mask, position):
+    # a Position is iterable, so pandas would spread it over the rows
+    df["position"] = [
+        position if is_set else old
+        for is_set, old in zip(mask, df.position)
+    ]
@@ -0,0 +1,371 @@
+import time
+from itertools import combinations
+import numpy as np
+from . card import Position
+from . game import required_positions
+from . expected_runs import MatchupModel, transition, N_OUTS, N_BASES
+
+
+N_STATES = N_OUTS * N_BASES
+START = 0 # no out, no runner
+
+
+# ******************
+# * Batter Kernels *
+# ******************
+class BatterKernel:
+    """
+    one plate appearance of a batter as matrices over (out, bases):
+      trans: transitions staying in the inning
+      runs: expected runs scored
+      change: probability that the inning ends
+    """
+    def __init__(self, distribution):
+        self.trans = np.zeros((N_STATES, N_STATES))
+        self.runs = np.zeros(N_STATES)
+        self.change = np.zeros(N_STATES)
+        for out in range(N_OUTS):
+            for bases in range(N_BASES):
+                i = out * N_BASES + bases
+                for result, p in distribution.items():
+                    new_out, new_bases, runs = transition(out, bases, result)
+                    self.runs[i] += p * runs
+                    if new_out < N_OUTS:
+                        self.trans[i, new_out * N_BASES + new_bases] += p
+                    else:
+                        self.change[i] += p
+
+    def step(self, dist):
+        """
+        advance a (inning, out-bases) distribution by one plate appearance;
+        return (new distribution, expected runs)
+        """
+        runs = float((dist @ self.runs).sum())
+        change = dist @ self.change
+        new = dist @ self.trans
+        new[1:, START] += change[:-1]
+        return new, runs
+
+
+# ***************
+# * Inning Tree *
+# ***************
+class InningTree:
+    """
+    half innings led off by every batting order of 'kernels'.
+
+    The orders are built batter by batter from the orders of one batter
+    less, so the plate appearances of an inning prefix are computed once
+    for all the orders sharing it. With the orders in lexicographic order:
+      seq: the orders, as rows of kernel indices
+      runs: expected runs of an inning started by the order
+      ends: ends[:, c], probability that the inning ends after
+            c + 1 plate appearances, modulo the number of batters
+      next: next[:, c], index of the order starting the next inning
+            after such an inning, i.e. the order rotated by c + 1
+    Innings going around the order are followed until their probability
+    falls below 'tol'.
+    """
+    def __init__(self, kernels, tol=1e-6, max_steps=10000):
+        n = len(kernels)
+        seq = np.zeros((1, 0), dtype=int)
+        used = np.zeros(1, dtype=int) # bitmask of the batters in seq
+        dist = np.zeros((1, N_STATES))
+        dist[0, START] = 1.0
+        runs = np.zeros(1)
+        ends = np.zeros((1, 0))
+        for _ in range(n):
+            parts = []
+            for b, kernel in enumerate(kernels):
+                rows = np.flatnonzero(~used >> b & 1)
+                d = dist[rows]
+                parts.append((
+                    np.column_stack([seq[rows], np.full(len(rows), b)]),
+                    used[rows] | 1 << b,
+                    d @ kernel.trans,
+                    runs[rows] + d @ kernel.runs,
+                    np.column_stack([ends[rows], d @ kernel.change]),
+                ))
+            seq, used, dist, runs, ends = map(np.concatenate, zip(*parts))
+
+        keys = seq @ n ** np.arange(n - 1, -1, -1)
+        order = np.argsort(keys)
+        keys = keys[order]
+        self.seq = seq[order]
+        self.runs = runs[order]
+        self.ends = ends[order]
+        self.next = np.empty((len(keys), n), dtype=int)
+        for c in range(n):
+            shift = (c + 1) % n
+            high = n ** (n - shift)
+            self.next[:, c] = np.searchsorted(
+                keys, keys % high * n ** shift + keys // high
+            )
+        self._go_around(kernels, dist[order], tol, max_steps)
+
+    def _go_around(self, kernels, dist, tol, max_steps):
+        """
+        plate appearances after the first pass through the order.
+        The c-th batter of an order leads off the order rotated by c,
+        so before the c-th batter the rows are put in the order of
+        that rotation, where each batter is a contiguous block
+        """
+        n = len(kernels)
+        block = len(dist) // n
+        back = self.next[:, n - 2] # rotated by n - 1
+        runs = np.zeros((n, len(dist)))
+        ends = np.zeros((n, len(dist)))
+        for step in range(n, max_steps):
+            if dist.sum(axis=1).max() <= tol:
+                break
+            c = step % n
+            for b, kernel in enumerate(kernels):
+                rows = slice(b * block, (b + 1) * block)
+                d = dist[rows]
+                runs[c, rows] += d @ kernel.runs
+                ends[c, rows] += d @ kernel.change
+                dist[rows] = d @ kernel.trans
+            dist = dist[back]
+        else:
+            raise ValueError("the inning never ends: no result makes an out")
+        for c in range(n):
+            rows = np.arange(len(dist)) if c == 0 else self.next[:, c - 1]
+            self.runs += runs[c, rows]
+            self.ends[:, c] += ends[c, rows]
+
+    def game_values(self, n_innings):
+        """
+        expected runs over 'n_innings' of every order
+        """
+        values = np.zeros(len(self.seq))
+        for _ in range(n_innings):
+            values = self.runs + (self.ends * values[self.next]).sum(axis=1)
+        return values
+
+
+# *************
+# * Optimizer *
+# *************
+class LineupResult:
+    def __init__(self, order, positions, value, n_penalties, is_proven):
+        self.order = order # cards in batting order
+        self.positions = positions # positions in batting order
+        self.value = value # expected runs over the innings - penalty costs
+        self.n_penalties = n_penalties
+        self.is_proven = is_proven # False when stopped by the time limit
+
+    def __repr__(self):
+        return "LineupResult(order={}, value={:.4f}, proven={})".format(
+            [card.id for card in self.order], self.value, self.is_proven
+        )
+
+    def to_df_status(self, pitcher=None):
+        """
+        rows for TeamStatus; the pitcher is appended when it does not bat
+        """
+        import pandas as pd
+        rows = [
+            {"card": card, "position": position, "order": n,
+             "is_penalty": not card.is_defensible(position)}
+            for n, (card, position)
+            in enumerate(zip(self.order, self.positions))
+        ]
+        if pitcher is not None and Position.PITCHER not in self.positions:
+            rows.append({"card": pitcher, "position": Position.PITCHER,
+                         "order": -1, "is_penalty": False})
+        return pd.DataFrame(rows)
+
+
+class LineupOptimizer:
+    """
+    batting order and position assignment maximizing the expected runs
+    over 'n_innings' against 'opp_pitcher'.
+
+    The positions depend only on which batters play, so every legal set
+    of batters is solved on its own: an InningTree gives the inning
+    values of all its orders at once, memoizing the innings by batting
+    order prefix, and the orders are scored over the game by chaining
+    the innings through their leadoffs. Nine batters take a few seconds;
+    each bench player adds the sets it makes legal.
+    A swap local search gives the first incumbent, whose set of batters
+    is solved first.
+
+    Assignments where a card cannot defend its position are rejected
+    unless 'penalty_cost' (runs per penalty) is given.
+    """
+    def __init__(self, roster, opp_pitcher, own_vs_cards, opp_vs_cards,
+                 rule, pitcher=None, n_innings=9, penalty_cost=None,
+                 tol=1e-6):
+        self.roster = list(roster)
+        compiled = rule.compile()
+        self.positions = list(compiled.required_positions)
+        if compiled.pitcher_bats:
+            if pitcher is None:
+                raise ValueError("the pitcher bats without DH")
+            self.roster = [card for card in self.roster if card is not pitcher]
+            self.roster.append(pitcher)
+        self.pitcher = pitcher
+        self.n_innings = n_innings
+        self.penalty_cost = penalty_cost
+        self.tol = tol
+        if len(self.roster) < len(self.positions):
+            raise ValueError("not enough players in the roster")
+
+        model = MatchupModel(own_vs_cards, opp_vs_cards)
+        self.kernels = [
+            BatterKernel(model.result_distribution(card, opp_pitcher))
+            for card in self.roster
+        ]
+        self._assignments = {}
+
+    # --- positions ---
+    def _assign(self, members):
+        """
+        (n_penalties, positions) of the best assignment of the roster
+        indices 'members' (in sorted order) to the required positions,
+        or None
+        """
+        key = tuple(sorted(members))
+        if key in self._assignments:
+            return self._assignments[key]
+        best = {0: (0, ())} # used position mask -> (penalties, positions)
+        for idx in key:
+            card = self.roster[idx]
+            new_best = {}
+            for mask, (penalties, assigned) in best.items():
+                for p, position in enumerate(self.positions):
+                    if mask >> p & 1:
+                        continue
+                    if (position == Position.PITCHER) \
+                       != (card is self.pitcher):
+                        continue
+                    penalty = not card.is_defensible(position)
+                    if penalty and self.penalty_cost is None:
+                        continue
+                    new_mask = mask | 1 << p
+                    candidate = (penalties + penalty, assigned + (position,))
+                    if new_mask not in new_best \
+                       or candidate[0] < new_best[new_mask][0]:
+                        new_best[new_mask] = candidate
+            best = new_best
+        result = min(best.values(), key=lambda x: x[0]) if best else None
+        self._assignments[key] = result
+        return result
+
+    def _penalty(self, order):
+        return self._assign(order)[0] * (self.penalty_cost or 0)
+
+    # --- evaluation ---
+    def _start(self):
+        dist = np.zeros((self.n_innings, N_STATES))
+        dist[0, START] = 1.0
+        return dist
+
+    def evaluate(self, order):
+        """
+        expected runs over the innings for roster indices in batting order
+        """
+        return self._finish(self._start(), 0.0, order, 0)
+
+    def _finish(self, dist, runs, order, n_done, max_steps=10000):
+        for idx in range(n_done, max_steps):
+            if dist.sum() <= self.tol:
+                return runs
+            dist, gained = self.kernels[order[idx % len(order)]].step(dist)
+            runs += gained
+        raise ValueError("the inning never ends: no result makes an out")
+
+    # --- search ---
+    def optimize(self, time_limit=10.0, n_restarts=3, seed=None):
+        """
+        best lineup found; 'is_proven' tells whether every legal set
+        of batters was solved within 'time_limit' seconds (None: no limit).
+        The limit is checked between sets of batters
+        """
+        self._deadline = None if time_limit is None \
+            else time.perf_counter() + time_limit
+        self._is_proven = True
+        self._best = self._local_search(n_restarts, np.random.default_rng(seed))
+        first = tuple(sorted(self._best[1]))
+        sets = [
+            members for members
+            in combinations(range(len(self.roster)), len(self.positions))
+            if members != first and self._assign(members) is not None
+        ]
+        for members in [first] + sets:
+            if self._is_timeout():
+                break
+            self._solve(members)
+        value, order = self._best
+        penalties, positions = self._assign(order)
+        # _assign lists positions in sorted index order
+        by_idx = dict(zip(sorted(order), positions))
+        return LineupResult(
+            [self.roster[idx] for idx in order],
+            [by_idx[idx] for idx in order],
+            value, penalties, self._is_proven,
+        )
+
+    def _solve(self, members):
+        """
+        best order of the roster indices 'members' against the incumbent
+        """
+        tree = InningTree(
+            [self.kernels[idx] for idx in members], self.tol / self.n_innings
+        )
+        values = tree.game_values(self.n_innings)
+        order = tuple(members[idx] for idx in tree.seq[np.argmax(values)])
+        # scored like the incumbent, with the same truncation error
+        value = self.evaluate(order) - self._penalty(order)
+        if value > self._best[0]:
+            self._best = (value, order)
+
+    def _is_timeout(self):
+        if self._deadline is not None \
+           and time.perf_counter() > self._deadline:
+            self._is_proven = False
+        return not self._is_proven
+
+    def _local_search(self, n_restarts, rng):
+        """
+        (value, order) of the best lineup reached by swapping two slots
+        or a slot and a bench player, from random legal lineups
+        """
+        n_slots = len(self.positions)
+        best = None
+        for _ in range(n_restarts + 1):
+            order = self._random_lineup(rng)
+            value = self.evaluate(order) - self._penalty(order)
+            improved = True
+            while improved and not self._is_timeout():
+                improved = False
+                for i in range(n_slots):
+                    for j in range(len(self.roster)):
+                        new = list(order)
+                        if j < n_slots:
+                            if j <= i:
+                                continue
+                            new[i], new[j] = new[j], new[i]
+                        elif j in order:
+                            continue
+                        else:
+                            new[i] = j
+                        new = tuple(new)
+                        if self._assign(new) is None:
+                            continue
+                        new_value = self.evaluate(new) - self._penalty(new)
+                        if new_value > value + self.tol:
+                            order, value, improved = new, new_value, True
+            if best is None or value > best[0]:
+                best = (value, order)
+        return best
+
+    def _random_lineup(self, rng, max_tries=1000):
+        n_slots = len(self.positions)
+        for _ in range(max_tries):
+            order = tuple(
+                int(idx) for idx in rng.permutation(len(self.roster))[:n_slots]
+            )
+            if self._assign(order) is not None:
+                return order
+        raise ValueError("no legal lineup in the roster")
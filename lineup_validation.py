@@ -0,0 +1,128 @@
+"""
+vectorized legality checks of candidate lineups.
+
+A candidate assigns a roster index to each of the nine batting slots,
+orders[c, n], with a Position each, positions[c, n] (Position values,
+see encode). Positions are bit masks (card.Position is a Flag), so
+every (card, position) pair of every candidate is checked at once.
+"""
+import numpy as np
+from . card import Position
+
+
+# reason bits of an illegal candidate
+DUPLICATE = 1 # a card holds two slots
+POSITIONS = 2 # the positions are not the ones the rule requires
+PITCHER = 4 # the pitcher bats with DH, or the PITCHER slot is another card
+PENALTIES = 8 # more penalties than allowed
+REASONS = {
+    DUPLICATE: "duplicate", POSITIONS: "positions",
+    PITCHER: "pitcher", PENALTIES: "penalties",
+}
+
+
+class LineupChecks:
+    """
+    per candidate: legal, n_penalties and reasons (bits above)
+    """
+    def __init__(self, reasons, n_penalties):
+        self.reasons = reasons
+        self.n_penalties = n_penalties
+
+    @property
+    def legal(self):
+        return self.reasons == 0
+
+    def describe(self, c):
+        return [name for bit, name in REASONS.items() if self.reasons[c] & bit]
+
+    def __len__(self):
+        return len(self.reasons)
+
+
+# *******************
+# * LineupValidator *
+# *******************
+class LineupValidator:
+    """
+    checks of lineups of 'roster' (PlayerCards) under 'rule';
+    'pitcher' (a card of the roster) is the starting pitcher,
+    'max_penalties' None allows any number of penalties
+    """
+    def __init__(self, roster, rule, pitcher=None, max_penalties=None):
+        self.roster = list(roster)
+        compiled = rule.compile()
+        self.is_dh = compiled.is_dh
+        self.masks = np.array(
+            [card.position_mask for card in self.roster], dtype=np.int64
+        )
+        self.pitcher = None
+        if pitcher is not None:
+            self.pitcher = next(
+                n for n, card in enumerate(self.roster) if card is pitcher
+            )
+        elif compiled.pitcher_bats:
+            raise ValueError("the pitcher bats without DH")
+        self.max_penalties = max_penalties
+        self.required = [
+            (position.value, n) for position, n in compiled.position_counts
+        ]
+
+    def encode(self, lineups):
+        """
+        (orders, positions) arrays of lineups given as
+        [(card, Position) of each batting slot] lists
+        """
+        index = {id(card): n for n, card in enumerate(self.roster)}
+        orders = np.array(
+            [[index[id(card)] for card, _ in lineup] for lineup in lineups],
+            dtype=np.int64,
+        ).reshape(-1, 9)
+        positions = np.array(
+            [[position.value for _, position in lineup] for lineup in lineups],
+            dtype=np.int64,
+        ).reshape(-1, 9)
+        return orders, positions
+
+    def penalties(self, orders, positions):
+        """
+        (candidates, 9) bool: the card cannot defend its position
+        """
+        return (positions != Position.DH.value) \
+            & ((self.masks[orders] & positions) == 0)
+
+    def check(self, orders, positions):
+        orders = np.asarray(orders, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+        if orders.shape != positions.shape or orders.shape[1:] != (9,):
+            raise ValueError("orders and positions must be (candidates, 9)")
+        if orders.size and not (
+            0 <= orders.min() and orders.max() < len(self.roster)
+        ):
+            raise ValueError("roster index out of range")
+        reasons = np.zeros(len(orders), dtype=np.int64)
+
+        ordered = np.sort(orders, axis=1)
+        reasons[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)] |= DUPLICATE
+
+        wrong = np.zeros(len(orders), dtype=bool)
+        for value, n in self.required:
+            wrong |= (positions == value).sum(axis=1) != n
+        reasons[wrong] |= POSITIONS
+
+        if self.pitcher is not None:
+            is_pitcher = orders == self.pitcher
+            if self.is_dh:
+                wrong = is_pitcher.any(axis=1)
+            else:
+                on_mound = positions == Position.PITCHER.value
+                wrong = (on_mound != is_pitcher).any(axis=1)
+            reasons[wrong] |= PITCHER
+
+        n_penalties = self.penalties(orders, positions).sum(axis=1)
+        if self.max_penalties is not None:
+            reasons[n_penalties > self.max_penalties] |= PENALTIES
+        return LineupChecks(reasons, n_penalties)
+
+    def check_lineups(self, lineups):
+        return self.check(*self.encode(lineups))
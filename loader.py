@@ -0,0 +1,166 @@
+"""
+JSON files of rules, decks and teams.
+
+rule: {"max_inning": 9, "max_extra_inning": 12, "is_dh": true}
+deck: [{"id": 100, "course": "HIGH", "pw_off": 1, "pw_def": 0}, ...]
+team: {
+    "name": "...",
+    "players": [{"id": 0, "bat_hand": "RIGHT", "position": ["CATCHER"],
+                 "ms_pts": {"CENTER": "FILL", ...}, "power": 3,
+                 "draw": 1}, ...],
+    "lineup": [{"id": 0, "position": "CATCHER", "order": 0}, ...],
+    "deck": [...] or "path/to/deck.json" (relative to the team file)
+}
+The lineup holds the nine batters (order 0-8), the pitcher
+(position PITCHER, order -1) and the bench (order -1).
+"""
+import json
+import os
+import pandas as pd
+from . card import BatHand, Position, Course, Point, MeetShotPts
+from . card import PlayerCard, VSCard
+from . game import Rule
+from . game_player import GamePlayer, DeckMaster, Deck, DeckField, TeamStatus
+
+
+# ********
+# * Rule *
+# ********
+def rule_from_dict(data):
+    return Rule(data["max_inning"], data["max_extra_inning"], data["is_dh"])
+
+
+def rule_to_dict(rule):
+    return {
+        "max_inning": rule.max_inning,
+        "max_extra_inning": rule.max_extra_inning,
+        "is_dh": rule.id_dh,
+    }
+
+
+# *********
+# * Cards *
+# *********
+def player_card_from_dict(data):
+    ms_pts = MeetShotPts()
+    for course, point in data.get("ms_pts", {}).items():
+        ms_pts[Course[course]] = Point[point]
+    return PlayerCard(
+        data["id"], BatHand[data["bat_hand"]],
+        {Position[position] for position in data["position"]},
+        ms_pts, data["power"], data.get("draw", 1),
+    )
+
+
+def player_card_to_dict(card):
+    return {
+        "id": card.id,
+        "bat_hand": card.bat_hand.name,
+        "position": sorted(position.name for position in card.position),
+        "ms_pts": {
+            course.name: point.name
+            for course, point in card._ms_pts.items()
+        },
+        "power": card._power,
+        "draw": card._draw,
+    }
+
+
+def vs_card_from_dict(data):
+    return VSCard(
+        data["id"], Course[data["course"]], data["pw_off"], data["pw_def"]
+    )
+
+
+def vs_card_to_dict(card):
+    return {
+        "id": card.id,
+        "course": card._course.name,
+        "pw_off": card.pw_off,
+        "pw_def": card.pw_def,
+    }
+
+
+def deck_from_list(data):
+    return [vs_card_from_dict(card) for card in data]
+
+
+# ********
+# * Team *
+# ********
+def team_from_dict(data, base_dir="."):
+    """
+    (name, GamePlayer) of a team
+    """
+    cards = {}
+    for card_data in data["players"]:
+        card = player_card_from_dict(card_data)
+        cards[card.id] = card
+    rows = [
+        dict(
+            card=cards[entry["id"]],
+            position=Position[entry["position"]],
+            order=entry.get("order", -1),
+            is_penalty=False,
+        )
+        for entry in data["lineup"]
+    ]
+    deck = data["deck"]
+    if isinstance(deck, str):
+        deck = load_json(os.path.join(base_dir, deck))
+    team_status = TeamStatus(pd.DataFrame(rows))
+    team_status.update_penalty()
+    player = GamePlayer(
+        DeckMaster(Deck(deck_from_list(deck))), DeckField(), team_status
+    )
+    return data.get("name", ""), player
+
+
+def team_to_dict(name, player):
+    df = player.team_status.df_status
+    return {
+        "name": name,
+        "players": [player_card_to_dict(card) for card in df.card],
+        "lineup": [
+            {"id": card.id, "position": position.name, "order": int(order)}
+            for card, position, order in zip(df.card, df.position, df.order)
+        ],
+        "deck": [
+            vs_card_to_dict(card)
+            for card in player.deck_master.deck.deck_list
+            if isinstance(card, VSCard)
+        ],
+    }
+
+
+# *********
+# * Files *
+# *********
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def load_rule(path):
+    return rule_from_dict(load_json(path))
+
+
+def load_team(path):
+    """
+    (name, GamePlayer); the name defaults to the file name
+    """
+    name, player = team_from_dict(
+        load_json(path), os.path.dirname(os.path.abspath(path))
+    )
+    if name == "":
+        name = os.path.splitext(os.path.basename(path))[0]
+    return name, player
+
+
+def save_team(name, player, path):
+    save_json(team_to_dict(name, player), path)
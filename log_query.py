@@ -0,0 +1,210 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from . event_log import (
+    EventLog, EventCode, ReplayState, RESULTS, COURSES, NO_COURSE,
+)
+
+
+AT_BAT_DTYPE = np.dtype([
+    ("game", "i4"), # number of the log in the index
+    ("event", "i4"), # number of the AT_BAT_RESULT event in the log
+    ("inning", "i2"),
+    ("is_bottom", "i1"),
+    ("out", "i1"), # before the at-bat
+    ("bases", "i1"), # before the at-bat; bit i <=> runner on base i+1
+    ("batter", "i4"),
+    ("pitcher", "i4"),
+    ("result", "i1"),
+    ("off_course", "i1"),
+    ("def_course", "i1"),
+    ("runs", "i1"),
+])
+# secondary indices: key name -> function of the at-bat table
+KEYS = {
+    "batter": lambda table: table["batter"],
+    "pitcher": lambda table: table["pitcher"],
+    "base_out": lambda table: table["out"] * 8 + table["bases"],
+    "result": lambda table: table["result"],
+}
+
+
+def at_bats(log, game=0):
+    """
+    at-bat rows of a log as a structured array; logs of version 1
+    have no at-bat context, so their pitcher is -1 and their courses
+    NO_COURSE (see event_log.upgrade)
+    """
+    state = ReplayState()
+    rows = []
+    context = (NO_COURSE * 8 + NO_COURSE, -1)
+    for n, event in enumerate(log):
+        if event.code == EventCode.AT_BAT_CONTEXT:
+            context = (event.a, event.b)
+        elif event.code == EventCode.AT_BAT_RESULT:
+            out, bases = state.out, state.bases
+            runs = sum(state.total_score)
+            state.apply(event)
+            rows.append((
+                game, n, state.inning, state.is_bottom, out, bases,
+                event.b, context[1], event.a,
+                context[0] // 8, context[0] % 8,
+                sum(state.total_score) - runs,
+            ))
+            continue
+        state.apply(event)
+    return np.array(rows, dtype=AT_BAT_DTYPE)
+
+
+# *********
+# * Index *
+# *********
+def build_index(log_paths, index_dir):
+    """
+    scan the logs once and write under 'index_dir':
+      at_bats.npy: the at-bat table
+      by_<key>.npy: row numbers sorted by each key of KEYS
+      sorted_<key>.npy: the key values in that order
+      games.json: the log path, seed and version of each game number
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    tables, games = [], []
+    for game, path in enumerate(log_paths):
+        log = EventLog.load(path)
+        tables.append(at_bats(log, game))
+        games.append(
+            {"path": str(path), "seed": log.seed, "version": log.version}
+        )
+    table = (
+        np.concatenate(tables) if tables
+        else np.zeros(0, dtype=AT_BAT_DTYPE)
+    )
+    np.save(os.path.join(index_dir, "at_bats.npy"), table)
+    for key, func in KEYS.items():
+        values = func(table)
+        order = np.argsort(values, kind="stable").astype("i4")
+        np.save(os.path.join(index_dir, "by_{}.npy".format(key)), order)
+        np.save(
+            os.path.join(index_dir, "sorted_{}.npy".format(key)),
+            values[order],
+        )
+    with open(os.path.join(index_dir, "games.json"), "w") as f:
+        json.dump(games, f)
+    return LogQuery(index_dir)
+
+
+class LogQuery:
+    """
+    queries over an index written by build_index;
+    the tables are memory-mapped, and each query narrows the rows
+    with the most selective indexed key before filtering the rest
+    """
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.table = np.load(
+            os.path.join(index_dir, "at_bats.npy"), mmap_mode="r"
+        )
+        self.orders = {
+            key: self._load("by_{}.npy".format(key)) for key in KEYS
+        }
+        self.sorted_keys = {
+            key: self._load("sorted_{}.npy".format(key)) for key in KEYS
+        }
+        with open(os.path.join(index_dir, "games.json")) as f:
+            self.games = json.load(f)
+
+    def _load(self, name):
+        return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.table)
+
+    def _rows_with(self, key, values):
+        keys = self.sorted_keys[key]
+        chunks = []
+        for value in values:
+            low = np.searchsorted(keys, value, side="left")
+            high = np.searchsorted(keys, value, side="right")
+            chunks.append(self.orders[key][low:high])
+        return np.sort(np.concatenate(chunks)) if chunks else np.zeros(0, int)
+
+    def at_bats(self, batter=None, pitcher=None, out=None, bases=None,
+                result=None, off_course=None, def_course=None,
+                risp=False):
+        """
+        DataFrame of the at-bats matching every given condition.
+        Each condition is a value or a list of values:
+          batter, pitcher: card ids
+          out: outs before the at-bat
+          bases: base bits before the at-bat (bit i <=> base i+1)
+          result: AtBatResult classes
+          off_course, def_course: Course of the VS cards
+          risp: runners in scoring position (on 2nd or 3rd)
+        """
+        if bases is not None and risp:
+            raise ValueError("give either 'bases' or 'risp'")
+        if risp:
+            bases = [b for b in range(8) if b & 0b110]
+        conditions = {
+            "batter": _values(batter),
+            "pitcher": _values(pitcher),
+            "result": _values(result, RESULTS.index),
+        }
+        base_out = None
+        if out is not None or bases is not None:
+            outs = _values(out) or range(3)
+            bases = _values(bases) or range(8)
+            base_out = [o * 8 + b for o in outs for b in bases]
+
+        indexed = [
+            (key, values) for key, values in conditions.items()
+            if values is not None
+        ]
+        if base_out is not None:
+            indexed.append(("base_out", base_out))
+        if len(indexed) > 0:
+            key, values = min(indexed, key=lambda kv: self._count(*kv))
+            rows = self._rows_with(key, values)
+            selected = np.asarray(self.table[rows])
+        else:
+            selected = np.asarray(self.table)
+
+        mask = np.ones(len(selected), dtype=bool)
+        for key, values in conditions.items():
+            if values is not None:
+                mask &= np.isin(selected[key], values)
+        if base_out is not None:
+            mask &= np.isin(selected["out"] * 8 + selected["bases"], base_out)
+        for key, course in (("off_course", off_course),
+                            ("def_course", def_course)):
+            values = _values(course, COURSES.index)
+            if values is not None:
+                mask &= np.isin(selected[key], values)
+        return self._to_frame(selected[mask])
+
+    def _count(self, key, values):
+        keys = self.sorted_keys[key]
+        return sum(
+            np.searchsorted(keys, v, "right") - np.searchsorted(keys, v, "left")
+            for v in values
+        )
+
+    def _to_frame(self, rows):
+        frame = pd.DataFrame(rows)
+        frame["seed"] = [self.games[n]["seed"] for n in frame["game"]]
+        frame["result"] = [RESULTS[n].__name__ for n in frame["result"]]
+        for key in ("off_course", "def_course"):
+            frame[key] = [
+                None if n == NO_COURSE else COURSES[n].name
+                for n in frame[key]
+            ]
+        return frame
+
+
+def _values(value, convert=None):
+    if value is None:
+        return None
+    if not isinstance(value, (list, tuple, set, range)):
+        value = [value]
+    return [v if convert is None else convert(v) for v in value]
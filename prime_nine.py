@@ -1 +1,294 @@
-pass
+"""
+entry point of the package.
+Public names are imported from their modules on first access,
+so that importing the package loads neither numpy nor pandas
+until a code path needs them.
+
+As a script, runs batches of seeded games:
+    python -m <package> run visitor.json home.json -n 1000
+and spreads them over hosts:
+    python -m <package> coordinate visitor.json home.json -n 100000 \
+        --listen 0.0.0.0:5999
+    python -m <package> worker coordinator-host:5999
+with a shared secret in $PRIME_NINE_AUTHKEY (or --authkey).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from importlib import import_module
+
+
+# name -> module defining it
+_EXPORTS = {
+    # cards
+    "BatHand": "card", "Position": "card", "Course": "card",
+    "Point": "card", "MeetShotPts": "card", "PlayerCard": "card",
+    "TacticsCard": "card", "VSCard": "card",
+    # engine
+    "Game": "game", "Rule": "game", "Observer": "game",
+    "GamePlayer": "game_player", "DeckMaster": "game_player",
+    "Deck": "game_player", "DeckField": "game_player",
+    "TeamStatus": "game_player",
+    "Agent": "agent", "RandomAgent": "agent",
+    # simulation
+    "GameResult": "simulation", "play_game": "simulation",
+    "run_games": "simulation", "play_games_parallel": "simulation",
+    "compare": "comparison", "estimate_win_rate": "sequential",
+    "sequential_compare": "sequential",
+    # analysis and optimization
+    "MatchupModel": "expected_runs", "InningModel": "expected_runs",
+    "DeckSpace": "deck_optimizer", "DeckOptimizer": "deck_optimizer",
+    "LineupOptimizer": "lineup_optimizer",
+    "Team": "tournament", "Tournament": "tournament",
+    # serving
+    "GameServer": "server", "DecisionBatcher": "batching",
+    # logs
+    "EventRecorder": "event_log", "EventLog": "event_log",
+    "record_game": "event_log", "SeekableReplay": "replay_index",
+    "LogQuery": "log_query", "build_index": "log_query",
+    "load_team": "loader", "load_rule": "loader", "save_team": "loader",
+    # instrumentation
+    "Profiler": "profiling", "profile": "profiling",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    return getattr(import_module("." + module, __package__), name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+# *******
+# * CLI *
+# *******
+DEFAULT_RULE = {"max_inning": 9, "max_extra_inning": 12, "is_dh": True}
+AUTHKEY_ENV = "PRIME_NINE_AUTHKEY"
+
+
+def _module(name):
+    return import_module("." + name, __package__)
+
+
+def game_tasks(visitor, home, rule, n_games, seed, alternate=False):
+    """
+    (visitor, home, rule, seed) of each game; with 'alternate',
+    the teams swap sides every other game
+    """
+    for n in range(n_games):
+        players = (visitor, home) if not alternate or n % 2 == 0 \
+            else (home, visitor)
+        yield (*players, rule, "{}-{}".format(seed, n))
+
+
+def _play(task):
+    visitor, home, rule, seed = task
+    return _module("simulation").play_game(visitor, home, rule, seed)
+
+
+def _results(tasks, processes, chunksize):
+    if processes == 1:
+        for task in tasks:
+            yield _play(task)
+        return
+    from multiprocessing import Pool
+    with Pool(processes) as pool:
+        yield from pool.imap(_play, tasks, chunksize)
+
+
+class Progress:
+    """
+    games per second and win counts, reported to 'stream'
+    at most every 'interval' seconds
+    """
+    def __init__(self, n_games, names, stream=sys.stderr, interval=1.0):
+        self.n_games = n_games
+        self.names = names
+        self.stream = stream
+        self.interval = interval
+        self.wins = {name: 0 for name in names}
+        self.draws = 0
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, winner):
+        self.done += 1
+        if winner is None:
+            self.draws += 1
+        else:
+            self.wins[winner] += 1
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report()
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def report(self, end="\r"):
+        wins = " ".join(
+            "{}={}".format(name, n) for name, n in self.wins.items()
+        )
+        self.stream.write(
+            "{}/{} games  {:.1f} games/s  {} draws={}{}".format(
+                self.done, self.n_games, self.rate, wins, self.draws, end
+            )
+        )
+        self.stream.flush()
+
+
+def run(args):
+    loader = _module("loader")
+    visitor_name, visitor = loader.load_team(args.visitor)
+    home_name, home = loader.load_team(args.home)
+    if visitor_name == home_name:
+        visitor_name, home_name = visitor_name + "#0", home_name + "#1"
+    rule = loader.rule_from_dict(
+        DEFAULT_RULE if args.rule is None else loader.load_json(args.rule)
+    )
+    names = {id(visitor): visitor_name, id(home): home_name}
+    tasks = list(game_tasks(
+        visitor, home, rule, args.games, args.seed, args.alternate
+    ))
+    sides = [(names[id(task[0])], names[id(task[1])]) for task in tasks]
+
+    out = sys.stdout if args.out is None else open(args.out, "w")
+    progress = Progress(
+        args.games, [visitor_name, home_name],
+        interval=float("inf") if args.quiet else 1.0,
+    )
+    try:
+        results = _results(tasks, args.processes, args.chunksize)
+        for n, (result, (v, h)) in enumerate(zip(results, sides)):
+            winner = None if result.winning_team is None \
+                else (v, h)[result.winning_team]
+            record = {
+                "game": n, "seed": result.seed, "visitor": v, "home": h,
+                "score": result.score, "inning": result.inning,
+                "winner": winner,
+            }
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            progress.update(winner)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if not args.quiet:
+        progress.report(end="\n")
+    return 0
+
+
+def coordinate(args):
+    loader, cluster = _module("loader"), _module("cluster")
+    _, visitor = loader.load_team(args.visitor)
+    _, home = loader.load_team(args.home)
+    rule = loader.rule_from_dict(
+        DEFAULT_RULE if args.rule is None else loader.load_json(args.rule)
+    )
+    coordinator = cluster.Coordinator(
+        cluster.Campaign(visitor, home, rule, args.seed), args.games,
+        args.authkey.encode(), cluster.parse_address(args.listen),
+        args.batch_size,
+    )
+    if not args.quiet:
+        sys.stderr.write("listening on {}\n".format(coordinator.address))
+    summary = coordinator.run()
+    print(json.dumps(summary.to_dict()))
+    return 0
+
+
+def worker(args):
+    cluster = _module("cluster")
+    address = cluster.parse_address(args.address)
+    authkey = args.authkey.encode()
+    if args.processes == 1:
+        played = [cluster.run_worker(address, authkey)]
+    else:
+        played = cluster.run_workers(address, authkey, args.processes)
+    if not args.quiet:
+        sys.stderr.write("{} games played\n".format(sum(played)))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="prime_nine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = commands.add_parser(
+        "run", help="play seeded games and stream the results as JSONL"
+    )
+    parser_run.add_argument("visitor", help="team JSON of the visitor")
+    parser_run.add_argument("home", help="team JSON of the home team")
+    parser_run.add_argument("--rule", help="rule JSON (9 innings, DH)")
+    parser_run.add_argument("-n", "--games", type=int, default=100)
+    parser_run.add_argument("--seed", default="0")
+    parser_run.add_argument(
+        "--alternate", action="store_true",
+        help="swap home and visitor every other game",
+    )
+    parser_run.add_argument(
+        "-p", "--processes", type=int, default=None,
+        help="worker processes (all cores; 1 runs in this process)",
+    )
+    parser_run.add_argument("--chunksize", type=int, default=8)
+    parser_run.add_argument("-o", "--out", help="JSONL file (stdout)")
+    parser_run.add_argument(
+        "-q", "--quiet", action="store_true", help="no progress report"
+    )
+    parser_run.set_defaults(func=run)
+
+    parser_coordinate = commands.add_parser(
+        "coordinate", help="serve seeded games to workers on other hosts"
+    )
+    parser_coordinate.add_argument("visitor", help="team JSON of the visitor")
+    parser_coordinate.add_argument("home", help="team JSON of the home team")
+    parser_coordinate.add_argument("--rule", help="rule JSON (9 innings, DH)")
+    parser_coordinate.add_argument("-n", "--games", type=int, default=100)
+    parser_coordinate.add_argument("--seed", default="0")
+    parser_coordinate.add_argument(
+        "--listen", default="127.0.0.1:5999", help="host:port or socket path"
+    )
+    parser_coordinate.add_argument(
+        "--authkey", default=os.environ.get(AUTHKEY_ENV),
+        help="shared secret (${})".format(AUTHKEY_ENV),
+    )
+    parser_coordinate.add_argument("--batch-size", type=int, default=64)
+    parser_coordinate.add_argument("-q", "--quiet", action="store_true")
+    parser_coordinate.set_defaults(func=coordinate)
+
+    parser_worker = commands.add_parser(
+        "worker", help="play games for a coordinator"
+    )
+    parser_worker.add_argument("address", help="host:port or socket path")
+    parser_worker.add_argument(
+        "--authkey", default=os.environ.get(AUTHKEY_ENV),
+        help="shared secret (${})".format(AUTHKEY_ENV),
+    )
+    parser_worker.add_argument(
+        "-p", "--processes", type=int, default=None,
+        help="worker processes (all cores)",
+    )
+    parser_worker.add_argument("-q", "--quiet", action="store_true")
+    parser_worker.set_defaults(func=worker)
+
+    args = parser.parse_args(argv)
+    if args.command in ("coordinate", "worker") and not args.authkey:
+        parser.error("--authkey or ${} is required".format(AUTHKEY_ENV))
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import json
+import os
+import sys
+import time
+from array import array
+from contextlib import contextmanager
+from . game import (
+    Phase, Action, AtBatResult, Decision, set_profiler, get_profiler,
+)
+
+
+def kind_of(key):
+    for base, kind in ((Phase, "phase"), (Action, "action"),
+                       (AtBatResult, "result"), (Decision, "decision")):
+        if isinstance(key, type) and issubclass(key, base):
+            return kind
+    return "other"
+
+
+def _calibrate():
+    pass
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "child", "blocks")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0 # ns, inclusive
+        self.child = 0 # ns spent in nested measured calls
+        self.blocks = 0 # net allocated memory blocks
+
+
+# ************
+# * Profiler *
+# ************
+class Profiler:
+    """
+    call counts, wall time (inclusive and self) and net allocated
+    memory blocks per Phase/Action class, AtBatResult and Decision;
+    optionally keeps a trace of every call for chrome://tracing
+    """
+    def __init__(self, trace=False, max_trace_events=1000000,
+                 track_allocations=True):
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.track_allocations = track_allocations
+        self.reset()
+
+    def reset(self):
+        self.stats = {} # key -> _Stat
+        # trace as raw integers (key number, start ns, duration ns),
+        # so that tracing does not count as allocations of the engine
+        self.events = array("q")
+        self._keys = {} # key -> key number
+        self._stack = [] # child time of the measured calls in progress
+        self._overhead = 0
+        self._origin = time.perf_counter_ns()
+        if self.track_allocations:
+            self._calibrate()
+
+    def _calibrate(self, n=100):
+        # blocks allocated by measure() itself
+        trace, self.trace = self.trace, False
+        for _ in range(n):
+            self.measure(_calibrate, _calibrate)
+        stat = self.stats.pop(_calibrate)
+        self._overhead = round(stat.blocks / n)
+        self.trace = trace
+
+    def measure(self, key, func, *args):
+        mark = self._enter()
+        try:
+            return func(*args)
+        finally:
+            stop = self._leave(key, mark)
+            self._trace(key, mark[1], stop - mark[1])
+
+    def measure_steps(self, key, steps):
+        """
+        drive 'steps', a generator yielding decisions, as one call of
+        'key': only the time between its yields is measured, not the
+        answers; the trace spans the whole call
+        """
+        calls, answer, begin = 1, None, None
+        try:
+            while True:
+                mark = self._enter()
+                if begin is None:
+                    begin = mark[1]
+                try:
+                    decision = steps.send(answer)
+                finally:
+                    stop = self._leave(key, mark, calls)
+                    calls = 0
+                answer = yield decision
+        except StopIteration as done:
+            return done.value
+        finally:
+            self._trace(key, begin, stop - begin)
+
+    def _enter(self):
+        blocks = sys.getallocatedblocks() if self.track_allocations else 0
+        self._stack.append(0)
+        return blocks, time.perf_counter_ns()
+
+    def _leave(self, key, mark, calls=1):
+        """
+        account the time since 'mark' to 'key'; return the stop time
+        """
+        blocks, start = mark
+        stop = time.perf_counter_ns()
+        elapsed = stop - start
+        child = self._stack.pop()
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = _Stat()
+        stat.calls += calls
+        stat.total += elapsed
+        stat.child += child
+        if self.track_allocations:
+            stat.blocks += sys.getallocatedblocks() - blocks - self._overhead
+        if self._stack:
+            self._stack[-1] += elapsed
+        return stop
+
+    def _trace(self, key, start, elapsed):
+        if self.trace and len(self.events) < 3 * self.max_trace_events:
+            number = self._keys.setdefault(key, len(self._keys))
+            self.events.extend((number, start - self._origin, elapsed))
+
+    # --- export ---
+    def table(self):
+        """
+        DataFrame of the statistics, most expensive (self time) first
+        """
+        import pandas as pd # not needed to collect the statistics
+        rows = [
+            {
+                "name": key.__name__,
+                "kind": kind_of(key),
+                "calls": stat.calls,
+                "total_ms": stat.total / 1e6,
+                "self_ms": (stat.total - stat.child) / 1e6,
+                "mean_us": stat.total / stat.calls / 1e3,
+                "net_blocks": stat.blocks,
+            }
+            for key, stat in self.stats.items()
+        ]
+        columns = [
+            "name", "kind", "calls", "total_ms", "self_ms", "mean_us",
+            "net_blocks",
+        ]
+        frame = pd.DataFrame(rows, columns=columns)
+        return frame.sort_values("self_ms", ascending=False) \
+                    .reset_index(drop=True)
+
+    def chrome_trace(self):
+        """
+        trace in the Trace Event Format (load in chrome://tracing
+        or Perfetto); requires trace=True
+        """
+        pid = os.getpid()
+        keys = list(self._keys)
+        events = (
+            (keys[self.events[n]], self.events[n + 1], self.events[n + 2])
+            for n in range(0, len(self.events), 3)
+        )
+        return {
+            "traceEvents": [
+                {
+                    "name": key.__name__,
+                    "cat": kind_of(key),
+                    "ph": "X",
+                    "ts": start / 1e3,
+                    "dur": elapsed / 1e3,
+                    "pid": pid,
+                    "tid": 0,
+                }
+                for key, start, elapsed in events
+            ],
+            "displayTimeUnit": "ns",
+        }
+
+    def save_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+@contextmanager
+def profile(profiler=None, **kwargs):
+    """
+    with profile() as profiler: ... -- profile the games run inside
+    """
+    profiler = Profiler(**kwargs) if profiler is None else profiler
+    previous = get_profiler()
+    set_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        set_profiler(previous)
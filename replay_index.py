@@ -0,0 +1,144 @@
+import struct
+from bisect import bisect_right
+from . event_log import (
+    EventLog, EventCode, ReplayState, PHASES, initial_decks,
+)
+from . game import StartTopBottomInningPhase
+
+
+MAGIC = b"PN9I"
+VERSION = 1
+ENTRY = struct.Struct("<III") # event number, offset, length
+HALF_INNING = PHASES.index(StartTopBottomInningPhase)
+
+
+# ***************
+# * ReplayIndex *
+# ***************
+class ReplayIndex:
+    """
+    keyframes of a logged game: snapshots of the ReplayState taken
+    at the start, every 'interval' events and at every half-inning;
+    seeking replays at most 'interval' events from a keyframe
+    """
+    def __init__(self, positions, snapshots):
+        self.positions = list(positions) # event numbers, increasing
+        self.snapshots = list(snapshots)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @classmethod
+    def build(cls, log, visitor, home, interval=256):
+        """
+        'visitor' and 'home' are the configurations the game started from
+        """
+        state = ReplayState(
+            initial_decks(visitor, home, log.seed, log.antithetic)
+        )
+        positions, snapshots = [0], [state.snapshot()]
+        for event in log:
+            state.apply(event)
+            is_boundary = (
+                event.code == EventCode.PHASE and event.a == HALF_INNING
+            )
+            if is_boundary or state.n_events - positions[-1] >= interval:
+                positions.append(state.n_events)
+                snapshots.append(state.snapshot())
+        return cls(positions, snapshots)
+
+    def keyframe(self, n):
+        """
+        (event number, ReplayState) of the last keyframe at or before 'n'
+        """
+        idx = bisect_right(self.positions, n) - 1
+        return self.positions[idx], ReplayState.from_snapshot(self.snapshots[idx])
+
+    def to_bytes(self):
+        header = MAGIC + struct.pack("<BI", VERSION, len(self))
+        table, offset = [], 0
+        for position, snapshot in zip(self.positions, self.snapshots):
+            table.append(ENTRY.pack(position, offset, len(snapshot)))
+            offset += len(snapshot)
+        return header + b"".join(table) + b"".join(self.snapshots)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        if buffer[:4] != MAGIC:
+            raise ValueError("not a replay index")
+        version, n_entries = struct.unpack_from("<BI", buffer, 4)
+        if version != VERSION:
+            raise ValueError("unsupported index version: {}".format(version))
+        start = 9 + n_entries * ENTRY.size
+        positions, snapshots = [], []
+        for k in range(n_entries):
+            position, offset, length = ENTRY.unpack_from(
+                buffer, 9 + k * ENTRY.size
+            )
+            positions.append(position)
+            snapshots.append(bytes(buffer[start + offset:start + offset + length]))
+        return cls(positions, snapshots)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+# ******************
+# * SeekableReplay *
+# ******************
+class SeekableReplay:
+    """
+    random access to the states of a logged game.
+    The returned ReplayState is reused by later seeks; snapshot it
+    to keep it.
+    """
+    def __init__(self, log, index):
+        self.log = log
+        self.index = index
+        self._state = None
+
+    def __len__(self):
+        return len(self.log)
+
+    def state_at(self, n):
+        """
+        ReplayState after the first 'n' events
+        """
+        if not 0 <= n <= len(self.log):
+            raise IndexError("event {} out of range".format(n))
+        state = self._start_for(n)
+        for k in range(state.n_events, n):
+            state.apply(self.log[k])
+        self._state = state
+        return state
+
+    def _start_for(self, n):
+        # continue from the current state when it is closer than a keyframe
+        idx = bisect_right(self.index.positions, n) - 1
+        if (
+            self._state is not None
+            and self.index.positions[idx] <= self._state.n_events <= n
+        ):
+            return self._state
+        return ReplayState.from_snapshot(self.index.snapshots[idx])
+
+    @classmethod
+    def open(cls, log_path, index_path=None):
+        index_path = log_path + ".idx" if index_path is None else index_path
+        return cls(EventLog.load(log_path), ReplayIndex.load(index_path))
+
+
+def save_indexed(log, visitor, home, path, interval=256):
+    """
+    write the log to 'path' and its ReplayIndex next to it
+    """
+    log.save(path)
+    index = ReplayIndex.build(log, visitor, home, interval)
+    index.save(path + ".idx")
+    return index
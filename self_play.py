@@ -0,0 +1,285 @@
+import glob
+import hashlib
+import os
+from array import array
+from collections import deque
+import numpy as np
+from . game import Game
+from . batching import StateEncoder
+from . shared_catalog import SharedCatalog
+from . simulation import prepare_player, GameResult
+from . import shared_catalog
+
+
+FIELDS = (
+    "states", "actions", "sides", "outcomes", "margins", "counts", "games",
+)
+LABELS = ("outcomes", "margins") # averaged over the duplicates of a row
+
+
+# **********
+# * Worker *
+# **********
+def play_and_encode(visitor, home, rule, seed, game_id, encoder=None):
+    """
+    play a game with the players' agents and return fixed-width arrays:
+      states: encoded state of each decision the encoder supports
+      actions: encoded option chosen
+      sides: deciding side
+      outcomes: 1 / 0.5 / 0 for a win / draw / loss of the deciding side
+      margins: final run differential seen from the deciding side
+      counts: 1 (rows merged by the ShardWriter add up their counts)
+      games: game_id
+    """
+    encoder = StateEncoder() if encoder is None else encoder
+    game = Game(
+        prepare_player(visitor, seed, 0), prepare_player(home, seed, 1), rule
+    )
+    states, actions, sides = [], [], []
+    steps = game.play()
+    answer = None
+    while True:
+        try:
+            decision = steps.send(answer)
+        except StopIteration:
+            break
+        answer = decision.ask()
+        if encoder.supports(decision):
+            states.append(encoder.encode_state(decision))
+            actions.append(encoder.encode_option(decision, answer))
+            sides.append(decision.side)
+    result = GameResult(seed, game.score_board.total_score, game.inning)
+    n = len(sides)
+    sides = np.array(sides, dtype=np.int8)
+    return {
+        "states": np.array(states, dtype=np.float32).reshape(
+            n, encoder.n_state_features
+        ),
+        "actions": np.array(actions, dtype=np.float32).reshape(
+            n, encoder.n_option_features
+        ),
+        "sides": sides,
+        "outcomes": np.array(
+            [result.value(side) for side in sides], dtype=np.float32
+        ),
+        "margins": np.array(
+            [result.value(side, "runs") for side in sides], dtype=np.float32
+        ),
+        "counts": np.ones(n, dtype=np.int32),
+        "games": np.full(n, game_id, dtype=np.int32),
+    }
+
+
+def _task(task):
+    # teams and rules come from the SharedCatalog attached to the worker
+    visitor, home, rule, seed, game_id = task
+    return play_and_encode(
+        shared_catalog._teams[visitor], shared_catalog._teams[home],
+        shared_catalog._rules[rule], seed, game_id,
+    )
+
+
+# ***************
+# * ShardWriter *
+# ***************
+class ShardWriter:
+    """
+    buffers rows and writes them 'shard_size' at a time as
+      shard_00000.npz (compressed) or
+      shard_00000.<field>.npy files (memory-mappable).
+    With 'dedup', a row whose (state, action) was already seen is
+    merged into the first one: its count is added and its labels
+    averaged, so that a frequent state is not labelled by the outcome
+    of its first game only; sides and games are those of the first row.
+    Labels of rows in shards already written are updated on close.
+    """
+    def __init__(self, directory, shard_size=100000, compress=True,
+                 dedup=True):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.compress = compress
+        self.dedup = dedup
+        self.seen = {} # key -> row number
+        # per row number: label sums and counts
+        self.sums = {label: array("d") for label in LABELS}
+        self.counts = array("q")
+        self.buffer = {field: [] for field in FIELDS}
+        self.n_buffered = 0
+        self.n_rows = 0
+        self.n_duplicates = 0
+        self.shards = []
+        self._starts = [] # first row number of each shard
+        self._stale = set() # shards whose labels changed after writing
+        os.makedirs(directory, exist_ok=True)
+
+    def _keep(self, arrays):
+        """
+        mask of the new rows; labels of the others are merged
+        """
+        keep = np.ones(len(arrays["sides"]), dtype=bool)
+        for n, (state, action) in enumerate(
+            zip(arrays["states"], arrays["actions"])
+        ):
+            key = None
+            if self.dedup:
+                key = hashlib.blake2b(
+                    state.tobytes() + action.tobytes(), digest_size=8
+                ).digest()
+                row = self.seen.get(key)
+                if row is not None:
+                    keep[n] = False
+                    self._add(row, arrays, n)
+                    if row < self.n_rows:
+                        self._stale.add(self._shard_of(row))
+                    continue
+                self.seen[key] = len(self.counts)
+            self.counts.append(0)
+            for label in LABELS:
+                self.sums[label].append(0.0)
+            self._add(len(self.counts) - 1, arrays, n)
+        return keep
+
+    def _add(self, row, arrays, n):
+        self.counts[row] += int(arrays["counts"][n])
+        for label in LABELS:
+            self.sums[label][row] += \
+                float(arrays[label][n]) * int(arrays["counts"][n])
+
+    def _shard_of(self, row):
+        return int(np.searchsorted(self._starts, row, side="right")) - 1
+
+    def _labels(self, start, stop):
+        counts = np.frombuffer(self.counts, dtype=np.int64)[start:stop]
+        labels = {"counts": counts.astype(np.int32)}
+        for label in LABELS:
+            sums = np.frombuffer(self.sums[label], dtype=np.float64)
+            labels[label] = (sums[start:stop] / counts).astype(np.float32)
+        return labels
+
+    def write(self, arrays):
+        keep = self._keep(arrays)
+        self.n_duplicates += int((~keep).sum())
+        for field in FIELDS:
+            self.buffer[field].append(arrays[field][keep])
+        self.n_buffered += int(keep.sum())
+        while self.n_buffered >= self.shard_size:
+            self._flush(self.shard_size)
+
+    def close(self):
+        if self.n_buffered > 0:
+            self._flush(self.n_buffered)
+        for shard in sorted(self._stale):
+            self._rewrite_labels(shard)
+        self._stale.clear()
+
+    def _flush(self, n):
+        merged = {
+            field: np.concatenate(self.buffer[field]) for field in FIELDS
+        }
+        shard = {field: merged[field][:n] for field in FIELDS}
+        shard.update(self._labels(self.n_rows, self.n_rows + n))
+        self.buffer = {field: [merged[field][n:]] for field in FIELDS}
+        self.n_buffered -= n
+        self._starts.append(self.n_rows)
+        self.n_rows += n
+
+        name = os.path.join(
+            self.directory, "shard_{:05d}".format(len(self.shards))
+        )
+        if self.compress:
+            np.savez_compressed(name + ".npz", **shard)
+            self.shards.append(name + ".npz")
+        else:
+            for field in FIELDS:
+                np.save("{}.{}.npy".format(name, field), shard[field])
+            self.shards.append(name)
+
+    def _rewrite_labels(self, shard):
+        start = self._starts[shard]
+        stop = self._starts[shard + 1] if shard + 1 < len(self._starts) \
+            else self.n_rows
+        labels = self._labels(start, stop)
+        path = self.shards[shard]
+        if self.compress:
+            with np.load(path) as data:
+                arrays = {field: data[field] for field in FIELDS}
+            arrays.update(labels)
+            np.savez_compressed(path, **arrays)
+        else:
+            for field, values in labels.items():
+                np.save("{}.{}.npy".format(path, field), values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_shards(directory, mmap=True):
+    """
+    dict of arrays per shard of 'directory', in order;
+    with mmap, uncompressed shards are memory-mapped
+    """
+    paths = glob.glob(os.path.join(directory, "shard_*.npz"))
+    paths += [
+        path[:-len(".states.npy")]
+        for path in glob.glob(os.path.join(directory, "shard_*.states.npy"))
+    ]
+    for path in sorted(paths):
+        if path.endswith(".npz"):
+            with np.load(path) as data:
+                yield {field: data[field] for field in FIELDS}
+        else:
+            yield {
+                field: np.load(
+                    "{}.{}.npy".format(path, field),
+                    mmap_mode="r" if mmap else None,
+                )
+                for field in FIELDS
+            }
+
+
+def load_shards(directory):
+    """
+    every shard of 'directory' concatenated in memory, field by field
+    """
+    shards = list(iter_shards(directory, mmap=False))
+    return {
+        field: np.concatenate([shard[field] for shard in shards])
+        for field in FIELDS
+    } if shards else None
+
+
+# ************
+# * Pipeline *
+# ************
+def generate(visitor, home, rule, directory, n_games, seed=0,
+             processes=None, max_pending=64, shard_size=100000,
+             compress=True, dedup=True):
+    """
+    self-play 'n_games' over a process pool and stream the encoded
+    decisions into shards; at most 'max_pending' games are in flight
+    (bounded buffer) and results are written as they come back.
+    The configurations reach the workers once, through a SharedCatalog,
+    and tasks carry their catalog indices only
+    """
+    tasks = (
+        (0, 1, 0, "{}-{}".format(seed, n), n) for n in range(n_games)
+    )
+    with ShardWriter(directory, shard_size, compress, dedup) as writer, \
+         SharedCatalog([visitor, home], [rule]) as catalog, \
+         catalog.pool(processes) as pool:
+        pending = deque()
+        for task in tasks:
+            if len(pending) >= max_pending:
+                writer.write(pending.popleft().get())
+            pending.append(pool.apply_async(_task, (task,)))
+        while pending:
+            writer.write(pending.popleft().get())
+    return {
+        "games": n_games,
+        "rows": writer.n_rows,
+        "duplicates": writer.n_duplicates,
+        "shards": writer.shards,
+    }
@@ -0,0 +1,165 @@
+from math import sqrt
+from statistics import NormalDist
+from . comparison import PairedComparison
+from . simulation import play_game
+
+
+# ***********
+# * Results *
+# ***********
+class WinRateEstimate:
+    """
+    Beta posterior of the win rate (a draw counts as half a win)
+    under a uniform prior
+    """
+    def __init__(self, wins, n_games, confidence):
+        self.alpha = 1 + wins
+        self.beta = 1 + n_games - wins
+        self.n_games = n_games
+        self.confidence = confidence
+
+    def __repr__(self):
+        low, high = self.ci
+        return (
+            "WinRateEstimate(mean={:.4f}, ci=({:.4f}, {:.4f}), n_games={})"
+        ).format(self.mean, low, high, self.n_games)
+
+    @property
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    @property
+    def stderr(self):
+        total = self.alpha + self.beta
+        return sqrt(self.alpha * self.beta / (total ** 2 * (total + 1)))
+
+    @property
+    def ci(self):
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        return (
+            max(0.0, self.mean - z * self.stderr),
+            min(1.0, self.mean + z * self.stderr),
+        )
+
+    def prob_above(self, threshold):
+        """
+        posterior probability that the win rate exceeds 'threshold'
+        (normal approximation)
+        """
+        return 1 - NormalDist(self.mean, self.stderr).cdf(threshold)
+
+
+class SequentialResult:
+    """
+    reason is one of
+      "precision": the interval got narrower than requested
+      "decided": the sign / the side of the threshold is settled
+      "max_games": the budget ran out
+    """
+    def __init__(self, estimate, reason):
+        self.estimate = estimate
+        self.reason = reason
+
+    def __repr__(self):
+        return "SequentialResult({!r}, reason={!r})".format(
+            self.estimate, self.reason
+        )
+
+
+# ************
+# * Stopping *
+# ************
+def look_confidence(confidence, batch_size, min_games, max_games):
+    """
+    confidence of each interim look: the error rate is split evenly
+    over the possible looks (Bonferroni), so that peeking after
+    every batch keeps the overall error rate below 1 - confidence;
+    the last batch may be clipped by max_games and still counts
+    """
+    n_looks = 1 + -(-max(0, max_games - min_games) // batch_size)
+    return 1 - (1 - confidence) / n_looks
+
+
+def _validate_caps(batch_size, min_games, max_games):
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    if not 2 <= min_games <= max_games:
+        raise ValueError("2 <= min_games <= max_games is required")
+
+
+def estimate_win_rate(config, opponent, rule, precision=0.02,
+                      threshold=None, confidence=0.95, batch_size=100,
+                      min_games=200, max_games=10000, seed=0):
+    """
+    play 'config' against 'opponent' in batches (alternating visitor/home)
+    until the half-width of the interval is below 'precision',
+    or, when 'threshold' is given, until the win rate is settled
+    to be above or below it
+    """
+    _validate_caps(batch_size, min_games, max_games)
+    look = look_confidence(confidence, batch_size, min_games, max_games)
+    wins = 0.0
+    n_games = 0
+    while True:
+        size = min_games if n_games == 0 else batch_size
+        for idx in range(n_games, min(n_games + size, max_games)):
+            side = idx % 2
+            players = [opponent, opponent]
+            players[side] = config
+            result = play_game(*players, rule, "{}-{}".format(seed, idx))
+            wins += result.value(side)
+        n_games = min(n_games + size, max_games)
+
+        estimate = WinRateEstimate(wins, n_games, look)
+        low, high = estimate.ci
+        if precision is not None and (high - low) / 2 <= precision:
+            reason = "precision"
+        elif threshold is not None and not low <= threshold <= high:
+            reason = "decided"
+        elif n_games >= max_games:
+            reason = "max_games"
+        else:
+            continue
+        return SequentialResult(
+            WinRateEstimate(wins, n_games, confidence), reason
+        )
+
+
+def sequential_compare(config_a, config_b, opponent, rule, precision=None,
+                       confidence=0.95, batch_size=50, min_games=200,
+                       max_games=10000, seed=0, metric="win",
+                       antithetic=False, control_variate=False):
+    """
+    paired comparison (see comparison.PairedComparison) run in batches
+    until the sign of the difference is settled, or its interval
+    gets narrower than 'precision'; game counts are per configuration
+    """
+    _validate_caps(batch_size, min_games, max_games)
+    comparison = PairedComparison(
+        config_a, config_b, opponent, rule, seed,
+        metric, antithetic, control_variate,
+    )
+    per_unit = comparison.games_per_unit
+    look = look_confidence(confidence, batch_size, min_games, max_games)
+    max_units = max(2, max_games // per_unit)
+    samples = []
+    while True:
+        size = min_games if len(samples) == 0 else batch_size
+        n_units = min(len(samples) + max(1, size // per_unit), max_units)
+        samples.extend(
+            comparison.sample(idx) for idx in range(len(samples), n_units)
+        )
+
+        estimate = comparison.estimate(samples, look)
+        low, high = estimate.ci
+        if precision is not None and (high - low) / 2 <= precision:
+            reason = "precision"
+        elif low > 0 or high < 0:
+            reason = "decided"
+        elif len(samples) >= max_units:
+            reason = "max_games"
+        else:
+            continue
+        return SequentialResult(
+            comparison.estimate(samples, confidence), reason
+        )
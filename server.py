@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+from . game import Game
+from . simulation import prepare_player, fresh_seed, GameResult
+
+
+# ****************
+# * Async Agents *
+# ****************
+class AsyncAgent:
+    """
+    decision maker awaited by the GameServer
+    """
+    async def decide(self, decision):
+        """
+        return an answer among decision.options()
+        """
+        raise NotImplementedError()
+
+
+class SyncAgentAdapter(AsyncAgent):
+    """
+    AsyncAgent answering with a (synchronous) Agent,
+    by default the agent of the deciding player
+    """
+    def __init__(self, agent=None):
+        self.agent = agent
+
+    async def decide(self, decision):
+        return decision.ask(self.agent)
+
+
+# *******************
+# * Local Transport *
+# *******************
+class LocalTransport:
+    """
+    in-process transport between the server and a remote agent loop;
+    stands in for a network connection in tests
+    """
+    def __init__(self):
+        self.requests = asyncio.Queue()
+
+    async def request(self, decision):
+        future = asyncio.get_running_loop().create_future()
+        await self.requests.put((decision, future))
+        return await future
+
+    async def serve(self, agent):
+        """
+        client side: answer requests with 'agent' (an AsyncAgent) forever
+        """
+        while True:
+            decision, future = await self.requests.get()
+            if future.done(): # cancelled by a timeout
+                continue
+            try:
+                answer = await agent.decide(decision)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            if not future.done():
+                future.set_result(answer)
+
+
+class RemoteAgent(AsyncAgent):
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def decide(self, decision):
+        return await self.transport.request(decision)
+
+
+# **********
+# * Server *
+# **********
+class MatchStats:
+    def __init__(self):
+        self.decisions = 0
+        self.timeouts = 0
+        self.invalid = 0
+
+
+class GameServer:
+    """
+    host of many concurrent games in one event loop.
+    Each game is suspended at its decision points while the agent
+    of the deciding side is awaited; on timeout, error or illegal
+    answer, the built-in agent of the player decides instead.
+    """
+    def __init__(self, decision_timeout=5.0):
+        self.decision_timeout = decision_timeout
+        self.matches = {} # match id -> asyncio.Task
+        self.stats = {} # match id -> MatchStats
+        self.seeds = {} # match id -> seed
+        self._ids = itertools.count()
+
+    async def host(self, game, agents, stats=None):
+        """
+        run 'game' to the end; agents[side] answers the decisions of
+        game.players[side]
+        """
+        stats = MatchStats() if stats is None else stats
+        steps = game.play()
+        answer = None
+        while True:
+            try:
+                decision = steps.send(answer)
+            except StopIteration:
+                break
+            stats.decisions += 1
+            answer = await self._decide(agents[decision.side], decision, stats)
+        return GameResult(None, game.score_board.total_score, game.inning)
+
+    async def _decide(self, agent, decision, stats):
+        try:
+            answer = await asyncio.wait_for(
+                agent.decide(decision), self.decision_timeout
+            )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            return decision.ask()
+        except Exception:
+            stats.invalid += 1
+            return decision.ask()
+        if answer not in decision.options():
+            stats.invalid += 1
+            return decision.ask()
+        return answer
+
+    async def run_match(self, visitor, home, rule, agents, seed=None,
+                        stats=None):
+        """
+        play fresh copies of the GamePlayer configurations;
+        a fresh seed is drawn when 'seed' is None
+        """
+        if seed is None:
+            seed = fresh_seed()
+        game = Game(
+            prepare_player(visitor, seed, 0), prepare_player(home, seed, 1),
+            rule,
+        )
+        result = await self.host(game, agents, stats)
+        result.seed = seed
+        return result
+
+    def start_match(self, visitor, home, rule, agents, seed=None):
+        """
+        schedule a match in the running loop and return its id;
+        the seed (drawn when None) is kept in seeds[match id]
+        """
+        match_id = next(self._ids)
+        if seed is None:
+            seed = fresh_seed()
+        self.seeds[match_id] = seed
+        self.stats[match_id] = MatchStats()
+        task = asyncio.get_running_loop().create_task(
+            self.run_match(
+                visitor, home, rule, agents, seed, self.stats[match_id]
+            )
+        )
+        task.add_done_callback(lambda _: self.matches.pop(match_id, None))
+        self.matches[match_id] = task
+        return match_id
+
+    async def wait_all(self):
+        while self.matches:
+            await asyncio.gather(*list(self.matches.values()))
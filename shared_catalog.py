@@ -0,0 +1,91 @@
+import pickle
+import struct
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from . simulation import play_game
+
+
+HEADER = struct.Struct("<Q") # payload length
+
+
+# *****************
+# * SharedCatalog *
+# *****************
+class SharedCatalog:
+    """
+    teams (GamePlayer configurations) and Rules serialized once into
+    a shared memory block; pool workers load them once at start-up,
+    so that tasks carry only (visitor, home, rule, seed) with integer ids
+    """
+    def __init__(self, teams, rules):
+        self.teams = list(teams)
+        self.rules = list(rules)
+        payload = pickle.dumps(
+            (self.teams, self.rules), protocol=pickle.HIGHEST_PROTOCOL
+        )
+        self.shm = SharedMemory(create=True, size=HEADER.size + len(payload))
+        HEADER.pack_into(self.shm.buf, 0, len(payload))
+        self.shm.buf[HEADER.size:HEADER.size + len(payload)] = payload
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def pool(self, processes=None):
+        return Pool(processes, initializer=attach, initargs=(self.name,))
+
+    def close(self):
+        """
+        release the block; call once every pool using it is closed
+        """
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ***********
+# * Workers *
+# ***********
+_teams = None
+_rules = None
+
+
+def attach(name):
+    """
+    pool initializer: load the catalog of the block 'name'
+    """
+    global _teams, _rules
+    # workers share the resource tracker of the creating process,
+    # so attaching does not take over the ownership of the block
+    shm = SharedMemory(name=name)
+    try:
+        size, = HEADER.unpack_from(shm.buf, 0)
+        _teams, _rules = pickle.loads(shm.buf[HEADER.size:HEADER.size + size])
+    finally:
+        shm.close()
+
+
+def _play_ids(task):
+    visitor, home, rule, seed = task
+    return play_game(_teams[visitor], _teams[home], _rules[rule], seed)
+
+
+def play_games_shared(catalog, tasks, pool=None, processes=None,
+                      chunksize=8):
+    """
+    tasks: iterable of (visitor id, home id, rule id, seed), ids being
+    indices in catalog.teams and catalog.rules; 'pool' must come
+    from catalog.pool()
+    """
+    tasks = list(tasks)
+    if pool is not None:
+        return pool.map(_play_ids, tasks, chunksize)
+    with catalog.pool(processes) as pool:
+        return pool.map(_play_ids, tasks, chunksize)
@@ -0,0 +1,127 @@
+import random
+import secrets
+from copy import deepcopy
+from . game import Game
+
+
+# ******************
+# * Random Streams *
+# ******************
+class AntitheticRandom(random.Random):
+    """
+    mirror image of random.Random seeded alike:
+    u -> 1 - u for floats and k -> n - 1 - k for indices
+    """
+    def random(self):
+        return 1.0 - super().random()
+
+    def _randbelow(self, n):
+        # shuffle(), choice() and randrange() all draw through _randbelow
+        return n - 1 - self._randbelow_with_getrandbits(n)
+
+
+def stream_rng(seed, stream, antithetic=False):
+    """
+    independent random stream per (seed, stream) so that
+    every source of randomness stays aligned across configurations
+    """
+    cls = AntitheticRandom if antithetic else random.Random
+    return cls("{}:{}".format(seed, stream))
+
+
+def fresh_seed():
+    """
+    seed of a match started without one; keep it with the match,
+    it is the only way to replay the game
+    """
+    return secrets.randbits(63)
+
+
+# ****************
+# * Seeded Games *
+# ****************
+class GameResult:
+    def __init__(self, seed, score, inning):
+        self.seed = seed
+        self.score = score # [visitor, home]
+        self.inning = inning
+
+    def __repr__(self):
+        return "GameResult(seed={!r}, score={}, inning={})".format(
+            self.seed, self.score, self.inning
+        )
+
+    @property
+    def winning_team(self):
+        if self.score[0] == self.score[1]:
+            return None
+        return int(self.score[1] > self.score[0])
+
+    def value(self, side, metric="win"):
+        """
+        outcome from the viewpoint of 'side' (0: visitor, 1: home)
+          win: 1 for a win, 0.5 for a draw, 0 for a loss
+          runs: run differential
+        """
+        if metric == "win":
+            if self.winning_team is None:
+                return 0.5
+            return float(self.winning_team == side)
+        elif metric == "runs":
+            return self.score[side] - self.score[not side]
+        else:
+            raise ValueError("unknown metric: {}".format(metric))
+
+
+def prepare_player(config, seed, side, antithetic=False):
+    """
+    fresh copy of a GamePlayer configuration
+    whose deck and agent draw from the streams of 'seed'
+    """
+    player = deepcopy(config)
+    name = ("visitor", "home")[side]
+    player.deck_master.reset(
+        stream_rng(seed, name + "-deck", antithetic)
+    )
+    player.agent.reseed(stream_rng(seed, name + "-agent", antithetic))
+    return player
+
+
+def play_game(visitor, home, rule, seed, antithetic=False, observers=()):
+    game = Game(
+        prepare_player(visitor, seed, 0, antithetic),
+        prepare_player(home, seed, 1, antithetic),
+        rule,
+    )
+    for observer in observers:
+        game.add_observer(observer)
+    game.playball()
+    return GameResult(seed, game.score_board.total_score, game.inning)
+
+
+def run_games(visitor, home, rule, seeds):
+    for seed in seeds:
+        yield play_game(visitor, home, rule, seed)
+
+
+# *******************
+# * Parallel Engine *
+# *******************
+def _play_task(task):
+    return play_game(*task)
+
+
+def play_games_parallel(tasks, pool=None, processes=None, chunksize=8):
+    """
+    tasks: iterable of (visitor, home, rule, seed)
+    use 'pool' when given, otherwise a temporary pool of 'processes';
+    processes=1 runs in this process
+    """
+    from multiprocessing import Pool
+    tasks = list(tasks)
+    if pool is not None:
+        return pool.map(_play_task, tasks, chunksize)
+    if processes == 1:
+        return [_play_task(task) for task in tasks]
+    with Pool(processes) as pool:
+        return pool.map(_play_task, tasks, chunksize)
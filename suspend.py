@@ -0,0 +1,335 @@
+"""
+suspend / resume of idle matches.
+
+A running Game is a generator and cannot be pickled, but it is
+determined by the team and rule configurations, the seed and the
+answers of its human sides: the built-in agents draw from seeded
+streams. Between phases the Game itself is plain data, so a match
+keeps a keyframe, the pickled Game as its last half inning began,
+and resuming loads it and replays only the answers given since.
+A parked match is a blob of
+    header: version, trail width, human sides, seed kind,
+            visitor / home / rule ids of the catalog, trail length,
+            catalog fingerprint, answers before the keyframe,
+            keyframe size (0 before the first half inning)
+    seed: int64 or length-prefixed UTF-8
+    keyframe: zlib-compressed pickle of the Game
+    trail: option index of each human answer (uint8 or uint16)
+all little-endian, i.e. about 16 kB, mostly the states of the random
+streams. Blobs are trusted data of the store: the keyframe is a pickle.
+Resuming against another catalog than the match was parked with
+raises ValueError; version 1 blobs had no fingerprint nor keyframe
+and replay the whole trail.
+"""
+import hashlib
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from . game import Game, Observer, StartTopBottomInningPhase
+from . simulation import prepare_player, fresh_seed, GameResult
+
+
+VERSION = 2
+HEADER = struct.Struct("<BBBBIIHIQII")
+HEADER_V1 = struct.Struct("<BBBBIIHI")
+SEED_INT = struct.Struct("<q")
+SEED_STR = struct.Struct("<H")
+NO_SEED, INT_SEED, STR_SEED = range(3)
+
+
+def catalog_fingerprint(catalog, visitor, home, rule):
+    """
+    64-bit digest of the teams and the rule of a match
+    """
+    parts = [_describe_team(catalog.teams[idx]) for idx in (visitor, home)]
+    parts.append(catalog.rules[rule].key)
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _describe_team(config):
+    df = config.team_status.df_status
+    return (
+        [_describe_card(card) for card in config.deck_master.deck.deck_list],
+        [
+            (_describe_card(card), order, position, is_penalty)
+            for card, order, position, is_penalty
+            in zip(df.card, df.order, df.position, df.is_penalty)
+        ],
+        type(config.agent).__name__,
+    )
+
+
+def _describe_card(card):
+    return type(card).__name__, sorted(
+        (name, _canonical(value)) for name, value in vars(card).items()
+    )
+
+
+def _canonical(value):
+    # set order follows the hashes of str, which change between processes
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(item) for item in value)
+    return value
+
+
+class _KeyframeRecorder(Observer):
+    """
+    pickles the Game of 'match' as each half inning begins,
+    together with the number of human answers given so far
+    """
+    def __init__(self, match):
+        self.match = match
+
+    def on_phase(self, game, phase):
+        if phase is not StartTopBottomInningPhase:
+            return
+        observers, game.observers = game.observers, []
+        try:
+            data = pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+        finally:
+            game.observers = observers
+        self.match.keyframe = (len(self.match.trail), data)
+
+
+# *************
+# * LiveMatch *
+# *************
+class LiveMatch:
+    """
+    a Game of catalog.teams[visitor] and catalog.teams[home] under
+    catalog.rules[rule] (catalog: any object with 'teams' and 'rules'
+    sequences, e.g. a SharedCatalog), paused at the decisions of
+    'human_sides'; the built-in agents answer the other decisions.
+    A fresh seed is drawn when 'seed' is None.
+    Observers added to the game are not kept by to_bytes().
+    """
+    def __init__(self, catalog, visitor, home, rule, seed=None,
+                 human_sides=(0,), trail=()):
+        if seed is None:
+            seed = fresh_seed()
+        self._setup(catalog, visitor, home, rule, seed, human_sides)
+        game = Game(
+            prepare_player(catalog.teams[visitor], seed, 0),
+            prepare_player(catalog.teams[home], seed, 1),
+            catalog.rules[rule],
+        )
+        self._start(game, None, array("H"))
+        for index in trail:
+            self.answer_index(index)
+
+    def _setup(self, catalog, visitor, home, rule, seed, human_sides):
+        self.ids = (visitor, home, rule)
+        self.seed = seed
+        self.human_sides = frozenset(human_sides)
+        self.fingerprint = catalog_fingerprint(catalog, visitor, home, rule)
+
+    def _start(self, game, phase, trail):
+        """
+        run 'game' from the beginning of 'phase' with the human
+        answers 'trail' given so far, up to the next human decision
+        """
+        self.game = game
+        self.trail = trail
+        self.keyframe = None # (answers given before, pickled Game)
+        self.decision = None
+        game.add_observer(_KeyframeRecorder(self))
+        self._steps = game.play(phase)
+        self._advance(None)
+
+    def _advance(self, answer):
+        """
+        send 'answer' and run up to the next human decision
+        """
+        try:
+            decision = self._steps.send(answer)
+            while decision.side not in self.human_sides:
+                decision = self._steps.send(decision.ask())
+        except StopIteration:
+            decision = None
+        self.decision = decision
+
+    @property
+    def is_over(self):
+        return self.decision is None
+
+    @property
+    def result(self):
+        return GameResult(
+            self.seed, self.game.score_board.total_score, self.game.inning
+        ) if self.is_over else None
+
+    def answer(self, answer):
+        """
+        answer the pending decision; ValueError for an illegal answer
+        """
+        self.answer_index(self.decision.options().index(answer))
+
+    def answer_index(self, index):
+        options = self.decision.options()
+        if not 0 <= index < len(options):
+            raise ValueError("no option {} of {}".format(index, self.decision))
+        self.trail.append(index)
+        self._advance(options[index])
+
+    # --- blob ---
+    def to_bytes(self):
+        width = 1 if all(index < 256 for index in self.trail) else 2
+        if self.seed is None:
+            kind, seed = NO_SEED, b""
+        elif isinstance(self.seed, int):
+            kind, seed = INT_SEED, SEED_INT.pack(self.seed)
+        else:
+            text = str(self.seed).encode()
+            kind, seed = STR_SEED, SEED_STR.pack(len(text)) + text
+        sides = sum(1 << side for side in self.human_sides)
+        if self.keyframe is None:
+            position, keyframe = 0, b""
+        else:
+            position, keyframe = self.keyframe
+            keyframe = zlib.compress(keyframe)
+        header = HEADER.pack(
+            VERSION, width, sides, kind, *self.ids, len(self.trail),
+            self.fingerprint, position, len(keyframe),
+        )
+        # keep the trail 2-byte aligned
+        padding = b"\0" * ((len(seed) + len(keyframe)) % 2)
+        trail = array("B" if width == 1 else "H", self.trail)
+        if width == 2 and sys.byteorder == "big":
+            trail.byteswap()
+        return header + seed + keyframe + padding + trail.tobytes()
+
+    @classmethod
+    def from_bytes(cls, catalog, data):
+        """
+        resume a match from its keyframe, replaying the answers given
+        since; the trail is read in place from 'data' (copied on
+        big-endian hosts). ValueError when the teams or the rule
+        of 'catalog' differ from those the match was parked with
+        """
+        view = memoryview(data)
+        version = view[0]
+        if version == 1:
+            version, width, sides, kind, visitor, home, rule, n = \
+                HEADER_V1.unpack_from(view, 0)
+            fingerprint, position, n_keyframe = None, 0, 0
+            offset = HEADER_V1.size
+        elif version == VERSION:
+            (
+                version, width, sides, kind, visitor, home, rule, n,
+                fingerprint, position, n_keyframe,
+            ) = HEADER.unpack_from(view, 0)
+            offset = HEADER.size
+        else:
+            raise ValueError("unsupported blob version {}".format(version))
+        if fingerprint is not None \
+           and fingerprint != catalog_fingerprint(catalog, visitor, home, rule):
+            raise ValueError("the catalog changed since the match was parked")
+        if kind == INT_SEED:
+            seed, = SEED_INT.unpack_from(view, offset)
+            offset += SEED_INT.size
+        elif kind == STR_SEED:
+            length, = SEED_STR.unpack_from(view, offset)
+            offset += SEED_STR.size
+            seed = bytes(view[offset:offset + length]).decode()
+            offset += length
+        else:
+            # unseeded matches used to play the streams of seed None
+            seed = str(None)
+        keyframe = view[offset:offset + n_keyframe]
+        offset += n_keyframe
+        offset += offset % 2
+        trail = view[offset:offset + n * width].cast("B" if width == 1 else "H")
+        if width == 2 and sys.byteorder == "big":
+            trail = array("H", trail)
+            trail.byteswap()
+        human_sides = [side for side in (0, 1) if sides >> side & 1]
+        if n_keyframe == 0:
+            match = cls(catalog, visitor, home, rule, seed, human_sides, trail)
+        else:
+            match = cls.__new__(cls)
+            match._setup(catalog, visitor, home, rule, seed, human_sides)
+            game = pickle.loads(zlib.decompress(keyframe))
+            match._start(
+                game, StartTopBottomInningPhase, array("H", trail[:position])
+            )
+            for index in trail[position:]:
+                match.answer_index(index)
+        return match
+
+
+# *************
+# * GameStore *
+# *************
+class GameStore:
+    """
+    matches by id: the 'max_hot' most recently used are kept live,
+    the others are parked as blobs and resumed on access
+    """
+    def __init__(self, catalog, max_hot=1000):
+        self.catalog = catalog
+        self.max_hot = max_hot
+        self.hot = OrderedDict() # match id -> LiveMatch, oldest first
+        self.parked = {} # match id -> bytes
+        self.n_suspended = 0
+        self.n_resumed = 0
+
+    def start(self, match_id, visitor, home, rule, seed=None,
+              human_sides=(0,)):
+        if match_id in self:
+            raise KeyError("match {!r} exists".format(match_id))
+        match = LiveMatch(
+            self.catalog, visitor, home, rule, seed, human_sides
+        )
+        self._hold(match_id, match)
+        return match
+
+    def get(self, match_id):
+        """
+        the live match, resumed if parked
+        """
+        match = self.hot.get(match_id)
+        if match is not None:
+            self.hot.move_to_end(match_id)
+            return match
+        match = LiveMatch.from_bytes(self.catalog, self.parked.pop(match_id))
+        self.n_resumed += 1
+        self._hold(match_id, match)
+        return match
+
+    def answer(self, match_id, answer):
+        """
+        answer the pending decision of a match; its next decision,
+        None when the game is over
+        """
+        match = self.get(match_id)
+        match.answer(answer)
+        return match.decision
+
+    def suspend(self, match_id):
+        match = self.hot.pop(match_id, None)
+        if match is not None:
+            self.parked[match_id] = match.to_bytes()
+            self.n_suspended += 1
+
+    def discard(self, match_id):
+        self.hot.pop(match_id, None)
+        self.parked.pop(match_id, None)
+
+    def _hold(self, match_id, match):
+        self.hot[match_id] = match
+        while len(self.hot) > self.max_hot:
+            self.suspend(next(iter(self.hot)))
+
+    @property
+    def parked_bytes(self):
+        return sum(len(blob) for blob in self.parked.values())
+
+    def __contains__(self, match_id):
+        return match_id in self.hot or match_id in self.parked
+
+    def __len__(self):
+        return len(self.hot) + len(self.parked)
@@ -0,0 +1,307 @@
+import copy
+import numpy as np
+import pandas as pd
+from . card import Course, MeetShotPts
+from . expected_runs import MatchupModel
+from . fast_sim import HalfInningTable, FastSimulator
+from . simulation import play_games_parallel
+
+
+METRICS = ("win_rate", "runs_scored", "runs_allowed")
+
+
+# ****************
+# * Perturbation *
+# ****************
+class Perturbation:
+    """
+    change of the PlayerCard 'card_id': power shifted by 'power' and
+    the meet/shot points of 'ms_pts' ({Course: Point}) replaced
+    """
+    def __init__(self, card_id, power=0, ms_pts=None):
+        self.card_id = card_id
+        self.power = power
+        self.ms_pts = {} if ms_pts is None else dict(ms_pts)
+
+    @property
+    def label(self):
+        changes = []
+        if self.power != 0:
+            changes.append("power{:+d}".format(self.power))
+        changes += [
+            "{}={}".format(course.name, point.name)
+            for course, point in self.ms_pts.items()
+        ]
+        return "{}:{}".format(self.card_id, ",".join(changes) or "none")
+
+    def apply(self, card):
+        """
+        perturbed copy of 'card', or 'card' itself for another card id
+        """
+        if card.id != self.card_id:
+            return card
+        new = copy.copy(card)
+        ms_pts = MeetShotPts()
+        ms_pts.update(card.ms_pts)
+        ms_pts.update(self.ms_pts)
+        new._ms_pts = ms_pts
+        new._power = card.power + self.power
+        new._draw = card.draw
+        new.refresh()
+        return new
+
+
+def perturbed(player, perturbation):
+    """
+    copy of the GamePlayer 'player' whose lineup and bench
+    have 'perturbation' applied
+    """
+    player = copy.deepcopy(player)
+    status = player.team_status
+    status.df_status["card"] = [
+        perturbation.apply(card) for card in status.df_status.card
+    ]
+    status.update_penalty()
+    return player
+
+
+def grid(card_ids, powers=(-1, 1), points=()):
+    """
+    one-at-a-time grid: for each card, a Perturbation per power delta
+    and per (Course, Point) of 'points'
+    """
+    perturbations = []
+    for card_id in card_ids:
+        perturbations += [Perturbation(card_id, power=d) for d in powers]
+        perturbations += [
+            Perturbation(card_id, ms_pts={course: point})
+            for course, point in points
+        ]
+    return perturbations
+
+
+def card_key(card):
+    """
+    the stats of a card the at-bat model depends on
+    """
+    return (card.power, tuple(card.ms_pts[course] for course in Course))
+
+
+def team_values(results, side):
+    """
+    {metric: per-game values} of the team playing 'side'
+    """
+    return {
+        "win_rate": np.array([result.value(side) for result in results]),
+        "runs_scored": np.array([result.score[side] for result in results]),
+        "runs_allowed": np.array(
+            [result.score[1 - side] for result in results]
+        ),
+    }
+
+
+# *************
+# * StatSweep *
+# *************
+class StatSweep:
+    """
+    effect of card-stat perturbations on 'team' against each opponent,
+    all variants played with the FastSimulator on the same seeds
+    (common random numbers). At-bat distributions and HalfInningTables
+    are cached by the stats of the cards involved, so a variant only
+    recomputes the matchups of the perturbed card.
+    The FastSimulator is biased, so the variants it ranks first are
+    played again on the engine before they are reported.
+    """
+    def __init__(self, team, opponents, rule, n_games=10000, seed=0,
+                 **table_kwargs):
+        self.players = [team] + list(opponents)
+        self.rule = rule
+        self.seed = seed
+        self.seeds = ["{}-{}".format(seed, n) for n in range(n_games)]
+        self.table_kwargs = table_kwargs
+        self._models = {}
+        self._distributions = {}
+        self._tables = {}
+        self._games = {}
+        self._engine_games = {}
+
+    # --- cached models ---
+    def _model(self, offense, defense):
+        key = (offense, defense)
+        if key not in self._models:
+            self._models[key] = MatchupModel(
+                self.players[offense].deck_master.deck.deck_list,
+                self.players[defense].deck_master.deck.deck_list,
+            )
+        return self._models[key]
+
+    def _distribution(self, offense, defense, batter, pitcher):
+        key = (offense, defense, card_key(batter), card_key(pitcher))
+        if key not in self._distributions:
+            self._distributions[key] = self._model(
+                offense, defense
+            ).result_distribution(batter, pitcher)
+        return self._distributions[key]
+
+    def _lineup(self, player, perturbation):
+        """
+        (batters, pitcher) of a player with 'perturbation' applied
+        """
+        player = self.players[player]
+        apply = (lambda card: card) if perturbation is None \
+            else perturbation.apply
+        return (
+            [apply(player.nth_batter(n)) for n in range(9)],
+            apply(player.pitcher),
+        )
+
+    def _half_inning(self, offense, defense, lineups):
+        """
+        (table key, HalfInningTable, at-bat distributions)
+        """
+        batters, _ = lineups[offense]
+        _, pitcher = lineups[defense]
+        key = (
+            offense, defense,
+            tuple(card_key(batter) for batter in batters), card_key(pitcher),
+        )
+        distributions = [
+            self._distribution(offense, defense, batter, pitcher)
+            for batter in batters
+        ]
+        if key not in self._tables:
+            self._tables[key] = HalfInningTable(
+                distributions, **self.table_kwargs
+            )
+        return key, self._tables[key], distributions
+
+    # --- games ---
+    def _play(self, opponent, perturbation):
+        """
+        {metric: per-game values of the team} over both sides
+        """
+        lineups = {
+            player: self._lineup(player, perturbation)
+            for player in (0, opponent)
+        }
+        values = {metric: [] for metric in METRICS}
+        for side in (0, 1):
+            visitor, home = (0, opponent) if side == 0 else (opponent, 0)
+            top = self._half_inning(visitor, home, lineups)
+            bottom = self._half_inning(home, visitor, lineups)
+            key = (top[0], bottom[0])
+            # variants leaving both tables unchanged share the games
+            if key not in self._games:
+                simulator = FastSimulator.from_tables(
+                    [top[1], bottom[1]], bottom[2], self.rule
+                )
+                results = list(simulator.run_games(self.seeds))
+                self._games[key] = team_values(results, side)
+            for metric in METRICS:
+                values[metric].append(self._games[key][metric])
+        return {
+            metric: np.concatenate(value) for metric, value in values.items()
+        }
+
+    def _play_engine(self, opponent, perturbation, n_engine, processes):
+        """
+        {metric: per-game values of the team} of 'n_engine' seeds
+        played on the engine from both sides
+        """
+        key = (opponent, None if perturbation is None else perturbation.label)
+        if key not in self._engine_games:
+            players = [self.players[0], self.players[opponent]]
+            if perturbation is not None:
+                players = [perturbed(p, perturbation) for p in players]
+            seeds = [
+                "{}-engine-{}".format(self.seed, n) for n in range(n_engine)
+            ]
+            tasks = [(*players, self.rule, seed) for seed in seeds]
+            tasks += [(*players[::-1], self.rule, seed) for seed in seeds]
+            results = play_games_parallel(tasks, processes=processes)
+            values = [
+                team_values(results[:n_engine], 0),
+                team_values(results[n_engine:], 1),
+            ]
+            self._engine_games[key] = {
+                metric: np.concatenate([v[metric] for v in values])
+                for metric in METRICS
+            }
+        return self._engine_games[key]
+
+    def confirm(self, df, perturbations, top=3, rank_by="win_rate",
+                n_engine=200, processes=None):
+        """
+        'df' of run() with the columns engine_effect / engine_stderr
+        filled for the 'top' variants per opponent by the effect on
+        the metric 'rank_by' (the lowest for runs_allowed), played
+        on the engine with 'n_engine' seeds from both sides;
+        NaN for the others
+        """
+        df = df.assign(engine_effect=np.nan, engine_stderr=np.nan)
+        if top <= 0:
+            return df
+        sign = -1.0 if rank_by == "runs_allowed" else 1.0
+        for opponent, group in df[df.metric == rank_by].groupby("opponent"):
+            ranked = group.sort_values(
+                "effect", key=lambda effect: -sign * effect, kind="stable"
+            )
+            baseline = self._play_engine(
+                opponent + 1, None, n_engine, processes
+            )
+            for variant in ranked.variant.iloc[:top]:
+                values = self._play_engine(
+                    opponent + 1, perturbations[variant], n_engine, processes
+                )
+                for name in METRICS:
+                    diff = values[name] - baseline[name]
+                    rows = (df.variant == variant) \
+                        & (df.opponent == opponent) & (df.metric == name)
+                    df.loc[rows, "engine_effect"] = float(diff.mean())
+                    df.loc[rows, "engine_stderr"] = float(
+                        diff.std(ddof=1) / np.sqrt(len(diff))
+                    )
+        return df
+
+    def run(self, perturbations, top=3, rank_by="win_rate", n_engine=200,
+            processes=None):
+        """
+        tidy DataFrame, a row per (variant, opponent, metric):
+          baseline / value: mean per game of the team
+          effect: value - baseline, stderr: its paired standard error
+          engine_effect / engine_stderr: the same on the engine,
+            for the 'top' variants only (see confirm); top=0 skips it
+        """
+        perturbations = list(perturbations)
+        rows = []
+        for opponent in range(1, len(self.players)):
+            baseline = self._play(opponent, None)
+            for variant, perturbation in enumerate(perturbations):
+                values = self._play(opponent, perturbation)
+                for metric in METRICS:
+                    diff = values[metric] - baseline[metric]
+                    rows.append(dict(
+                        variant=variant,
+                        label=perturbation.label,
+                        card_id=perturbation.card_id,
+                        opponent=opponent - 1,
+                        metric=metric,
+                        baseline=float(baseline[metric].mean()),
+                        value=float(values[metric].mean()),
+                        effect=float(diff.mean()),
+                        stderr=float(
+                            diff.std(ddof=1) / np.sqrt(len(diff))
+                        ),
+                    ))
+        return self.confirm(
+            pd.DataFrame(rows), perturbations, top, rank_by, n_engine,
+            processes,
+        )
+
+
+def sweep(team, opponents, rule, perturbations, n_games=10000, seed=0,
+          **kwargs):
+    return StatSweep(team, opponents, rule, n_games, seed).run(
+        perturbations, **kwargs
+    )
@@ -0,0 +1,60 @@
+import random
+import pandas as pd
+from .. card import (
+    BatHand, Position, Course, Point, MeetShotPts, PlayerCard, VSCard,
+)
+from .. game import Rule
+from .. game_player import GamePlayer, DeckMaster, Deck, DeckField, TeamStatus
+
+
+LINEUP_POSITIONS = (
+    Position.CATCHER, Position.INFIELDER, Position.INFIELDER,
+    Position.INFIELDER, Position.INFIELDER, Position.OUTFIELDER,
+    Position.OUTFIELDER, Position.OUTFIELDER, Position.DH,
+)
+
+
+def sample_ms_pts(rng):
+    ms_pts = MeetShotPts()
+    for course in Course:
+        ms_pts[course] = rng.choice(
+            [Point.NULL, Point.NULL, Point.FILL, Point.STAR]
+        )
+    return ms_pts
+
+
+def sample_player(seed, base_id=0, deck_size=30):
+    """
+    seeded synthetic GamePlayer: nine batters, a pitcher and
+    a deck of VSCards; card ids start from 'base_id'
+    """
+    rng = random.Random(seed)
+    rows = []
+    for order, position in enumerate(LINEUP_POSITIONS):
+        card = PlayerCard(
+            base_id + order, BatHand.RIGHT, {position},
+            sample_ms_pts(rng), rng.randint(1, 4), 1,
+        )
+        rows.append(dict(
+            card=card, position=position, order=order, is_penalty=False
+        ))
+    pitcher = PlayerCard(
+        base_id + 9, BatHand.RIGHT, {Position.PITCHER},
+        sample_ms_pts(rng), rng.randint(1, 4), 1,
+    )
+    rows.append(dict(
+        card=pitcher, position=Position.PITCHER, order=-1, is_penalty=False
+    ))
+    deck = [
+        VSCard(
+            base_id + 100 + k, rng.choice(list(Course)),
+            rng.randint(0, 2), rng.randint(0, 2),
+        )
+        for k in range(deck_size)
+    ]
+    return GamePlayer(
+        DeckMaster(Deck(deck)), DeckField(), TeamStatus(pd.DataFrame(rows))
+    )
+
+
+SAMPLE_RULE = Rule(9, 12, True)
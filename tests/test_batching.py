@@ -0,0 +1,87 @@
+import asyncio
+import numpy as np
+from .. batching import (
+    StateEncoder, BilinearPolicy, DecisionBatcher, BatchedAgent,
+    choose, play_batched,
+)
+from . conftest import sample_player, SAMPLE_RULE
+from .. game import Game, VSCardDecision
+from .. server import GameServer, SyncAgentAdapter
+from .. simulation import prepare_player
+
+
+def make_games(n):
+    visitor, home = sample_player(1, 0), sample_player(2, 1000)
+    return [
+        Game(
+            prepare_player(visitor, seed, 0), prepare_player(home, seed, 1),
+            SAMPLE_RULE,
+        )
+        for seed in range(n)
+    ]
+
+
+def first_vs_decisions(games):
+    decisions = []
+    for game in games:
+        steps = game.play()
+        decision = next(steps)
+        while not isinstance(decision, VSCardDecision):
+            decision = steps.send(decision.ask())
+        decisions.append(decision)
+    return decisions
+
+
+def test_choose_skips_masked_options():
+    scores = np.array([[1.0, 5.0, 3.0]])
+    assert list(choose(scores, np.array([[True, False, True]]))) == [2]
+
+
+def test_encode_pads_the_options():
+    encoder = StateEncoder()
+    decisions = first_vs_decisions(make_games(3))
+    states, options, mask = encoder.encode(decisions)
+    assert states.shape == (3, encoder.n_state_features)
+    assert options.shape[::2] == (3, encoder.n_option_features)
+    for row, decision in zip(mask, decisions):
+        assert row.sum() == len(decision.options())
+    assert (options[:, 0, 0] == 1.0).all() # None comes first
+
+
+def test_evaluate_answers_legal_options_in_one_call():
+    batcher = DecisionBatcher(BilinearPolicy.random(StateEncoder(), 0))
+    decisions = first_vs_decisions(make_games(4))
+    answers = batcher.evaluate(decisions)
+    for decision, answer in zip(decisions, answers):
+        assert answer in decision.options()
+    assert (batcher.n_batches, batcher.n_decisions) == (1, 4)
+
+
+def test_play_batched_finishes_every_game():
+    batcher = DecisionBatcher(
+        BilinearPolicy.random(StateEncoder(), 0), max_batch_size=4
+    )
+    games = play_batched(make_games(6), batcher)
+    for game in games:
+        assert game.inning >= 9
+    assert batcher.n_decisions > 2 * batcher.n_batches
+
+
+def test_server_matches_share_batches():
+    visitor, home = sample_player(1, 0), sample_player(2, 1000)
+    batcher = DecisionBatcher(
+        BilinearPolicy.random(StateEncoder(), 0), max_batch_size=8
+    )
+
+    async def main():
+        server = GameServer()
+        for seed in range(4):
+            server.start_match(
+                visitor, home, SAMPLE_RULE,
+                [BatchedAgent(batcher), SyncAgentAdapter()], seed,
+            )
+        await server.wait_all()
+
+    asyncio.run(main())
+    assert batcher.n_decisions > 0
+    assert batcher.n_batches < batcher.n_decisions
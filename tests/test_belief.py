@@ -0,0 +1,82 @@
+from collections import Counter
+import numpy as np
+import pytest
+from .. belief import BeliefTracker, card_kind
+from . conftest import sample_player, SAMPLE_RULE
+from .. game import Game, Observer
+from .. simulation import prepare_player
+
+
+def hidden_kinds(player):
+    """
+    kinds of the cards the other side cannot see
+    """
+    cards = list(player.deck_master.deck) + list(player.deck_master.hand)
+    field = player.deck_field
+    for zone in (field.vs_zone, field.sp_combo_zone, field.tactics_zone):
+        cards += [card for card, is_open in zone if not is_open]
+    return Counter(card_kind(card) for card in cards)
+
+
+class Checker(Observer):
+    """
+    compares the trackers with the true hidden cards at every step
+    """
+    def __init__(self, game):
+        self.trackers = [BeliefTracker.attach(game, side) for side in (0, 1)]
+        self.n_checks = 0
+        self.n_opened = 0
+        game.add_observer(self)
+
+    def check(self, game):
+        for tracker, player in zip(self.trackers, game.players):
+            unseen = Counter({
+                kind: n for kind, n in zip(tracker.kinds, tracker.unseen)
+                if n
+            })
+            assert unseen == hidden_kinds(player)
+            assert tracker.n_hand == len(player.deck_master.hand)
+            assert tracker.n_deck == len(player.deck_master.deck)
+            assert tracker.n_unseen == sum(tracker.unseen)
+            assert min(tracker.unseen) >= 0
+            self.n_opened += len(tracker.face_up.get("vs", []))
+        self.n_checks += 1
+
+    def on_phase(self, game, phase):
+        self.check(game)
+
+    def on_action(self, game, action):
+        self.check(game)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_tracker_matches_the_hidden_cards(seed):
+    game = Game(
+        prepare_player(sample_player(1, 0), seed, 0),
+        prepare_player(sample_player(2, 1000), seed, 1),
+        SAMPLE_RULE,
+    )
+    checker = Checker(game)
+    game.playball()
+    assert checker.n_checks > 100
+    # opened v.s. cards were moved out of the unseen counts
+    assert checker.n_opened > 0
+
+
+def test_beliefs_are_consistent():
+    deck = sample_player(1, 0).deck_master.deck.deck_list
+    tracker = BeliefTracker(deck)
+    tracker.n_deck -= 5
+    tracker.n_hand += 5
+    expected = tracker.expected_hand()
+    assert expected.sum() == pytest.approx(5)
+    for kind, e in zip(tracker.kinds, expected):
+        p = tracker.prob_in_hand(kind)
+        assert 0 <= p <= 1
+        # P(at least one) <= E[count] and equals it for single copies
+        assert p <= e + 1e-12
+    samples = tracker.sample_counts(2000, rng=0)
+    assert (samples.sum(axis=1) == 5).all()
+    assert np.allclose(samples.mean(axis=0), expected, atol=0.05)
+    hand, face_down, rest = tracker.determinize(rng=0)
+    assert len(hand) == 5 and face_down == {} and len(rest) == len(deck) - 5
@@ -0,0 +1,43 @@
+import os
+import pytest
+from .. benchmark import (
+    BENCHMARKS, compare, load, run_benchmark, gauge_check,
+)
+
+
+def results(calibration, **best):
+    return {
+        "calibration": calibration,
+        "results": {name: {"best": value} for name, value in best.items()},
+    }
+
+
+def test_compare_is_relative_to_the_calibration():
+    baseline = results(1.0, a=1.0, b=2.0)
+    # a machine 3.5 times slower on everything
+    ratios, regressions = compare(results(3.5, a=3.5, b=7.0), baseline)
+    assert ratios == pytest.approx({"a": 1.0, "b": 1.0})
+    assert regressions == []
+    ratios, regressions = compare(results(3.5, a=3.5, b=14.0), baseline)
+    assert ratios["b"] == pytest.approx(2.0)
+    assert regressions == ["b"]
+
+
+def test_compare_needs_a_calibrated_baseline():
+    with pytest.raises(ValueError):
+        compare(results(1.0, a=1.0), {"results": {"a": {"best": 1.0}}})
+
+
+def test_shipped_baseline_covers_every_benchmark():
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "benchmark_baseline.json"
+    )
+    baseline = load(path)
+    assert baseline["calibration"] > 0
+    assert set(baseline["results"]) == set(BENCHMARKS)
+
+
+def test_run_benchmark_reports_time_per_operation():
+    result = run_benchmark(lambda: gauge_check(100), repeat=2)
+    assert result["n_ops"] == 100
+    assert 0 < result["best"] <= result["median"]
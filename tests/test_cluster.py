@@ -0,0 +1,103 @@
+import threading
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. cluster import (
+    Campaign, Coordinator, Summary, run_worker, parse_address,
+)
+from .. import prime_nine
+
+AUTHKEY = b"test-secret"
+
+
+class ScoreList:
+    """
+    accumulator without n_games: the scores by seed number
+    """
+    def __init__(self):
+        self.scores = []
+
+    def add(self, result):
+        self.scores.append((result.seed, tuple(result.score)))
+
+    def merge(self, other):
+        self.scores.extend(other.scores)
+        return self
+
+
+def campaign(accumulator=Summary):
+    return Campaign(
+        sample_player(1, 0), sample_player(2, 1000), SAMPLE_RULE,
+        seed="c", accumulator=accumulator,
+    )
+
+
+def run_campaign(campaign, n_games, n_workers=2, **kwargs):
+    coordinator = Coordinator(
+        campaign, n_games, AUTHKEY, batch_size=6, chunk_size=2, **kwargs
+    )
+    played = [0] * n_workers
+
+    def work(n):
+        played[n] = run_worker(
+            coordinator.address, AUTHKEY, heartbeat_interval=0.2
+        )
+
+    workers = [
+        threading.Thread(target=work, args=(n,)) for n in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    result = coordinator.run(timeout=60)
+    for worker in workers:
+        worker.join(timeout=10)
+    return coordinator, result, played
+
+
+def test_custom_accumulator_gets_every_game_once():
+    coordinator, result, played = run_campaign(campaign(ScoreList), 14)
+    assert isinstance(result, ScoreList)
+    assert sorted(seed for seed, _ in result.scores) \
+        == sorted("c-{}".format(n) for n in range(14))
+    assert coordinator.n_merged == 14
+    assert sum(coordinator.games_by_worker.values()) == 14
+    assert sum(played) >= 14
+
+
+def test_summary_matches_the_games():
+    _, summary, _ = run_campaign(campaign(), 8)
+    games = [campaign().play(n) for n in range(8)]
+    assert summary.n_games == 8
+    assert summary.runs == [
+        sum(game.score[side] for game in games) for side in (0, 1)
+    ]
+
+
+def test_timeout_reports_merged_games_of_any_accumulator():
+    coordinator = Coordinator(campaign(ScoreList), 4, AUTHKEY)
+    with pytest.raises(TimeoutError, match="0 of 4 games merged"):
+        coordinator.run(timeout=0.1)
+    coordinator.close()
+
+
+def test_authkey_is_required():
+    with pytest.raises(ValueError):
+        Coordinator(campaign(), 4, b"")
+    with pytest.raises(ValueError):
+        run_worker(("127.0.0.1", 1), None)
+
+
+def test_default_address_is_local():
+    coordinator = Coordinator(campaign(), 0, AUTHKEY)
+    assert coordinator.address[0] == "127.0.0.1"
+    coordinator.close()
+
+
+def test_cli_requires_an_authkey(monkeypatch):
+    monkeypatch.delenv(prime_nine.AUTHKEY_ENV, raising=False)
+    with pytest.raises(SystemExit):
+        prime_nine.main(["worker", "127.0.0.1:5999"])
+
+
+def test_parse_address():
+    assert parse_address("host:5999") == ("host", 5999)
+    assert parse_address("/tmp/socket") == "/tmp/socket"
@@ -0,0 +1,68 @@
+import random
+from statistics import NormalDist, fmean, stdev
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. comparison import (
+    PairedComparison, adjust_by_control, control_estimate, compare,
+)
+
+
+def test_adjust_by_control_removes_the_correlated_part():
+    covariates = [(-1) ** k * (1 + 0.1 * k) for k in range(10)]
+    values = [2.0 + 3.0 * c + 0.01 * (-1) ** (k // 2)
+              for k, c in enumerate(covariates)]
+    adjusted = adjust_by_control(values, covariates)
+    assert max(adjusted) - min(adjusted) < 0.1
+    assert fmean(adjusted) == pytest.approx(2.0, abs=0.02)
+
+
+def test_adjust_by_control_without_variance_returns_the_values():
+    assert adjust_by_control([1.0, 2.0], [3.0, 3.0]) == [1.0, 2.0]
+
+
+def test_control_interval_covers_the_mean_at_its_nominal_rate():
+    rng = random.Random(0)
+    z = NormalDist().inv_cdf(0.975)
+    n_reps, n, covered, widths = 1000, 30, 0, []
+    for _ in range(n_reps):
+        covariates = [rng.gauss(0, 1) for _ in range(n)]
+        values = [1.0 + 2.0 * c + rng.gauss(0, 1) for c in covariates]
+        mean, stderr = control_estimate(values, covariates)
+        covered += abs(mean - 1.0) <= z * stderr
+        widths.append(stderr / (stdev(values) / n ** 0.5))
+    assert 0.93 <= covered / n_reps <= 0.97
+    assert fmean(widths) < 0.5 # the control explains 80% of the variance
+
+
+def test_choice_luck_has_mean_zero_and_tracks_the_runs():
+    config, opponent = sample_player(1, 0), sample_player(3, 2000)
+    comparison = PairedComparison(
+        config, config, opponent, SAMPLE_RULE, metric="runs",
+        control_variate=True,
+    )
+    control = comparison.controls[0]
+    pairs = [
+        comparison._play(config, control, "luck-{}".format(n), n % 2, False)
+        for n in range(60)
+    ]
+    runs = [value for value, _ in pairs]
+    luck = [cov for _, cov in pairs]
+    assert abs(fmean(luck)) < 3 * stdev(luck) / len(luck) ** 0.5
+    mean_r, mean_l = fmean(runs), fmean(luck)
+    cov = sum((r - mean_r) * (l - mean_l) for r, l in zip(runs, luck))
+    assert cov / ((len(runs) - 1) * stdev(runs) * stdev(luck)) > 0.5
+
+
+def test_control_variate_narrows_the_interval():
+    config_a, config_b = sample_player(1, 0), sample_player(2, 1000)
+    opponent = sample_player(3, 2000)
+    plain = compare(
+        config_a, config_b, opponent, SAMPLE_RULE, 30, metric="runs"
+    )
+    adjusted = compare(
+        config_a, config_b, opponent, SAMPLE_RULE, 30, metric="runs",
+        control_variate=True,
+    )
+    assert adjusted.n_games == plain.n_games
+    assert adjusted.stderr < plain.stderr
+    assert abs(adjusted.diff - plain.diff) < 3 * plain.stderr
@@ -0,0 +1,107 @@
+import random
+import pytest
+from . conftest import sample_player
+from .. card import VSCard, Course
+from .. import deck_optimizer
+from .. deck_optimizer import (
+    DeckSpace, DeckOptimizer, Objective, ExpectedRunsObjective,
+)
+
+
+def vs_pool(n):
+    courses = list(Course)
+    return [
+        VSCard(100 + k, courses[k % len(courses)], k % 3, (k + 1) % 3)
+        for k in range(n)
+    ]
+
+
+class CountingObjective(Objective):
+    """
+    fitness: sum of pw_off over the deck, counting evaluated configs
+    """
+    def __init__(self):
+        self.n_evaluated = 0
+
+    def evaluate(self, configs, pool=None):
+        self.n_evaluated += len(configs)
+        return [
+            sum(card.pw_off for card in config.deck_master.deck.deck_list)
+            for config in configs
+        ]
+
+
+def test_deck_space_rejects_duplicate_ids():
+    card = vs_pool(1)[0]
+    with pytest.raises(ValueError):
+        DeckSpace([card, card], 1)
+
+
+def test_neighbours_are_valid_single_swaps():
+    space = DeckSpace(vs_pool(5), 3)
+    counts = (1, 1, 1, 0, 0)
+    neighbours = list(space.neighbours(counts))
+    assert len(neighbours) == 3 * 2
+    for new in neighbours:
+        assert space.is_valid(new)
+        assert sum(abs(a - b) for a, b in zip(counts, new)) == 2
+
+
+def test_random_deck_respects_type_limits():
+    space = DeckSpace(vs_pool(6), 4, type_limits={VSCard: (4, 4)})
+    counts = space.random_deck(random.Random(0))
+    assert space.is_valid(counts)
+    assert sum(counts) == 4
+
+
+def test_evaluate_caches_by_canonical_key():
+    objective = CountingObjective()
+    optimizer = DeckOptimizer(
+        DeckSpace(vs_pool(5), 3), sample_player(1), objective, seed=0
+    )
+    first = optimizer.evaluate([(1, 1, 1, 0, 0), (0, 1, 1, 1, 0)])
+    second = optimizer.evaluate([(1, 1, 1, 0, 0)])
+    assert second == first[:1]
+    assert objective.n_evaluated == 2
+
+
+def test_optimize_climbs_to_the_best_deck():
+    pool = vs_pool(6)
+    optimizer = DeckOptimizer(
+        DeckSpace(pool, 3), sample_player(1), CountingObjective(),
+        n_screen=10, processes=1, seed=0,
+    )
+    cards, fitness = optimizer.optimize(max_steps=20)
+    assert fitness == sum(sorted(card.pw_off for card in pool)[-3:])
+    assert len(cards) == 3
+
+
+def test_expected_runs_objective_is_antisymmetric():
+    player_a, player_b = sample_player(1, 0), sample_player(2, 1000)
+    fitness_a = ExpectedRunsObjective([player_b]).evaluate([player_a])[0]
+    fitness_b = ExpectedRunsObjective([player_a]).evaluate([player_b])[0]
+    assert fitness_a == pytest.approx(-fitness_b)
+
+
+def test_key_is_made_of_ids_and_counts():
+    pool = vs_pool(4)
+    space = DeckSpace(pool, 3, max_copies=2)
+    assert space.key((2, 0, 1, 0)) == ((100, 2), (102, 1))
+    assert space.key((0, 1, 1, 1)) != space.key((1, 1, 1, 0))
+
+
+def test_analytic_objective_runs_without_a_pool(monkeypatch):
+    def no_pool(*args):
+        raise AssertionError("no pool expected")
+    monkeypatch.setattr(deck_optimizer, "Pool", no_pool)
+    template, opponent = sample_player(1, 0), sample_player(2, 1000)
+    pool = list(template.deck_master.deck.deck_list[:8])
+    optimizer = DeckOptimizer(
+        DeckSpace(pool, len(pool) - 1), template,
+        ExpectedRunsObjective([opponent]), seed=0,
+    )
+    cards, fitness = optimizer.optimize(max_steps=2)
+    assert len(cards) == len(pool) - 1
+    assert fitness == optimizer.cache[optimizer.space.key(
+        optimizer._initial_counts(cards)
+    )]
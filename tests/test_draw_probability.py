@@ -0,0 +1,85 @@
+from collections import Counter
+from fractions import Fraction
+from itertools import permutations
+from math import comb
+import pytest
+from . conftest import sample_player
+from .. belief import card_kind
+from .. draw_probability import (
+    DrawOdds, hypergeometric, multivariate_hypergeometric,
+)
+
+
+def test_hypergeometric_odds():
+    dist = hypergeometric(52, 4, 5)
+    assert dist[0] == Fraction(comb(48, 5), comb(52, 5))
+    assert dist[4] == Fraction(48, comb(52, 5))
+    assert sum(dist) == 1
+    assert sum(k * p for k, p in enumerate(dist)) == Fraction(5 * 4, 52)
+    assert hypergeometric(3, 3, 2) == (0, 0, 1)
+
+
+def test_multivariate_marginals():
+    dist = multivariate_hypergeometric((3, 2, 4), 4)
+    assert sum(dist.values()) == 1
+    assert all(sum(drawn) == 4 for drawn in dist)
+    for i, n in enumerate((3, 2, 4)):
+        marginal = Counter()
+        for drawn, p in dist.items():
+            marginal[drawn[i]] += p
+        assert tuple(marginal[k] for k in range(5)) \
+            == hypergeometric(9, n, 4)
+
+
+def brute_force(deck, trash, hand, n):
+    """
+    {sorted hand: probability} over every order of the pile and trash
+    """
+    dist = Counter()
+    orders = [(d, t) for d in permutations(deck) for t in permutations(trash)]
+    for d, t in orders:
+        pile = list(d) + list(t) if n > len(deck) else list(d)
+        dist[tuple(sorted(list(hand) + pile[:n]))] += Fraction(1, len(orders))
+    return dist
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4])
+def test_draws_across_a_reshuffle_match_enumeration(n):
+    deck, trash, hand = "aab", "abc", "c"
+    odds = DrawOdds(deck, trash, hand, key=lambda card: card)
+    expected = brute_force(deck, trash, hand, n)
+    joint = {
+        tuple(sorted(c for c, k in zip(odds.categories, counts)
+                     for _ in range(k))): p
+        for counts, p in odds.joint(n).items()
+    }
+    assert joint == {hand: p for hand, p in expected.items() if p}
+    for category in "abc":
+        dist = odds.distribution(category, n, exact=True)
+        for k, p in enumerate(dist):
+            assert p == sum(q for hand, q in expected.items()
+                            if hand.count(category) == k)
+        assert odds.prob_at_least(category, 1, n, exact=True) == 1 - dist[0]
+    assert odds.prob(lambda h: h["a"] >= 1 and h["c"] >= 2, n, exact=True) \
+        == sum(q for hand, q in expected.items()
+               if hand.count("a") >= 1 and hand.count("c") >= 2)
+
+
+def test_cannot_draw_more_than_the_cards():
+    odds = DrawOdds("ab", "c", key=lambda card: card)
+    with pytest.raises(ValueError):
+        odds.distribution("a", 4)
+    assert odds.distribution("z", 2) == [1.0]
+
+
+def test_counts_of_a_deck_master():
+    master = sample_player(1, 0).deck_master
+    master.draw(5)
+    odds = DrawOdds.of(master)
+    assert sum(odds.hand) == 5 and sum(odds.trash) == 0
+    assert sum(odds.deck) == len(master.deck)
+    kind = card_kind(master.hand[0])
+    assert odds.distribution(kind, 0)[odds.hand[
+        odds.categories.index(kind)]] == 1.0
+    fresh = DrawOdds.new_game(master.deck.deck_list)
+    assert sum(fresh.distribution(kind, 5)) == pytest.approx(1)
@@ -0,0 +1,113 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. event_log import (
+    EventLog, EventRecorder, EventCode, ReplayState, record_game,
+    replay, replay_to, describe, initial_decks, ZONES, RESULTS,
+)
+from .. game import Game, AtBatResult, StrikeOut, BallFour
+from .. simulation import prepare_player, play_game
+
+
+def players():
+    return sample_player(1, 0), sample_player(2, 1000)
+
+
+def recorded_game(seed):
+    visitor, home = players()
+    game = Game(
+        prepare_player(visitor, seed, 0), prepare_player(home, seed, 1),
+        SAMPLE_RULE,
+    )
+    recorder = EventRecorder(seed).attach(game)
+    game.playball()
+    return visitor, home, game, recorder.log
+
+
+def ids(cards):
+    return [card.id for card in cards]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_replay_reproduces_the_score_and_the_cards(seed):
+    visitor, home, game, log = recorded_game(seed)
+    state = replay_to(log, visitor, home)
+    assert state.total_score == game.score_board.total_score
+    assert state.inning == game.inning
+    assert state.n_events == len(log)
+    for side, player in enumerate(game.players):
+        assert state.hands[side] == ids(player.deck_master.hand)
+        assert sorted(state.decks[side]) == sorted(ids(player.deck_master.deck))
+        assert sorted(state.trashes[side]) \
+            == sorted(ids(player.deck_master.trash))
+        assert state.zones[side]["vs"] \
+            == [card.id for card, _ in player.deck_field.vs_zone]
+
+
+def test_record_game_matches_play_game():
+    visitor, home = players()
+    result, log = record_game(visitor, home, SAMPLE_RULE, 5)
+    assert result.score == play_game(visitor, home, SAMPLE_RULE, 5).score
+    assert log.seed == 5
+
+
+def test_result_indices_are_fixed():
+    assert set(RESULTS) == set(AtBatResult.__subclasses__())
+    assert RESULTS.index(StrikeOut) == 0
+    assert RESULTS.index(BallFour) == 11
+
+
+def test_antithetic_deal_is_stored_and_replayed():
+    visitor, home = players()
+    _, log = record_game(visitor, home, SAMPLE_RULE, 4, antithetic=True)
+    loaded = EventLog.from_bytes(log.to_bytes())
+    assert loaded.antithetic
+    drawn = [
+        event.b for event in loaded
+        if event.code == EventCode.DRAW and event.side == 0
+    ][:10]
+    assert initial_decks(visitor, home, loaded.seed, True)[0][:10] == drawn
+    assert initial_decks(visitor, home, loaded.seed)[0][:10] != drawn
+    assert not EventLog.from_bytes(
+        record_game(visitor, home, SAMPLE_RULE, 4)[1].to_bytes()
+    ).antithetic
+
+
+def test_bytes_round_trip():
+    _, _, _, log = recorded_game(0)
+    loaded = EventLog.from_bytes(log.to_bytes())
+    assert loaded.seed == "0"
+    assert loaded.data == log.data
+    assert [describe(event) for event in loaded][:3] \
+        == [describe(event) for event in log][:3]
+
+
+def test_from_bytes_rejects_other_data():
+    with pytest.raises(ValueError):
+        EventLog.from_bytes(b"nope" + bytes(8))
+
+
+def test_replay_generator_stops_at_until():
+    visitor, home, _, log = recorded_game(0)
+    states = [state.n_events for state in replay(log, visitor, home, 10)]
+    assert states == list(range(1, 11))
+
+
+def test_every_at_bat_is_recorded_with_its_context():
+    _, _, _, log = recorded_game(0)
+    codes = [event.code for event in log]
+    for n, code in enumerate(codes):
+        if code == EventCode.AT_BAT_RESULT:
+            assert codes[n - 1] == EventCode.AT_BAT_CONTEXT
+
+
+def test_snapshot_round_trip():
+    visitor, home, _, log = recorded_game(0)
+    state = replay_to(log, visitor, home, len(log) // 2)
+    restored = ReplayState.from_snapshot(state.snapshot())
+    assert restored.snapshot() == state.snapshot()
+    for event in list(log)[len(log) // 2:]:
+        state.apply(event)
+        restored.apply(event)
+    assert restored.total_score == state.total_score
+    assert restored.zones == state.zones
+    assert set(restored.zones[0]) == set(ZONES)
@@ -0,0 +1,83 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. expected_runs import InningModel
+from .. fast_sim import (
+    FastSimulator, HalfInningTable, Validation, TOLERANCE,
+    matchup_distributions, validate,
+)
+from .. game import Rule
+
+
+def players():
+    return sample_player(1, 0), sample_player(2, 1000)
+
+
+def summary(engine, fast):
+    return {"engine": engine, "fast": fast}
+
+
+def test_table_matches_the_inning_model():
+    visitor, home = players()
+    distributions = matchup_distributions(visitor, home)
+    table = HalfInningTable(distributions)
+    assert table.table.sum(axis=(1, 2)) == pytest.approx(1.0)
+    model = InningModel(distributions)
+    for leadoff in (0, 4):
+        assert table.expected_runs(leadoff) \
+            == pytest.approx(model.expected_runs(leadoff), rel=1e-6)
+
+
+def test_games_follow_the_inning_rules():
+    simulator = FastSimulator(*players(), Rule(3, 5, True))
+    for result in simulator.run_games(range(300)):
+        assert 3 <= result.inning <= 5
+        if result.inning < 5:
+            assert result.winning_team is not None
+    assert simulator.play(7).score == simulator.play(7).score
+
+
+def test_validation_fails_on_a_significant_difference():
+    # visitor runs 1.69 +- 0.09 (engine) vs 2.14, win rate 0.548 +- 0.027
+    # vs 0.614, as seen on teams outside the benchmark ones
+    engine = {"win_rate": (0.548, 0.027), "visitor_runs": (1.69, 0.09),
+              "home_runs": (1.5, 0.09), "innings": (9.2, 0.05)}
+    fast = {"win_rate": (0.614, 0.003), "visitor_runs": (2.14, 0.01),
+            "home_runs": (1.5, 0.01), "innings": (9.2, 0.005)}
+    validation = Validation(summary(engine, fast), TOLERANCE, 2.0)
+    assert not validation.passed
+    assert validation.failures == ["win_rate", "visitor_runs"]
+
+
+def test_noise_does_not_excuse_a_bias():
+    # the 500 engine games of the benchmark: visitor runs 2.6 +- 0.13
+    # vs 2.85 is within noise, but does not bound the bias within 0.2
+    engine = {"win_rate": (0.47, 0.02), "visitor_runs": (2.6, 0.13),
+              "home_runs": (2.7, 0.13), "innings": (9.29, 0.05)}
+    fast = {"win_rate": (0.465, 0.003), "visitor_runs": (2.85, 0.01),
+            "home_runs": (2.9, 0.01), "innings": (9.27, 0.005)}
+    validation = Validation(summary(engine, fast), TOLERANCE, 2.0)
+    assert validation.failures == ["visitor_runs", "home_runs"]
+
+
+def test_validation_passes_when_the_interval_is_within_tolerance():
+    engine = {"win_rate": (0.45, 0.008), "visitor_runs": (2.77, 0.036),
+              "home_runs": (2.95, 0.037), "innings": (9.27, 0.012)}
+    fast = {"win_rate": (0.467, 0.002), "visitor_runs": (2.89, 0.012),
+            "home_runs": (3.0, 0.012), "innings": (9.27, 0.004)}
+    assert Validation(summary(engine, fast), TOLERANCE, 2.0).passed
+    fast["visitor_runs"] = (2.77 + 0.26, 0.012)
+    validation = Validation(summary(engine, fast), TOLERANCE, 2.0)
+    assert validation.failures == ["visitor_runs"]
+
+
+def test_validate_catches_batters_that_draw_nothing():
+    visitor, home = players()
+    for player in (visitor, home):
+        for n in range(9):
+            batter = player.nth_batter(n)
+            batter._draw = batter.draw = 0
+    validation = validate(
+        visitor, home, SAMPLE_RULE, n_engine=20, n_fast=500, processes=1
+    )
+    assert "visitor_runs" in validation.failures
+    assert validation.summary["engine"]["visitor_runs"][0] < 0.5
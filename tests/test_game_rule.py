@@ -0,0 +1,49 @@
+from .. card import Position
+from .. game import CompiledRule, Rule
+from . conftest import sample_player
+from .. lineup_validation import LineupValidator
+from .. simulation import play_game
+
+
+def test_tables_follow_the_limits():
+    compiled = Rule(7, 9, True).compile()
+    assert compiled.is_final == tuple(n >= 7 for n in range(10))
+    assert compiled.after_inning[6] == CompiledRule.NEXT
+    assert compiled.after_inning[7] == CompiledRule.DECIDE
+    assert compiled.after_inning[9] == CompiledRule.END
+    no_extra = Rule(3, 3, True).compile()
+    assert no_extra.after_inning[3] == CompiledRule.END
+
+
+def test_compiled_once_per_variant():
+    assert Rule(9, 12, True).compile() is Rule(9, 12, True).compile()
+    assert Rule(9, 12, True).compile() is not Rule(9, 12, False).compile()
+
+
+def test_dh_checks():
+    dh, no_dh = Rule(9, 12, True).compile(), Rule(9, 12, False).compile()
+    assert not dh.pitcher_bats and no_dh.pitcher_bats
+    assert dict(dh.position_counts) == {
+        Position.CATCHER: 1, Position.INFIELDER: 4, Position.OUTFIELDER: 3,
+        Position.DH: 1,
+    }
+    assert Position.PITCHER in no_dh.required_positions
+    assert Position.DH not in no_dh.required_positions
+
+
+def test_validator_uses_the_compiled_positions():
+    player = sample_player(1, 0)
+    validator = LineupValidator(
+        [player.nth_batter(n) for n in range(9)], Rule(9, 12, True)
+    )
+    assert validator.required == [
+        (position.value, n)
+        for position, n in Rule(9, 12, True).compile().position_counts
+    ]
+
+
+def test_short_game_ends_after_its_last_inning():
+    result = play_game(
+        sample_player(1, 0), sample_player(2, 1000), Rule(3, 3, True), 0
+    )
+    assert result.inning == 3
@@ -0,0 +1,101 @@
+import subprocess
+import sys
+import os
+import numpy as np
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. card import Position
+from .. game import Rule
+from .. lineup_optimizer import LineupOptimizer, InningTree
+
+
+def make_optimizer(n_innings=1, **kwargs):
+    player, opponent = sample_player(1, 0), sample_player(2, 1000)
+    roster = [player.nth_batter(n) for n in range(9)]
+    return LineupOptimizer(
+        roster, opponent.pitcher, player.deck_master.deck.deck_list,
+        opponent.deck_master.deck.deck_list, SAMPLE_RULE,
+        n_innings=n_innings, **kwargs
+    )
+
+
+def test_proven_lineup_beats_every_sampled_order():
+    optimizer = make_optimizer()
+    result = optimizer.optimize(time_limit=None, seed=0)
+    assert result.is_proven
+    order = tuple(optimizer.roster.index(card) for card in result.order)
+    assert result.value == pytest.approx(optimizer.evaluate(order))
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        other = tuple(int(idx) for idx in rng.permutation(9))
+        assert optimizer.evaluate(other) <= result.value + 1e-9
+
+
+def test_lineup_is_legal():
+    result = make_optimizer().optimize(time_limit=None, seed=0)
+    assert result.n_penalties == 0
+    for card, position in zip(result.order, result.positions):
+        assert card.is_defensible(position)
+    df = result.to_df_status()
+    assert sorted(df.order) == list(range(9))
+    assert not df.is_penalty.any()
+
+
+def test_default_run_proves_the_optimum():
+    result = make_optimizer(n_innings=9).optimize(seed=0)
+    assert result.is_proven
+
+
+def test_inning_tree_scores_every_order_like_evaluate():
+    optimizer = make_optimizer(n_innings=9)
+    members = (0, 2, 4, 6, 8)
+    tree = InningTree([optimizer.kernels[idx] for idx in members], 1e-9)
+    assert len(tree.seq) == 120
+    assert len({tuple(row) for row in tree.seq}) == 120
+    for row, value in zip(tree.seq, tree.game_values(9)):
+        order = tuple(members[idx] for idx in row)
+        assert value == pytest.approx(optimizer.evaluate(order), abs=1e-5)
+
+
+def test_time_limit_returns_an_unproven_incumbent():
+    result = make_optimizer(n_innings=9).optimize(time_limit=0.0, seed=0)
+    assert not result.is_proven
+    assert len(result.order) == 9
+
+
+def test_roster_checks():
+    player = sample_player(1)
+    roster = [player.nth_batter(n) for n in range(8)]
+    deck = player.deck_master.deck.deck_list
+    with pytest.raises(ValueError):
+        LineupOptimizer(roster, player.pitcher, deck, deck, SAMPLE_RULE)
+    with pytest.raises(ValueError):
+        LineupOptimizer(roster, player.pitcher, deck, deck, Rule(9, 12, False))
+
+
+def test_pitcher_bats_without_dh():
+    player, opponent = sample_player(1, 0), sample_player(2, 1000)
+    roster = [player.nth_batter(n) for n in range(8)]
+    optimizer = LineupOptimizer(
+        roster, opponent.pitcher, player.deck_master.deck.deck_list,
+        opponent.deck_master.deck.deck_list, Rule(9, 12, False),
+        pitcher=player.pitcher, n_innings=1,
+    )
+    result = optimizer.optimize(time_limit=None, seed=0)
+    assert player.pitcher in result.order
+    assert result.positions[result.order.index(player.pitcher)] \
+        == Position.PITCHER
+
+
+def test_import_does_not_load_pandas():
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    package = os.path.basename(package_dir)
+    code = (
+        "import sys; import {}.lineup_validation; "
+        "print('pandas' in sys.modules)"
+    ).format(package)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(package_dir),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert out.strip() == "False"
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from . conftest import sample_player
+from .. card import Position
+from .. game import Rule
+from .. lineup_validation import (
+    LineupValidator, DUPLICATE, POSITIONS, PITCHER, PENALTIES,
+)
+
+DH, NO_DH = Rule(9, 12, True), Rule(9, 12, False)
+
+
+def roster_and_lineup():
+    """
+    (roster, pitcher, the sample lineup under DH)
+    """
+    df = sample_player(1, 0).team_status.df_status
+    lineup = sorted(
+        (order, card, position)
+        for card, position, order in zip(df.card, df.position, df.order)
+        if order >= 0
+    )
+    pitcher = df[df.order < 0].card.iloc[0]
+    return list(df.card), pitcher, [(card, position)
+                                    for _, card, position in lineup]
+
+
+def test_sample_lineup_is_legal():
+    roster, pitcher, lineup = roster_and_lineup()
+    checks = LineupValidator(roster, DH, pitcher).check_lineups([lineup])
+    assert checks.legal.tolist() == [True]
+    assert checks.n_penalties.tolist() == [0]
+
+
+def test_each_reason():
+    roster, pitcher, lineup = roster_and_lineup()
+    validator = LineupValidator(roster, DH, pitcher, max_penalties=0)
+    duplicate = [lineup[0]] + lineup[:8]
+    positions = lineup[:8] + [(lineup[8][0], Position.CATCHER)]
+    batting_pitcher = lineup[:8] + [(pitcher, Position.DH)]
+    swapped = [(lineup[1][0], lineup[0][1]), (lineup[0][0], lineup[1][1])] \
+        + lineup[2:]
+    checks = validator.check_lineups(
+        [duplicate, positions, batting_pitcher, swapped]
+    )
+    assert checks.reasons[0] & DUPLICATE
+    # two catchers, one of them out of position
+    assert checks.reasons[1] == POSITIONS | PENALTIES
+    assert checks.reasons[2] == PITCHER
+    assert checks.reasons[3] == PENALTIES and checks.n_penalties[3] == 2
+    assert checks.describe(3) == ["penalties"]
+    assert not checks.legal.any()
+
+
+def test_without_dh_the_pitcher_bats():
+    roster, pitcher, lineup = roster_and_lineup()
+    with pytest.raises(ValueError):
+        LineupValidator(roster, NO_DH)
+    validator = LineupValidator(roster, NO_DH, pitcher)
+    with_pitcher = lineup[:8] + [(pitcher, Position.PITCHER)]
+    pitcher_elsewhere = lineup[:8] + [(lineup[8][0], Position.PITCHER)]
+    checks = validator.check_lineups([with_pitcher, lineup, pitcher_elsewhere])
+    assert checks.legal.tolist() == [True, False, False]
+    assert checks.reasons[1] == POSITIONS
+    assert checks.reasons[2] == PITCHER
+
+
+def test_vectorized_penalties_match_the_cards():
+    roster, pitcher, _ = roster_and_lineup()
+    validator = LineupValidator(roster, DH, pitcher)
+    rng = np.random.default_rng(0)
+    choices = [Position.CATCHER, Position.INFIELDER, Position.OUTFIELDER,
+               Position.DH, Position.PITCHER]
+    orders = np.array([rng.permutation(len(roster))[:9] for _ in range(200)])
+    picks = rng.integers(len(choices), size=orders.shape)
+    positions = np.array([[choices[k].value for k in row] for row in picks])
+    penalties = validator.penalties(orders, positions)
+    for c in range(len(orders)):
+        for n in range(9):
+            card, position = roster[orders[c, n]], choices[picks[c, n]]
+            assert penalties[c, n] == (not card.is_defensible(position))
+    checks = validator.check(orders, positions)
+    assert (checks.n_penalties == penalties.sum(axis=1)).all()
+
+
+def test_bad_shapes():
+    roster, pitcher, _ = roster_and_lineup()
+    validator = LineupValidator(roster, DH, pitcher)
+    with pytest.raises(ValueError):
+        validator.check(np.zeros((1, 8)), np.zeros((1, 8)))
+    with pytest.raises(ValueError):
+        validator.check(np.full((1, 9), 99), np.zeros((1, 9)))
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. event_log import (
+    EventLog, EventCode, RECORD, record_game, upgrade,
+)
+from .. game import Single, StrikeOut
+from .. log_query import LogQuery, build_index, at_bats
+
+
+@pytest.fixture(scope="module")
+def players():
+    return sample_player(1, 0), sample_player(2, 1000)
+
+
+@pytest.fixture(scope="module")
+def logs(players):
+    return [
+        record_game(*players, SAMPLE_RULE, seed)[1] for seed in range(3)
+    ]
+
+
+def version_1(log):
+    data = b"".join(
+        RECORD.pack(event.code, event.side, event.a, event.b)
+        for event in log if event.code != EventCode.AT_BAT_CONTEXT
+    )
+    return EventLog(log.seed, data, version=1)
+
+
+def save_logs(logs, tmp_path):
+    paths = []
+    for n, log in enumerate(logs):
+        path = tmp_path / "{}.pn9".format(n)
+        log.save(str(path))
+        paths.append(str(path))
+    return paths
+
+
+def test_queries_match_a_scan_of_the_table(logs, tmp_path):
+    query = build_index(save_logs(logs, tmp_path), str(tmp_path / "index"))
+    table = np.concatenate([at_bats(log, n) for n, log in enumerate(logs)])
+    assert len(query) == len(table)
+
+    frame = query.at_bats(batter=[0, 3], out=2)
+    expected = table[np.isin(table["batter"], [0, 3]) & (table["out"] == 2)]
+    assert sorted(zip(frame.game, frame.event)) \
+        == sorted(zip(expected["game"], expected["event"]))
+
+    frame = query.at_bats(pitcher=1009, result=[Single, StrikeOut], risp=True)
+    assert set(frame.result) <= {"Single", "StrikeOut"}
+    assert (frame.pitcher == 1009).all()
+    assert all(bases & 0b110 for bases in frame.bases)
+
+
+def test_sorted_keys_stay_memory_mapped(logs, tmp_path):
+    build_index(save_logs(logs, tmp_path), str(tmp_path / "index"))
+    query = LogQuery(str(tmp_path / "index"))
+    for key in ("batter", "pitcher", "base_out", "result"):
+        assert isinstance(query.sorted_keys[key], np.memmap)
+        assert (np.diff(query.sorted_keys[key]) >= 0).all()
+
+
+def test_version_1_logs_are_read(logs, tmp_path):
+    old = version_1(logs[0])
+    loaded = EventLog.from_bytes(old.to_bytes())
+    assert loaded.version == 1
+    query = build_index(save_logs([old], tmp_path), str(tmp_path / "index"))
+    frame = query.at_bats()
+    assert len(frame) == len(at_bats(logs[0]))
+    assert (frame.pitcher == -1).all()
+    assert frame.off_course.isna().all()
+
+
+def test_version_2_logs_take_the_deal_on_upgrade(players, logs):
+    old = EventLog(logs[0].seed, logs[0].data, version=2)
+    loaded = EventLog.from_bytes(old.to_bytes())
+    assert (loaded.version, loaded.antithetic) == (2, False)
+    assert loaded.data == logs[0].data
+    upgraded = upgrade(loaded, *players, SAMPLE_RULE, antithetic=True)
+    assert upgraded.version == logs[0].version
+    assert upgraded.antithetic
+    assert upgraded.data == logs[0].data
+
+
+def test_upgrade_restores_the_at_bat_context(players, logs):
+    upgraded = upgrade(version_1(logs[1]), *players, SAMPLE_RULE)
+    assert upgraded.version == logs[1].version
+    assert upgraded.data == logs[1].data
+    assert upgrade(logs[1], *players, SAMPLE_RULE) is logs[1]
+
+
+def test_upgrade_with_other_configurations_fails(players, logs):
+    other = sample_player(5, 0)
+    with pytest.raises(ValueError):
+        upgrade(version_1(logs[0]), other, players[1], SAMPLE_RULE)
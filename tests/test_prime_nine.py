@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from .. import prime_nine
+from . conftest import sample_player
+from .. loader import save_team, load_team, rule_from_dict
+from .. simulation import play_game
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(PACKAGE_DIR)
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-c", code.format(package=PACKAGE)],
+        cwd=os.path.dirname(PACKAGE_DIR), capture_output=True, text=True,
+        check=True,
+    ).stdout
+
+
+def test_import_loads_no_heavy_module():
+    out = run_python(
+        "import sys, {package}; "
+        "print(sorted(m for m in ('numpy', 'pandas', 'multiprocessing') "
+        "if m in sys.modules))"
+    )
+    assert out.strip() == "[]"
+
+
+def test_every_export_resolves():
+    for name in prime_nine.__all__:
+        assert getattr(prime_nine, name).__name__ == name
+    with pytest.raises(AttributeError):
+        prime_nine.NoSuchName
+    assert set(prime_nine.__all__) <= set(dir(prime_nine))
+
+
+# *******
+# * CLI *
+# *******
+@pytest.fixture
+def team_files(tmp_path):
+    paths = []
+    for seed, name in ((1, "visitor"), (2, "home")):
+        path = str(tmp_path / "{}.json".format(name))
+        save_team(name, sample_player(seed, 1000 * seed), path)
+        paths.append(path)
+    return paths
+
+
+def test_run_streams_one_record_per_game(team_files, tmp_path):
+    out = str(tmp_path / "games.jsonl")
+    status = prime_nine.main(
+        ["run", *team_files, "-n", "4", "-p", "1", "-o", out, "-q",
+         "--seed", "7", "--alternate"]
+    )
+    assert status == 0
+    with open(out) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["game"] for record in records] == [0, 1, 2, 3]
+    assert [record["visitor"] for record in records] \
+        == ["visitor", "home", "visitor", "home"]
+
+    teams = {name: player for name, player in map(load_team, team_files)}
+    rule = rule_from_dict(prime_nine.DEFAULT_RULE)
+    for record in records:
+        result = play_game(
+            teams[record["visitor"]], teams[record["home"]], rule,
+            record["seed"],
+        )
+        assert record["score"] == result.score
+
+
+def test_run_in_a_pool_gives_the_same_records(team_files, tmp_path):
+    outputs = []
+    for processes in ("1", "2"):
+        out = str(tmp_path / "games-{}.jsonl".format(processes))
+        prime_nine.main(["run", *team_files, "-n", "4", "-p", processes,
+                         "-o", out, "-q"])
+        with open(out) as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,80 @@
+import time
+from .. agent import Agent
+from . conftest import sample_player, SAMPLE_RULE
+from .. game import (
+    get_profiler, AtBatPhase, BatterSetAction, FinishAtBatAction,
+    StartGamePhase, StartTopBottomInningPhase, VSCardDecision,
+)
+from .. profiling import Profiler, profile, kind_of
+from .. simulation import play_game
+
+
+def play():
+    return play_game(sample_player(1, 0), sample_player(2, 1000),
+                     SAMPLE_RULE, 0)
+
+
+def test_profiled_game_plays_as_usual():
+    plain = play()
+    with profile() as profiler:
+        profiled = play()
+    assert profiled.score == plain.score
+    assert get_profiler() is None
+    assert profiler.stats[StartGamePhase].calls == 1
+    assert profiler.stats[AtBatPhase].calls \
+        == profiler.stats[StartTopBottomInningPhase].calls
+    assert profiler.stats[BatterSetAction].calls \
+        == profiler.stats[FinishAtBatAction].calls
+    assert profiler.stats[VSCardDecision].calls > 0
+
+
+def test_self_time_excludes_nested_calls():
+    profiler = Profiler(track_allocations=False)
+
+    def outer():
+        profiler.measure("inner", sum, range(1000))
+
+    profiler.measure("outer", outer)
+    outer_stat, inner_stat = profiler.stats["outer"], profiler.stats["inner"]
+    assert outer_stat.child == inner_stat.total
+    assert outer_stat.total >= inner_stat.total
+
+
+class SlowAgent(Agent):
+    def __init__(self, agent):
+        self.agent = agent
+
+    def choose_vs_card(self, game, player):
+        time.sleep(0.001)
+        return self.agent.choose_vs_card(game, player)
+
+    def reseed(self, rng):
+        self.agent.reseed(rng)
+
+
+def test_at_bat_phase_excludes_the_answers():
+    visitor, home = sample_player(1, 0), sample_player(2, 1000)
+    for player in (visitor, home):
+        player.agent = SlowAgent(player.agent)
+    with profile(track_allocations=False) as profiler:
+        play_game(visitor, home, SAMPLE_RULE, 0)
+    at_bats = profiler.stats[AtBatPhase]
+    actions = sum(
+        stat.total for key, stat in profiler.stats.items()
+        if kind_of(key) == "action"
+    )
+    assert at_bats.child == actions
+    assert at_bats.total < profiler.stats[VSCardDecision].total
+    assert "AtBatPhase" in set(profiler.table().name)
+
+
+def test_table_and_trace():
+    with profile(trace=True) as profiler:
+        play()
+    table = profiler.table()
+    assert list(table.self_ms) == sorted(table.self_ms, reverse=True)
+    assert set(table.kind) <= {"phase", "action", "result", "decision"}
+    trace = profiler.chrome_trace()["traceEvents"]
+    assert len(trace) == sum(stat.calls for stat in profiler.stats.values())
+    assert kind_of(AtBatPhase) == "phase"
+    assert kind_of("other") == "other"
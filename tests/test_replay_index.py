@@ -0,0 +1,47 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. event_log import record_game, replay_to
+from .. replay_index import ReplayIndex, SeekableReplay, save_indexed
+
+
+@pytest.fixture(scope="module")
+def game():
+    visitor, home = sample_player(1, 0), sample_player(2, 1000)
+    _, log = record_game(visitor, home, SAMPLE_RULE, 0)
+    return visitor, home, log
+
+
+def test_keyframes_are_at_most_interval_apart(game):
+    visitor, home, log = game
+    index = ReplayIndex.build(log, visitor, home, interval=50)
+    assert index.positions[0] == 0
+    gaps = [b - a for a, b in zip(index.positions, index.positions[1:])]
+    assert max(gaps) <= 50
+
+
+def test_seeks_match_a_full_replay(game):
+    visitor, home, log = game
+    replay = SeekableReplay(log, ReplayIndex.build(log, visitor, home, 64))
+    # forward, backward and repeated seeks
+    for n in (0, 500, 130, 131, 131, len(log), 7):
+        expected = replay_to(log, visitor, home, n).snapshot()
+        assert replay.state_at(n).snapshot() == expected
+
+
+def test_seek_out_of_range(game):
+    visitor, home, log = game
+    replay = SeekableReplay(log, ReplayIndex.build(log, visitor, home))
+    with pytest.raises(IndexError):
+        replay.state_at(len(log) + 1)
+
+
+def test_saved_index_opens_next_to_the_log(game, tmp_path):
+    visitor, home, log = game
+    path = str(tmp_path / "game.pn9")
+    index = save_indexed(log, visitor, home, path, interval=100)
+    replay = SeekableReplay.open(path)
+    assert replay.index.positions == index.positions
+    assert replay.index.snapshots == index.snapshots
+    n = len(log) // 3
+    assert replay.state_at(n).snapshot() \
+        == replay_to(log, visitor, home, n).snapshot()
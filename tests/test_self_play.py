@@ -0,0 +1,60 @@
+import numpy as np
+from . conftest import sample_player, SAMPLE_RULE
+from .. self_play import (
+    FIELDS, ShardWriter, generate, load_shards, play_and_encode,
+)
+
+VISITOR = sample_player(1, 0)
+HOME = sample_player(2, 1000)
+
+
+def rows(states, outcomes, game_id=0):
+    n = len(states)
+    return {
+        "states": np.array(states, dtype=np.float32).reshape(n, 1),
+        "actions": np.zeros((n, 1), dtype=np.float32),
+        "sides": np.zeros(n, dtype=np.int8),
+        "outcomes": np.array(outcomes, dtype=np.float32),
+        "margins": np.array(outcomes, dtype=np.float32) * 2,
+        "counts": np.ones(n, dtype=np.int32),
+        "games": np.full(n, game_id, dtype=np.int32),
+    }
+
+
+def test_duplicates_average_their_labels(tmp_path):
+    for compress in (True, False):
+        directory = str(tmp_path / str(compress))
+        with ShardWriter(directory, shard_size=2, compress=compress) as writer:
+            writer.write(rows([1, 2, 1], [1, 0, 0]))
+            writer.write(rows([3, 1, 2], [1, 0.5, 1], game_id=1))
+        data = load_shards(directory)
+        assert len(writer.shards) == 2
+        assert writer.n_rows == 3 and writer.n_duplicates == 3
+        assert data["states"][:, 0].tolist() == [1, 2, 3]
+        assert data["counts"].tolist() == [3, 2, 1]
+        assert np.allclose(data["outcomes"], [0.5, 0.5, 1])
+        assert np.allclose(data["margins"], [1, 1, 2])
+        assert data["games"].tolist() == [0, 0, 1]
+
+
+def test_without_dedup_every_row_is_kept(tmp_path):
+    with ShardWriter(str(tmp_path), dedup=False) as writer:
+        writer.write(rows([1, 1], [1, 0]))
+    data = load_shards(str(tmp_path))
+    assert data["outcomes"].tolist() == [1, 0]
+    assert data["counts"].tolist() == [1, 1]
+
+
+def test_generate_writes_the_seeded_games(tmp_path):
+    summary = generate(
+        VISITOR, HOME, SAMPLE_RULE, str(tmp_path), 3, seed="s",
+        processes=2, dedup=False,
+    )
+    data = load_shards(str(tmp_path))
+    games = [play_and_encode(VISITOR, HOME, SAMPLE_RULE, "s-{}".format(n), n)
+             for n in range(3)]
+    assert summary["rows"] == sum(len(game["sides"]) for game in games)
+    for field in FIELDS:
+        assert np.array_equal(
+            data[field], np.concatenate([game[field] for game in games])
+        )
@@ -0,0 +1,79 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. sequential import (
+    WinRateEstimate, look_confidence, estimate_win_rate, sequential_compare,
+)
+
+
+def test_win_rate_estimate_is_the_beta_posterior():
+    estimate = WinRateEstimate(7, 10, 0.95)
+    assert estimate.mean == pytest.approx(8 / 12)
+    low, high = estimate.ci
+    assert 0.0 <= low < estimate.mean < high <= 1.0
+    assert estimate.prob_above(0.1) > 0.99
+
+
+def test_look_confidence_splits_the_error_over_the_looks():
+    assert look_confidence(0.95, 100, 200, 200) == pytest.approx(0.95)
+    assert look_confidence(0.95, 100, 200, 500) == pytest.approx(1 - 0.05 / 4)
+    # looks at 200, 300, 400 and the clipped 450
+    assert look_confidence(0.95, 100, 200, 450) == pytest.approx(1 - 0.05 / 4)
+
+
+def test_invalid_caps_are_rejected():
+    player = sample_player(1)
+    with pytest.raises(ValueError):
+        estimate_win_rate(player, player, SAMPLE_RULE, batch_size=0)
+    with pytest.raises(ValueError):
+        estimate_win_rate(
+            player, player, SAMPLE_RULE, min_games=10, max_games=5
+        )
+
+
+def test_estimate_win_rate_stops_at_the_budget():
+    config, opponent = sample_player(1, 0), sample_player(2, 1000)
+    result = estimate_win_rate(
+        config, opponent, SAMPLE_RULE, precision=0.001,
+        batch_size=2, min_games=4, max_games=6,
+    )
+    assert result.reason == "max_games"
+    assert result.estimate.n_games == 6
+
+
+def test_estimate_win_rate_stops_once_precise_enough():
+    config, opponent = sample_player(1, 0), sample_player(2, 1000)
+    result = estimate_win_rate(
+        config, opponent, SAMPLE_RULE, precision=0.5,
+        batch_size=2, min_games=4, max_games=100,
+    )
+    assert result.reason == "precision"
+    assert result.estimate.n_games == 4
+
+
+def test_sequential_compare_uses_the_control_variate_interval():
+    config_a, config_b = sample_player(1, 0), sample_player(2, 1000)
+    opponent = sample_player(3, 2000)
+    result = sequential_compare(
+        config_a, config_b, opponent, SAMPLE_RULE, metric="runs",
+        batch_size=4, min_games=6, max_games=30, control_variate=True,
+    )
+    estimate = result.estimate
+    plain = sequential_compare(
+        config_a, config_b, opponent, SAMPLE_RULE, metric="runs",
+        batch_size=4, min_games=estimate.n_games,
+        max_games=estimate.n_games,
+    ).estimate
+    assert estimate.stderr < plain.stderr
+    if result.reason == "decided":
+        low, high = estimate.ci
+        assert high < 0 or low > 0
+
+
+def test_sequential_compare_of_a_config_with_itself_is_undecided():
+    config, opponent = sample_player(1, 0), sample_player(2, 1000)
+    result = sequential_compare(
+        config, config, opponent, SAMPLE_RULE, metric="runs",
+        batch_size=2, min_games=4, max_games=6,
+    )
+    assert result.reason == "max_games"
+    assert result.estimate.diff == 0
@@ -0,0 +1,206 @@
+import asyncio
+import pandas as pd
+import pytest
+from .. agent import Agent
+from . conftest import sample_player, SAMPLE_RULE
+from .. card import BatHand, Position, MeetShotPts, PlayerCard
+from .. game import PinchHitterDecision
+from .. server import (
+    GameServer, AsyncAgent, SyncAgentAdapter, LocalTransport, RemoteAgent,
+)
+from .. simulation import play_game
+
+
+def players():
+    return sample_player(1, 0), sample_player(2, 1000)
+
+
+def adapters():
+    return [SyncAgentAdapter(), SyncAgentAdapter()]
+
+
+class SlowAgent(AsyncAgent):
+    async def decide(self, decision):
+        await asyncio.sleep(1.0)
+
+
+class IllegalAgent(AsyncAgent):
+    async def decide(self, decision):
+        return "illegal"
+
+
+def test_seeded_match_replays_the_engine():
+    visitor, home = players()
+    result = asyncio.run(
+        GameServer().run_match(visitor, home, SAMPLE_RULE, adapters(), "s")
+    )
+    assert result.seed == "s"
+    assert result.score == play_game(visitor, home, SAMPLE_RULE, "s").score
+
+
+def test_unseeded_matches_draw_and_keep_fresh_seeds():
+    visitor, home = players()
+
+    async def main():
+        server = GameServer()
+        results = [
+            await server.run_match(visitor, home, SAMPLE_RULE, adapters())
+            for _ in range(2)
+        ]
+        server.start_match(visitor, home, SAMPLE_RULE, adapters())
+        await server.wait_all()
+        return server, results
+
+    server, results = asyncio.run(main())
+    seeds = [result.seed for result in results]
+    assert None not in seeds and seeds[0] != seeds[1]
+    for result in results:
+        replay = play_game(visitor, home, SAMPLE_RULE, result.seed)
+        assert replay.score == result.score
+    assert isinstance(server.seeds[0], int)
+
+
+def test_timeouts_and_illegal_answers_fall_back_to_the_player_agent():
+    visitor, home = players()
+
+    async def main():
+        server = GameServer(decision_timeout=0.001)
+        ids = [
+            server.start_match(visitor, home, SAMPLE_RULE, agents, seed=0)
+            for agents in (
+                [SlowAgent(), SyncAgentAdapter()],
+                [IllegalAgent(), SyncAgentAdapter()],
+            )
+        ]
+        await server.wait_all()
+        return [server.stats[match_id] for match_id in ids]
+
+    slow, illegal = asyncio.run(main())
+    assert slow.timeouts > 0 and slow.invalid == 0
+    assert illegal.invalid > 0 and illegal.timeouts == 0
+
+
+def test_remote_agent_over_the_local_transport():
+    visitor, home = players()
+    transport = LocalTransport()
+
+    async def main():
+        client = asyncio.create_task(transport.serve(SyncAgentAdapter()))
+        result = await GameServer().run_match(
+            visitor, home, SAMPLE_RULE,
+            [RemoteAgent(transport), SyncAgentAdapter()], seed=3,
+        )
+        client.cancel()
+        return result
+
+    result = asyncio.run(main())
+    assert result.score == play_game(visitor, home, SAMPLE_RULE, 3).score
+
+
+# *********
+# * Bench *
+# *********
+class PinchHitAgent(Agent):
+    def __init__(self, agent):
+        self.agent = agent
+        self.n_asked = 0
+
+    def choose_vs_card(self, game, player):
+        return self.agent.choose_vs_card(game, player)
+
+    def choose_pinch_hitter(self, game, player):
+        self.n_asked += 1
+        return player.team_status.bench[0]
+
+    def reseed(self, rng):
+        self.agent.reseed(rng)
+
+
+def with_bench(player):
+    card = PlayerCard(
+        999, BatHand.RIGHT, {Position.OUTFIELDER}, MeetShotPts(), 4, 1
+    )
+    status = player.team_status
+    status.df_status = pd.concat([status.df_status, pd.DataFrame([dict(
+        card=card, position=Position.OUTFIELDER, order=-1, is_penalty=False
+    )])])
+    status.update_penalty()
+    return card
+
+
+def test_bench_is_cached_until_a_pinch_hit():
+    player = sample_player(1)
+    assert player.team_status.bench == []
+    card = with_bench(player)
+    assert player.team_status.bench == [card]
+    player.team_status.pinch_hit(0, card)
+    assert player.team_status.bench == []
+    assert player.nth_batter(0) is card
+
+
+def pitcher_batting_ninth(player):
+    status = player.team_status
+    df = status.df_status
+    df = df[df.position != Position.DH].copy()
+    df.loc[df.position == Position.PITCHER, "order"] = 8
+    status.df_status = df
+    status.update_penalty()
+
+
+def test_pinch_hit_leaves_the_old_lineup_untouched():
+    player = sample_player(1)
+    card = with_bench(player)
+    before = player.team_status.df_status
+    orders = list(before.order)
+    player.team_status.pinch_hit(0, card)
+    assert list(before.order) == orders
+    assert any(c is card for c in before.card)
+
+
+def test_pinch_hitter_for_the_pitcher_must_pitch_or_swap():
+    player = sample_player(1)
+    pitcher_batting_ninth(player)
+    card = with_bench(player)
+    status = player.team_status
+    assert status.pinch_hitters(0) == [card]
+    assert status.pinch_hitters(8) == []
+    with pytest.raises(ValueError):
+        status.pinch_hit(8, card)
+    fielder = status.nth_batter(5)
+    with pytest.raises(ValueError):
+        status.pinch_hit(8, card, swap=fielder)
+    assert status.nth_batter(8) is status.pitcher
+
+    fielder.position = {Position.OUTFIELDER, Position.RELIEVER}
+    status.pinch_hit(8, card, swap=fielder)
+    assert status.nth_batter(8) is card
+    assert status.pitcher is fielder
+    assert not status.df_status.is_penalty.any()
+
+
+def test_reliever_pinch_hits_for_the_pitcher():
+    player = sample_player(1)
+    pitcher_batting_ninth(player)
+    card = with_bench(player)
+    card.position = {Position.RELIEVER}
+    status = player.team_status
+    assert status.pinch_hitters(8) == [card]
+    status.pinch_hit(8, card)
+    assert status.pitcher is card
+
+
+def test_pinch_hitter_is_asked_while_the_bench_is_not_empty():
+    visitor, home = players()
+    with_bench(visitor)
+    visitor.agent = PinchHitAgent(visitor.agent)
+    decisions = []
+
+    class Recorder(AsyncAgent):
+        async def decide(self, decision):
+            decisions.append(type(decision))
+            return decision.ask()
+
+    asyncio.run(GameServer().run_match(
+        visitor, home, SAMPLE_RULE, [Recorder(), SyncAgentAdapter()], seed=0
+    ))
+    assert decisions.count(PinchHitterDecision) == 1
@@ -0,0 +1,26 @@
+from . conftest import sample_player, SAMPLE_RULE
+from .. game import Rule
+from .. shared_catalog import SharedCatalog, play_games_shared, attach
+from .. import shared_catalog
+from .. simulation import play_game
+
+
+def test_pool_workers_play_catalog_games():
+    teams = [sample_player(1, 0), sample_player(2, 1000)]
+    rules = [SAMPLE_RULE, Rule(3, 3, True)]
+    tasks = [(0, 1, 0, 0), (1, 0, 1, 1), (0, 1, 1, 2)]
+    with SharedCatalog(teams, rules) as catalog:
+        results = play_games_shared(catalog, tasks, processes=2)
+    for (visitor, home, rule, seed), result in zip(tasks, results):
+        expected = play_game(teams[visitor], teams[home], rules[rule], seed)
+        assert result.score == expected.score
+    assert results[1].inning == 3
+    assert catalog.shm is None
+
+
+def test_attach_loads_the_catalog():
+    teams = [sample_player(1, 0)]
+    with SharedCatalog(teams, [SAMPLE_RULE]) as catalog:
+        attach(catalog.name)
+    assert [team.pitcher.id for team in shared_catalog._teams] == [9]
+    assert shared_catalog._rules[0].key == SAMPLE_RULE.key
@@ -0,0 +1,129 @@
+import random
+import struct
+from array import array
+from types import SimpleNamespace
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. suspend import (
+    HEADER, HEADER_V1, SEED_INT, INT_SEED, LiveMatch, GameStore,
+)
+
+CATALOG = SimpleNamespace(
+    teams=[sample_player(1, 0), sample_player(2, 1000)], rules=[SAMPLE_RULE]
+)
+
+
+def play_out(match, rng, n_answers=None):
+    """
+    answer random options; the number of answers given
+    """
+    n = 0
+    while not match.is_over and n != n_answers:
+        match.answer_index(rng.randrange(len(match.decision.options())))
+        n += 1
+    return n
+
+
+@pytest.mark.parametrize("seed", [7, "s-1"])
+def test_resume_replays_to_the_same_game(seed):
+    match = LiveMatch(CATALOG, 0, 1, 0, seed, human_sides=(0, 1))
+    play_out(match, random.Random(0))
+    resumed = LiveMatch.from_bytes(CATALOG, match.to_bytes())
+    assert resumed.seed == seed
+    assert resumed.human_sides == {0, 1}
+    assert list(resumed.trail) == list(match.trail)
+    assert resumed.result.score == match.result.score
+
+
+def test_suspended_match_continues_like_an_uninterrupted_one():
+    whole = LiveMatch(CATALOG, 0, 1, 0, seed=3)
+    play_out(whole, random.Random(1))
+
+    match = LiveMatch(CATALOG, 0, 1, 0, seed=3)
+    rng = random.Random(1)
+    play_out(match, rng, n_answers=5)
+    match = LiveMatch.from_bytes(CATALOG, match.to_bytes())
+    assert not match.is_over
+    play_out(match, rng)
+    assert list(match.trail) == list(whole.trail)
+    assert match.result.score == whole.result.score
+
+
+def test_resume_replays_only_the_answers_after_the_keyframe():
+    whole = LiveMatch(CATALOG, 0, 1, 0, seed=4)
+    play_out(whole, random.Random(2))
+
+    match = LiveMatch(CATALOG, 0, 1, 0, seed=4)
+    rng = random.Random(2)
+    play_out(match, rng, n_answers=40)
+    position = match.keyframe[0]
+    assert 0 < position <= 40
+    resumed = LiveMatch.from_bytes(CATALOG, match.to_bytes())
+    assert resumed.game.score_board.total_score \
+        == match.game.score_board.total_score
+    assert resumed.game.inning == match.game.inning
+    assert resumed.decision.options() == match.decision.options()
+    play_out(resumed, rng)
+    assert list(resumed.trail) == list(whole.trail)
+    assert resumed.result.score == whole.result.score
+
+
+def test_resume_against_another_catalog_fails():
+    match = LiveMatch(CATALOG, 0, 1, 0, seed=5)
+    play_out(match, random.Random(3), n_answers=20)
+    changed = SimpleNamespace(
+        teams=[sample_player(1, 0), sample_player(2, 1000)],
+        rules=CATALOG.rules,
+    )
+    assert LiveMatch.from_bytes(changed, match.to_bytes()).trail \
+        == match.trail
+    changed.teams[1].nth_batter(4)._power += 1
+    with pytest.raises(ValueError):
+        LiveMatch.from_bytes(changed, match.to_bytes())
+
+
+def test_version_1_blob_replays_the_trail():
+    match = LiveMatch(CATALOG, 0, 1, 0, seed=6)
+    play_out(match, random.Random(4), n_answers=10)
+    trail = array("B", match.trail).tobytes()
+    blob = HEADER_V1.pack(1, 1, 1, INT_SEED, 0, 1, 0, len(match.trail)) \
+        + SEED_INT.pack(6) + trail
+    resumed = LiveMatch.from_bytes(CATALOG, blob)
+    assert list(resumed.trail) == list(match.trail)
+    assert resumed.decision.options() == match.decision.options()
+
+
+def test_unseeded_matches_keep_their_fresh_seed():
+    first, second = (LiveMatch(CATALOG, 0, 1, 0) for _ in range(2))
+    assert isinstance(first.seed, int) and first.seed != second.seed
+    assert LiveMatch.from_bytes(CATALOG, first.to_bytes()).seed == first.seed
+
+
+def test_wide_trail_is_little_endian():
+    match = LiveMatch(CATALOG, 0, 1, 0, seed=1)
+    match.trail = array("H", [300, 2])
+    blob = match.to_bytes()
+    width = HEADER.unpack_from(blob, 0)[1]
+    assert width == 2
+    assert blob[-4:] == struct.pack("<2H", 300, 2)
+
+
+def test_store_parks_the_least_recently_used():
+    store = GameStore(CATALOG, max_hot=2)
+    rng = random.Random(2)
+    for n in range(3):
+        store.start(n, 0, 1, 0, seed=n)
+    assert list(store.hot) == [1, 2] and list(store.parked) == [0]
+    assert len(store) == 3 and 0 in store
+
+    decision = store.get(0).decision
+    store.answer(0, decision.options()[0])
+    assert list(store.hot) == [2, 0] and list(store.parked) == [1]
+    assert store.n_suspended == 2 and store.n_resumed == 1
+    for n in range(3):
+        play_out(store.get(n), rng)
+        assert store.get(n).is_over
+    with pytest.raises(KeyError):
+        store.start(0, 0, 1, 0)
+    store.discard(0)
+    assert 0 not in store
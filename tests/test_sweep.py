@@ -0,0 +1,84 @@
+from . conftest import sample_player, SAMPLE_RULE
+from .. card import Course, Point
+import numpy as np
+from .. sweep import METRICS, Perturbation, StatSweep, grid, perturbed
+
+TEAM = sample_player(1, 0)
+OPPONENT = sample_player(2, 1000)
+
+
+def test_perturbation_copies_the_card():
+    card = TEAM.nth_batter(0)
+    perturbation = Perturbation(
+        card.id, power=1, ms_pts={Course.HIGH: Point.STAR}
+    )
+    new = perturbation.apply(card)
+    assert new is not card
+    assert new.power == card.power + 1
+    assert new.ms_pts[Course.HIGH] == Point.STAR
+    assert card.power == TEAM.nth_batter(0).power
+    assert perturbation.apply(TEAM.nth_batter(1)) is TEAM.nth_batter(1)
+    assert perturbation.label == "0:power+1,HIGH=STAR"
+    assert Perturbation(3).label == "3:none"
+
+
+def test_grid_is_one_at_a_time():
+    perturbations = grid([0, 1], powers=(-1, 1),
+                         points=[(Course.LOW, Point.FILL)])
+    assert [p.label for p in perturbations] == [
+        "0:power-1", "0:power+1", "0:LOW=FILL",
+        "1:power-1", "1:power+1", "1:LOW=FILL",
+    ]
+
+
+def test_sweep_effects():
+    batter = TEAM.nth_batter(0).id
+    sweep = StatSweep(TEAM, [OPPONENT], SAMPLE_RULE, n_games=200, seed=1)
+    df = sweep.run(grid([batter, 5000], powers=(-1, 1)), top=0)
+    assert len(df) == 4 * len(METRICS)
+    effects = df.set_index(["label", "metric"])["effect"]
+    # common random numbers: a card not in the team changes nothing
+    assert (df[df["card_id"] == 5000][["effect", "stderr"]] == 0).all().all()
+    assert effects["0:power+1", "runs_scored"] > 0
+    assert effects["0:power-1", "runs_scored"] < 0
+    # a batter perturbation only adds the tables of the team's offense
+    # and the variants of card 5000 reuse the baseline games
+    assert len(sweep._tables) == 2 + 2
+    assert len(sweep._games) == 2 + 2 * 2
+
+
+def test_sweep_is_reproducible():
+    perturbations = [Perturbation(TEAM.nth_batter(2).id, power=1)]
+    frames = [
+        StatSweep(TEAM, [OPPONENT], SAMPLE_RULE, n_games=50, seed=3)
+        .run(perturbations, top=0)
+        for _ in range(2)
+    ]
+    assert frames[0].equals(frames[1])
+
+
+def test_perturbed_player_is_a_copy():
+    card = TEAM.nth_batter(3)
+    player = perturbed(TEAM, Perturbation(card.id, power=2))
+    assert player.nth_batter(3).power == card.power + 2
+    assert TEAM.nth_batter(3).power == card.power
+    assert player.pitcher.power == TEAM.pitcher.power
+
+
+def test_top_variants_are_played_on_the_engine():
+    batter = TEAM.nth_batter(0).id
+    perturbations = grid([batter, 5000], powers=(-1, 1))
+    sweep = StatSweep(TEAM, [OPPONENT], SAMPLE_RULE, n_games=200, seed=1)
+    df = sweep.run(perturbations, top=2, rank_by="runs_scored",
+                   n_engine=10, processes=1)
+    checked = df[df.engine_effect.notna()]
+    runs = df[df.metric == "runs_scored"]
+    best = runs.sort_values("effect", ascending=False).label.iloc[:2]
+    assert set(checked.label) == set(best)
+    assert len(checked) == 2 * len(METRICS)
+    assert np.isnan(df[~df.label.isin(best)].engine_stderr).all()
+    # the baseline and every variant checked: 20 games each
+    assert len(sweep._engine_games) == 1 + 2
+    if "5000:power+1" in set(best):
+        rows = checked[checked.label == "5000:power+1"]
+        assert (rows.engine_effect == 0).all()
@@ -0,0 +1,62 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. tournament import (
+    Team, Tournament, Standings, round_robin, swiss_pairing,
+    recommended_swiss_rounds,
+)
+
+
+@pytest.mark.parametrize("n_teams", [4, 5])
+def test_round_robin_meets_every_pair_once(n_teams):
+    rounds = round_robin(n_teams)
+    pairs = [frozenset(pair) for pairs in rounds for pair in pairs]
+    assert len(pairs) == len(set(pairs)) == n_teams * (n_teams - 1) // 2
+    for pairs in rounds:
+        teams = [team for pair in pairs for team in pair]
+        assert len(teams) == len(set(teams))
+
+
+def test_round_robin_swaps_home_every_other_cycle():
+    first, second = round_robin(4, n_cycles=2)[:3], round_robin(4, 2)[3:]
+    assert [[pair[::-1] for pair in pairs] for pairs in first] == second
+
+
+def test_swiss_pairing_avoids_rematches():
+    played = {frozenset((0, 1))}
+    assert swiss_pairing([0, 1, 2, 3], played) == [(0, 2), (1, 3)]
+    assert swiss_pairing([0, 1, 2], set()) == [(0, 1)]
+
+
+def test_standings_count_games_and_ratings():
+    standings = Standings(3)
+    standings.add_game(0, 1, [3, 1])
+    standings.add_game(2, 0, [2, 2])
+    assert list(standings.wins) == [1, 0, 0]
+    assert list(standings.draws) == [1, 0, 1]
+    assert list(standings.points) == [1.5, 0.0, 0.5]
+    assert standings.ranking() == [0, 2, 1]
+    assert standings.elo[0] > standings.elo[2] > standings.elo[1]
+    assert standings.bradley_terry().mean() == pytest.approx(1.0)
+    assert standings.head_to_head[0, 1] == 1.0
+    assert list(standings.to_frame(["a", "b", "c"]).team) == ["a", "c", "b"]
+
+
+def test_recommended_swiss_rounds():
+    assert recommended_swiss_rounds(2) == 1
+    assert recommended_swiss_rounds(9) == 4
+
+
+def test_round_robin_tournament_streams_every_series():
+    teams = [
+        Team(name, sample_player(seed, 1000 * seed), SAMPLE_RULE)
+        for seed, name in enumerate("abc")
+    ]
+    series = []
+    tournament = Tournament(
+        teams, games_per_series=2, processes=2,
+        on_series=lambda t, home, visitor, games: series.append(games),
+    )
+    standings = tournament.run_round_robin()
+    assert len(series) == 3
+    assert standings.games.sum() == 2 * 3 * 2
+    assert (standings.wins + standings.losses + standings.draws).sum() == 12
@@ -0,0 +1,98 @@
+import pytest
+from . conftest import sample_player, SAMPLE_RULE
+from .. game import Game, Observer
+from .. simulation import prepare_player
+from .. zobrist import (
+    ZobristHasher, TranspositionTable, game_hash, situation_hash, zobrist_key,
+)
+
+
+def new_game(seed):
+    return Game(
+        prepare_player(sample_player(1, 0), seed, 0),
+        prepare_player(sample_player(2, 1000), seed, 1),
+        SAMPLE_RULE,
+    )
+
+
+class Checker(Observer):
+    def __init__(self, game):
+        self.hasher = ZobristHasher().attach(game)
+        self.hashes = set()
+        self.n_checks = 0
+        game.add_observer(self)
+
+    def on_action(self, game, action):
+        h = self.hasher.hash()
+        assert h == game_hash(game)
+        self.hashes.add(h)
+        self.n_checks += 1
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_incremental_hash_matches_a_full_recompute(seed):
+    game = new_game(seed)
+    checker = Checker(game)
+    game.playball()
+    assert checker.n_checks > 100
+    assert len(checker.hashes) > 100
+
+
+def test_keys_are_stable_64_bit():
+    assert zobrist_key("out", 1) == zobrist_key("out", 1)
+    assert zobrist_key("out", 1) != zobrist_key("out", 2)
+    assert 0 <= zobrist_key("runner", 0, 5) < 2 ** 64
+
+
+def test_runner_identity_is_hashed():
+    game = new_game(0)
+    steps = game.play()
+    next(steps)
+    batters = [game.players[0].nth_batter(n) for n in range(2)]
+    hashes = []
+    for runners in ([None] * 3, [batters[0], None, None],
+                    [batters[1], None, None], [None, batters[0], None]):
+        game.field.runners = list(runners)
+        hashes.append(situation_hash(game))
+    assert len(set(hashes)) == 4
+
+
+def test_transposition_table_keeps_deep_and_recent():
+    table = TranspositionTable(bits=2)
+    table.put(1, "deep", depth=5)
+    table.put(5, "shallow", depth=1) # same bucket
+    assert table.get(1, depth=5)[2] == "deep"
+    assert table.get(5)[2] == "shallow"
+    assert table.get(5, depth=2) is None
+    table.put(9, "newer", depth=0)
+    assert table.get(5) is None and table.get(9)[2] == "newer"
+    assert table.get(1)[2] == "deep"
+    assert table.replaced == 1 and len(table) == 2
+    table.clear()
+    assert len(table) == 0
+
+
+def test_shallower_search_keeps_the_deeper_entry():
+    table = TranspositionTable(bits=2)
+    table.put(1, "deep", depth=5)
+    table.put(1, "shallow", depth=2)
+    assert table.get(1, depth=5)[2] == "deep"
+    assert len(table) == 1
+    table.put(1, "deeper", depth=5)
+    assert table.get(1, depth=5)[2] == "deeper"
+    table.put(5, "other", depth=1) # same bucket, shallower
+    assert table.get(1)[2] == "deeper" and table.get(5)[2] == "other"
+
+
+def test_situation_follows_changes_between_hashes():
+    game = new_game(0)
+    hasher = ZobristHasher().attach(game)
+    steps = game.play()
+    next(steps)
+    before, out = hasher.hash(), game.out
+    game.field.runners[1] = game.players[0].nth_batter(0)
+    game.out = out + 1
+    assert hasher.hash() == game_hash(game) != before
+    game.field.runners[1] = None
+    game.out = out
+    assert hasher.hash() == before
@@ -0,0 +1,263 @@
+import math
+import random
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from . simulation import play_game
+
+
+class Team:
+    """
+    a GamePlayer configuration with the Rule of its home games
+    """
+    def __init__(self, name, config, rule):
+        self.name = name
+        self.config = config
+        self.rule = rule
+
+
+# *************
+# * Schedules *
+# *************
+def round_robin(n_teams, n_cycles=1):
+    """
+    rounds of (home, visitor) pairs by the circle method;
+    home and visitor swap every other cycle
+    """
+    idx = list(range(n_teams))
+    if n_teams % 2 == 1:
+        idx.append(None) # bye
+    n = len(idx)
+    rounds = []
+    for cycle in range(n_cycles):
+        rotation = list(idx)
+        for _ in range(n - 1):
+            pairs = []
+            for k in range(n // 2):
+                a, b = rotation[k], rotation[n - 1 - k]
+                if a is None or b is None:
+                    continue
+                pairs.append((a, b) if cycle % 2 == 0 else (b, a))
+            rounds.append(pairs)
+            rotation = [rotation[0]] + [rotation[-1]] + rotation[1:-1]
+    return rounds
+
+
+def swiss_pairing(ranking, played):
+    """
+    pair neighbours in 'ranking' (best first) avoiding rematches
+    ('played' is a set of frozenset pairs) when possible;
+    the last team gets a bye when the number is odd
+    """
+    pending = list(ranking)
+    pairs = []
+    while len(pending) >= 2:
+        a = pending.pop(0)
+        for k, b in enumerate(pending):
+            if frozenset((a, b)) not in played:
+                break
+        else:
+            k = 0
+        b = pending.pop(k)
+        pairs.append((a, b))
+    return pairs
+
+
+# ***********
+# * Workers *
+# ***********
+_teams = None
+
+
+def _init_worker(teams):
+    # teams are sent once per worker instead of once per task
+    global _teams
+    _teams = teams
+
+
+def _play_series(task):
+    home, visitor, n_games, seed = task
+    games = []
+    for n in range(n_games):
+        # home advantage alternates within a series
+        h, v = (home, visitor) if n % 2 == 0 else (visitor, home)
+        result = play_game(
+            _teams[v].config, _teams[h].config, _teams[h].rule,
+            "{}-{}".format(seed, n),
+        )
+        games.append((v, h, result.score))
+    return home, visitor, games
+
+
+# *************
+# * Standings *
+# *************
+class Standings:
+    """
+    standings, head-to-head table and ratings
+    updated one game at a time
+    """
+    def __init__(self, n_teams, elo_k=16.0, elo_base=1500.0):
+        self.n_teams = n_teams
+        self.wins = np.zeros(n_teams, dtype=int)
+        self.losses = np.zeros(n_teams, dtype=int)
+        self.draws = np.zeros(n_teams, dtype=int)
+        self.runs_for = np.zeros(n_teams, dtype=int)
+        self.runs_against = np.zeros(n_teams, dtype=int)
+        # head_to_head[a, b]: points of a against b (draw = 0.5)
+        self.head_to_head = np.zeros((n_teams, n_teams))
+        self.games = np.zeros((n_teams, n_teams), dtype=int)
+        self.elo = np.full(n_teams, elo_base)
+        self.elo_k = elo_k
+        self._bt = np.ones(n_teams)
+
+    def add_game(self, visitor, home, score):
+        self.runs_for[[visitor, home]] += score
+        self.runs_against[[visitor, home]] += score[::-1]
+        if score[0] == score[1]:
+            self.draws[[visitor, home]] += 1
+            point = 0.5
+        elif score[0] > score[1]:
+            self.wins[visitor] += 1
+            self.losses[home] += 1
+            point = 1.0
+        else:
+            self.wins[home] += 1
+            self.losses[visitor] += 1
+            point = 0.0
+        self.head_to_head[visitor, home] += point
+        self.head_to_head[home, visitor] += 1 - point
+        self.games[visitor, home] += 1
+        self.games[home, visitor] += 1
+
+        expected = 1 / (1 + 10 ** ((self.elo[home] - self.elo[visitor]) / 400))
+        self.elo[visitor] += self.elo_k * (point - expected)
+        self.elo[home] -= self.elo_k * (point - expected)
+
+    @property
+    def points(self):
+        return self.wins + 0.5 * self.draws
+
+    def ranking(self):
+        """
+        team indices, best first (points, then run differential)
+        """
+        diff = self.runs_for - self.runs_against
+        return sorted(
+            range(self.n_teams), key=lambda n: (-self.points[n], -diff[n])
+        )
+
+    def bradley_terry(self, n_iter=100, tol=1e-8):
+        """
+        Bradley-Terry strengths by the MM algorithm (with half a win
+        of prior per team), normalized to mean 1; warm-started
+        from the previous fit as results stream in
+        """
+        strength = self._bt.copy()
+        total = self.head_to_head.sum(axis=1)
+        for _ in range(n_iter):
+            pair_sum = strength[:, None] + strength[None, :]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                denom = np.where(self.games > 0, self.games / pair_sum, 0.0)
+            denom = denom.sum(axis=1)
+            new = np.where(
+                denom > 0, (total + 0.5) / np.maximum(denom, 1e-12), strength
+            )
+            new /= new.mean()
+            if np.abs(new - strength).max() < tol:
+                strength = new
+                break
+            strength = new
+        self._bt = strength
+        return strength
+
+    def to_frame(self, names=None):
+        names = list(range(self.n_teams)) if names is None else names
+        frame = pd.DataFrame({
+            "team": names,
+            "wins": self.wins,
+            "losses": self.losses,
+            "draws": self.draws,
+            "points": self.points,
+            "runs_for": self.runs_for,
+            "runs_against": self.runs_against,
+            "elo": self.elo,
+            "bradley_terry": self.bradley_terry(),
+        })
+        return frame.loc[self.ranking()].reset_index(drop=True)
+
+    def head_to_head_frame(self, names=None):
+        names = list(range(self.n_teams)) if names is None else names
+        return pd.DataFrame(self.head_to_head, index=names, columns=names)
+
+
+# **************
+# * Tournament *
+# **************
+class Tournament:
+    """
+    series between Teams run over a process pool;
+    'on_series' is called with (tournament, home, visitor, games)
+    as each series finishes, after the standings are updated
+    """
+    def __init__(self, teams, games_per_series=3, seed=0,
+                 processes=None, on_series=None):
+        self.teams = list(teams)
+        self.games_per_series = games_per_series
+        self.seed = seed
+        self.processes = processes
+        self.on_series = on_series
+        self.standings = Standings(len(self.teams))
+        self.played = set()
+        self._n_series = 0
+
+    @property
+    def names(self):
+        return [team.name for team in self.teams]
+
+    def _tasks(self, pairs):
+        for home, visitor in pairs:
+            seed = "{}-{}".format(self.seed, self._n_series)
+            self._n_series += 1
+            yield home, visitor, self.games_per_series, seed
+
+    def _run(self, pool, pairs):
+        tasks = list(self._tasks(pairs))
+        for home, visitor, games in pool.imap_unordered(_play_series, tasks):
+            for v, h, score in games:
+                self.standings.add_game(v, h, score)
+            self.played.add(frozenset((home, visitor)))
+            if self.on_series is not None:
+                self.on_series(self, home, visitor, games)
+
+    def _pool(self):
+        return Pool(
+            self.processes, initializer=_init_worker, initargs=(self.teams,)
+        )
+
+    def run_round_robin(self, n_cycles=1):
+        # series of different rounds are independent: stream them all
+        pairs = [
+            pair for pairs in round_robin(len(self.teams), n_cycles)
+            for pair in pairs
+        ]
+        with self._pool() as pool:
+            self._run(pool, pairs)
+        return self.standings
+
+    def run_swiss(self, n_rounds):
+        rng = random.Random(self.seed)
+        with self._pool() as pool:
+            for n in range(n_rounds):
+                if n == 0:
+                    ranking = list(range(len(self.teams)))
+                    rng.shuffle(ranking)
+                else:
+                    ranking = self.standings.ranking()
+                pairs = swiss_pairing(ranking, self.played)
+                self._run(pool, pairs)
+        return self.standings
+
+
+def recommended_swiss_rounds(n_teams):
+    return max(1, math.ceil(math.log2(n_teams)))
@@ -0,0 +1,259 @@
+"""
+Zobrist hashing of the decision-relevant state of a Game and
+a bounded transposition table keyed by it.
+
+The hash is the XOR of 64-bit keys of the state components:
+  cards: (side, place, kind, copy) for the hands and the zones;
+         interchangeable cards share a kind (belief.card_kind), so
+         that play sequences ending with the same cards transpose
+  situation: out, runner on each base, score, inning and half, batting-order
+         pointers, batter and pitcher on the field, gauge entries
+         differing from the default
+The card part is maintained by the card events of the players;
+the situation part is brought up to date on demand, XORing out and in
+the keys of only the components that changed since the last hash.
+A component without value (no runner, no batter, a default gauge
+entry) adds no key.
+"""
+import hashlib
+from . belief import card_kind
+from . game import Observer, HitGauge, OutGauge
+from . game_player import PlayerObserver
+
+
+DEFAULT_GAUGES = (HitGauge().gauge, OutGauge().gauge)
+
+_keys = {}
+
+
+def zobrist_key(*parts):
+    """
+    64-bit random key of a state component, identical in every process
+    """
+    key = _keys.get(parts)
+    if key is None:
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+        key = _keys[parts] = int.from_bytes(digest, "little")
+    return key
+
+
+def _components(game):
+    """
+    names of the situation components, in the order of _situation_values
+    """
+    names = [("out",), ("half",), ("inning",)]
+    for side in (0, 1):
+        names += [("score", side), ("next_batter", side)]
+    names += [("runner", base) for base in range(len(game.field.runners))]
+    names += [("batter",), ("pitcher",)]
+    for n, gauge in enumerate((game.hit_gauge.gauge, game.out_gauge.gauge)):
+        names += [("gauge", n, str(key)) for key in gauge]
+    return names
+
+
+def _situation_values(game):
+    score = game.score_board.total_score
+    field = game.field
+    values = [
+        game.out, game.is_bottom, game.inning,
+        score[0], game.next_batter[0], score[1], game.next_batter[1],
+    ]
+    values += [
+        None if runner is None else runner.id for runner in field.runners
+    ]
+    values.append(None if field.batter_box is None else field.batter.id)
+    values.append(None if field.mound is None else field.mound.id)
+    for gauge, default in zip(
+        (game.hit_gauge.gauge, game.out_gauge.gauge), DEFAULT_GAUGES
+    ):
+        values += [
+            None if result is default[key] else result.__name__
+            for key, result in gauge.items()
+        ]
+    return values
+
+
+def _component_key(name, value):
+    return 0 if value is None else zobrist_key(*name, value)
+
+
+def situation_hash(game):
+    """
+    situation part of the hash, computed from scratch
+    """
+    h = 0
+    for name, value in zip(_components(game), _situation_values(game)):
+        h ^= _component_key(name, value)
+    return h
+
+
+def _places(player):
+    """
+    (place, cards) of the hand and the zones of a player
+    """
+    yield "hand", player.deck_master.hand
+    field = player.deck_field
+    yield "tactics", [card for card, _ in field.tactics_zone]
+    yield "vs", [card for card, _ in field.vs_zone]
+    yield "sp_combo", [card for card, _ in field.sp_combo_zone]
+
+
+def card_hash(game):
+    """
+    card part of the hash, computed from scratch
+    """
+    h = 0
+    for side, player in enumerate(game.players):
+        for place, cards in _places(player):
+            copies = {}
+            for card in cards:
+                kind = card_kind(card)
+                n = copies.get(kind, 0)
+                copies[kind] = n + 1
+                h ^= zobrist_key(side, place, kind, n)
+    return h
+
+
+def game_hash(game):
+    return card_hash(game) ^ situation_hash(game)
+
+
+# *****************
+# * ZobristHasher *
+# *****************
+class ZobristHasher(Observer, PlayerObserver):
+    """
+    observer maintaining the card part of the hash of a game;
+    the situation part is updated when the hash is asked for
+    """
+    def __init__(self):
+        self.game = None
+        self.players = ()
+        self.card_hash = 0
+        self.copies = {} # (side, place, kind) -> number of cards
+        self.situation_hash = 0
+        self._components = []
+        self._values = [] # of the components at the last hash
+
+    def attach(self, game):
+        self.game = game
+        self.players = tuple(game.players)
+        game.add_observer(self)
+        for player in game.players:
+            player.add_observer(self)
+        self.copies.clear()
+        self.card_hash = 0
+        self._values = []
+        for side, player in enumerate(game.players):
+            for place, cards in _places(player):
+                for card in cards:
+                    self._add(side, place, card)
+        return self
+
+    def _side(self, player):
+        for side, other in enumerate(self.players):
+            if other is player:
+                return side
+
+    def _add(self, side, place, card):
+        slot = (side, place, card_kind(card))
+        n = self.copies.get(slot, 0)
+        self.copies[slot] = n + 1
+        self.card_hash ^= zobrist_key(*slot, n)
+
+    def _remove(self, side, place, card):
+        slot = (side, place, card_kind(card))
+        n = self.copies[slot] - 1
+        self.copies[slot] = n
+        self.card_hash ^= zobrist_key(*slot, n)
+
+    # --- card events ---
+    def on_draw(self, player, cards):
+        side = self._side(player)
+        for card in cards:
+            self._add(side, "hand", card)
+
+    def on_set_card(self, player, zone, idx, is_open):
+        side = self._side(player)
+        card = player.deck_master.hand[idx]
+        self._remove(side, "hand", card)
+        self._add(side, zone, card)
+
+    def on_trash_zone(self, player, zone):
+        side = self._side(player)
+        for card, _ in getattr(player.deck_field, zone + "_zone"):
+            self._remove(side, zone, card)
+
+    def _update_situation(self):
+        values = _situation_values(self.game)
+        old = self._values
+        if len(values) != len(old):
+            self._components = _components(self.game)
+            self.situation_hash = 0
+            old = [None] * len(values)
+        if values != old:
+            for name, before, after in zip(self._components, old, values):
+                if before != after:
+                    self.situation_hash ^= _component_key(name, before) \
+                        ^ _component_key(name, after)
+        self._values = values
+        return self.situation_hash
+
+    def hash(self):
+        return self.card_hash ^ self._update_situation()
+
+
+# **********************
+# * TranspositionTable *
+# **********************
+class TranspositionTable:
+    """
+    2 ** 'bits' buckets of two entries (key, depth, value, best):
+    the first keeps the deepest search, the second the latest
+    """
+    def __init__(self, bits=20):
+        self.mask = (1 << bits) - 1
+        self.deep = [None] * (1 << bits)
+        self.recent = [None] * (1 << bits)
+        self.hits = 0
+        self.misses = 0
+        self.replaced = 0
+
+    def get(self, key, depth=0):
+        """
+        the entry of 'key' searched at least 'depth' deep, or None
+        """
+        i = key & self.mask
+        for entry in (self.deep[i], self.recent[i]):
+            if entry is not None and entry[0] == key and entry[1] >= depth:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key, value, depth=0, best=None):
+        i = key & self.mask
+        entry = (key, depth, value, best)
+        deep = self.deep[i]
+        if deep is None or depth >= deep[1]:
+            if deep is not None and deep[0] != key:
+                # the shallower entry still gets the second slot
+                self._put_recent(i, deep)
+            self.deep[i] = entry
+        elif deep[0] != key:
+            self._put_recent(i, entry)
+        # else: a shallower search of the key kept in the first slot
+
+    def _put_recent(self, i, entry):
+        recent = self.recent[i]
+        if recent is not None and recent[0] != entry[0]:
+            self.replaced += 1
+        self.recent[i] = entry
+
+    def clear(self):
+        self.deep = [None] * len(self.deep)
+        self.recent = [None] * len(self.recent)
+
+    def __len__(self):
+        return sum(entry is not None for entry in self.deep) \
+            + sum(entry is not None for entry in self.recent)